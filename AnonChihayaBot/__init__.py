@@ -3,12 +3,16 @@
 '''
 # -*- coding: utf-8 -*-
 # !/usr/bin/python3
-from typing import Literal
-from threading import Thread, Event
+import asyncio
+from threading import Thread
+from typing import Literal, Optional, Union, Any
 
-from AnonChihayaBot.adapters import Adapter
+from AnonChihayaBot.adapters import Adapter, codec
+from AnonChihayaBot.adapters.config import ServerConfig
+from AnonChihayaBot.adapters.server import WebHookServer
 from AnonChihayaBot.adapters.Satori import Config as SatoriConfig
 from AnonChihayaBot.adapters.Satori import Adapter as SatoriAdapter
+from AnonChihayaBot.adapters.Satori import AsyncAdapter as SatoriAsyncAdapter
 
 # AnonChihayaBot 类
 class AnonChihayaBot():
@@ -20,13 +24,25 @@ class AnonChihayaBot():
         '''实例所启用的服务种类'''
         self.adapters: list[Adapter] = []
         '''实例所包括的所有 Bot 线程'''
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        '''使用 asyncio 引擎时所有适配器共用的事件循环'''
+        self._loop_thread: Optional[Thread] = None
+        '''运行事件循环的线程'''
+        self.server: Optional[WebHookServer] = None
+        '''内置 WebHook 服务器'''
+        self._routes: dict[tuple[Optional[str], str], Adapter] = {}
+        '''平台、机器人 ID 与适配器的对应关系缓存'''
+        self.rejected: int = 0
+        '''通过 WebHook 接收但无法解码、未找到对应适配器或未能放入分发队列的信令数'''
         return
     # AnonChihayaBot 运行方法
     @classmethod
     def run(
         cls,
         protocol: Literal['Satori']='Satori',
-        serve: Literal['WebSocket', 'WebHook', 'Dev']='WebSocket'
+        serve: Literal['WebSocket', 'WebHook', 'Dev']='WebSocket',
+        engine: Literal['thread', 'asyncio']='thread',
+        builtin_server: bool=True
     ) -> 'AnonChihayaBot':
         '''AnonChihayaBot 运行方法
 
@@ -36,6 +52,11 @@ class AnonChihayaBot():
                 `WebSocket` : 采用 `WebSocket` 服务连接 Satori 协议
                 `WebHook` : 采用 `WebHook` 服务连接 Satori 协议
                 `Dev` : 采用 `WebSocket` 服务连接 Satori 协议，并由框架进行 HTTP POST 推送
+            engine (Literal[&#39;thread&#39;, &#39;asyncio&#39;], optional): 运行时采用的引擎
+                `thread` : 每个连接使用独立的线程运行
+                `asyncio` : 所有连接在同一个事件循环中运行，需要安装 `websockets`，不支持 `WebHook` 服务
+            builtin_server (bool, optional): 使用 `WebHook` 服务时是否启动内置 WebHook 服务器
+                若使用其他 HTTP 服务器接收推送，则需置为 `False` 并自行调用 `handle` 方法
 
         返回:
             AnonChihayaBot: AnonChihayaBot 实例
@@ -45,33 +66,179 @@ class AnonChihayaBot():
         if protocol == 'Satori': # 使用 Satori 协议
             config = SatoriConfig.from_yaml(serve)
         
+            # 使用 asyncio 引擎时创建共用的事件循环
+            if engine == 'asyncio':
+                if serve == 'WebHook':
+                    raise ValueError('asyncio 引擎不支持 WebHook 服务。')
+                anon_app.loop = asyncio.new_event_loop()
+                anon_app._loop_thread = Thread(
+                    target=anon_app.loop.run_forever,
+                    name='AnonChihayaBot-loop'
+                )
+                anon_app._loop_thread.start()
+            
             # 遍历 config 创建 Adapter
             for cfg in config:
                 if cfg.protocol == 'Satori':
-                    anon_app.adapters.append(SatoriAdapter.setup(cfg, serve))
+                    if anon_app.loop is not None:
+                        anon_app.adapters.append(SatoriAsyncAdapter.setup(cfg, serve, anon_app.loop))
+                    else:
+                        anon_app.adapters.append(SatoriAdapter.setup(cfg, serve))
+        
+        # 启动内置 WebHook 服务器
+        if serve == 'WebHook' and builtin_server:
+            anon_app.server = WebHookServer(ServerConfig.from_yaml(), anon_app._on_webhook)
+            anon_app.server.start()
         
         return anon_app
     
+    # 查找事件对应的适配器
+    def route(self, self_id: Optional[str]=None, platform: Optional[str]=None) -> Optional[Adapter]:
+        '''根据机器人 ID 与平台查找事件对应的适配器
+
+        参数:
+            self_id (Optional[str], optional): 机器人 ID
+            platform (Optional[str], optional): 机器人所在的平台
+
+        返回:
+            Optional[Adapter]: 对应的适配器，不存在时返回 `None`
+        '''
+        if len(self.adapters) == 1: # 只有一个适配器
+            return self.adapters[0]
+        if self_id is None:
+            return None
+        # 不同平台的机器人 ID 可能相同
+        if (adapter := self._routes.get((platform, self_id), None)) is not None:
+            return adapter
+        for adapter in self.adapters:
+            accounts = getattr(adapter.config, 'accounts', [])
+            bot = adapter.bots.get(self_id, None)
+            if (bot is not None and (platform is None or bot.platform == platform)) or any(
+                account.id == self_id and (platform is None or account.platform == platform)
+                for account in accounts
+            ):
+                self._routes[(platform, self_id)] = adapter
+                return adapter
+        return None
+    
+    # 将信令交由对应的适配器处理
+    def _dispatch(self, payloads: list[Any], self_id: Optional[str]=None, platform: Optional[str]=None) -> int:
+        '''将已解码的信令按顺序交由对应适配器的事件分发器处理
+
+        同一适配器的信令会合并为一个任务提交，以保证其处理顺序与请求中的顺序一致。
+        未能被接收的信令计入 `rejected`。
+
+        参数:
+            payloads (list[Any]): 已解码的信令列表
+            self_id (Optional[str], optional): 请求头中的机器人 ID
+            platform (Optional[str], optional): 请求头中的平台
+
+        返回:
+            int: 被接收的信令数
+        '''
+        batches: dict[int, tuple[Adapter, list[Any]]] = {}
+        rejected = 0
+        for payload in payloads:
+            if not isinstance(payload, dict):
+                rejected += 1
+                continue
+            item_self_id, item_platform = self_id, platform
+            body = payload.get('body', None)
+            if isinstance(body, dict): # 优先使用信令中的机器人信息
+                item_self_id = body.get('self_id', self_id)
+                item_platform = body.get('platform', platform)
+            adapter = self.route(item_self_id, item_platform)
+            if adapter is None:
+                print(f'未找到机器人 {item_self_id} ({item_platform}) 对应的适配器。')
+                rejected += 1
+                continue
+            batches.setdefault(id(adapter), (adapter, []))[1].append(payload)
+        # 每个适配器只提交一个任务
+        for adapter, items in batches.values():
+            request = items[0] if len(items) == 1 else items
+            if not adapter.dispatcher.submit(adapter.handle_request, request):
+                rejected += len(items)
+        if rejected > 0:
+            self.rejected += rejected
+            print(f'本次请求中有 {rejected} 条信令未能被接收。')
+        return len(payloads) - rejected
+    
+    # 内置 WebHook 服务器的请求处理函数
+    def _on_webhook(self, body: bytes, headers: dict[str, str]) -> int:
+        '''内置 WebHook 服务器的请求处理函数，解析请求体后立即返回
+
+        请求体可以为单个信令、信令数组或换行分隔的多个信令。
+        只要有信令被接收即返回 `200`，避免推送方重发已接收的信令，其余信令计入统计信息；
+        全部未能被接收时返回 `503`。
+
+        参数:
+            body (bytes): 请求体
+            headers (dict[str, str]): 请求头，键为小写
+
+        返回:
+            int: 响应状态码
+        '''
+        payloads, errors = codec.loads_batch(body)
+        if errors > 0:
+            self.rejected += errors
+            print(f'本次请求中有 {errors} 条信令无法解码，已跳过。')
+            if len(payloads) == 0:
+                return 400
+        if self._dispatch(payloads, headers.get('x-self-id', None), headers.get('x-platform', None)) > 0:
+            return 200
+        return 503
+    
     # 处理 request
-    def handle(self, request: str) -> None:
+    def handle(self, request: Union[str, bytes, dict[str, Any], list[Any]]) -> None:
         '''处理 request
             示例：
             ```python
-            AnonChohayaBot.handle(request.get_json())
+            AnonChohayaBot.handle(request.get_data())
             ```
 
         参数:
-            request (str): 从`flask.request` 接收到的 `json` 字符串
+            request (Union[str, bytes, dict[str, Any], list[Any]]): 从`flask.request` 接收到的原始请求体或 `json` 数据
+                支持单个信令、信令数组与换行分隔的多个信令，将按顺序进行处理
         '''
         if self.serve != 'WebHook':
             print(f'该 AnonChihayaBot 实例所启动的是 {self.serve} 服务，不可使用该方法。')
             return
-        for adapter in self.adapters:
-            Thread(target=adapter.handle_request, args=(request,), daemon=True).start()
+        if isinstance(request, dict):
+            payloads, errors = [request], 0
+        elif isinstance(request, list):
+            payloads, errors = request, 0
+        else:
+            payloads, errors = codec.loads_batch(request)
+        if errors > 0:
+            self.rejected += errors
+            print(f'本次请求中有 {errors} 条信令无法解码，已跳过。')
+        self._dispatch(payloads)
         return
     
     # 停止运行 AnonChihayaBot
     def stop(self) -> None:
         '''停止运行 AnonChihayaBot'''
+        if self.server is not None:
+            self.server.shutdown()
         for adapter in self.adapters:
-            adapter.manual_close = True
+            adapter.close()
+            adapter.dispatcher.shutdown()
+        # 停止事件循环
+        if self.loop is not None and self._loop_thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._loop_thread.join(timeout=5)
+    
+    # 获取事件分发统计信息
+    def stats(self) -> dict[str, dict[str, Any]]:
+        '''获取各适配器的连接状态与事件分发统计信息，WebHook 服务的统计信息位于 `WebHook` 键下
+
+        返回:
+            dict[str, dict[str, Any]]: 以适配器连接对象为键的统计信息
+        '''
+        stats: dict[str, dict[str, Any]] = {adapter.get_connection: adapter.stats() for adapter in self.adapters}
+        if self.serve == 'WebHook':
+            stats['WebHook'] = {
+                'rejected': self.rejected,
+                **(self.server.stats() if self.server is not None else {})
+            }
+        return stats
@@ -5,8 +5,10 @@ import os
 import sys
 import importlib
 from types import ModuleType
+from typing import Optional
 
 from AnonChihayaBot.adapters import logger
+from AnonChihayaBot.adapters import Event
 from AnonChihayaBot.adapters.utils import Function, function_list
 
 # 插件包所在文件夹路径
@@ -48,6 +50,122 @@ class Plugin():
         self.functions: list[Function] = []
         '''插件功能对象列表'''
 
+# 指令前缀树节点
+class _CommandNode():
+    '''指令前缀树节点'''
+    __slots__ = ('children', 'functions')
+    # 初始化
+    def __init__(self) -> None:
+        '''指令前缀树节点'''
+        self.children: dict[str, '_CommandNode'] = {}
+        '''子节点'''
+        self.functions: list[tuple[int, Plugin, Function]] = []
+        '''以该节点为指令结尾的功能'''
+
+# 插件功能索引
+class FunctionIndex():
+    '''插件功能索引
+
+    将带有指令过滤的功能按指令存入前缀树，提及机器人的功能与无过滤的功能单独存放，
+    分发事件时只需查找一次消息首段文本即可得到需要执行的功能。
+    '''
+    # 初始化
+    def __init__(self) -> None:
+        '''插件功能索引'''
+        self.root: _CommandNode = _CommandNode()
+        '''指令前缀树根节点'''
+        self.to_me: list[tuple[int, Plugin, Function]] = []
+        '''只在机器人被提及时启用的功能'''
+        self.others: list[tuple[int, Plugin, Function]] = []
+        '''无过滤的功能'''
+        self.count: int = 0
+        '''已添加的功能数'''
+    
+    # 由插件列表建立索引
+    @classmethod
+    def build(cls, plugins: list[Plugin]) -> 'FunctionIndex':
+        '''由插件列表建立索引
+
+        参数:
+            plugins (list[Plugin]): 插件列表
+
+        返回:
+            FunctionIndex: 插件功能索引
+        '''
+        index = cls()
+        for plugin in plugins:
+            for function in plugin.functions:
+                index.add(plugin, function)
+        return index
+    
+    # 添加功能
+    def add(self, plugin: Plugin, function: Function) -> None:
+        '''添加功能
+
+        参数:
+            plugin (Plugin): 功能所在插件
+            function (Function): 功能对象
+        '''
+        item = (self.count, plugin, function)
+        self.count += 1
+        if function.to_me: # 提及机器人时启用
+            self.to_me.append(item)
+        elif function.command != '': # 有指令过滤
+            node = self.root
+            for char in function.command:
+                node = node.children.setdefault(char, _CommandNode())
+            node.functions.append(item)
+        else: # 无过滤
+            self.others.append(item)
+    
+    # 查找指令匹配的功能
+    def match_command(self, text: str) -> list[tuple[int, Plugin, Function]]:
+        '''查找指令为文本前缀的功能
+
+        参数:
+            text (str): 消息首段文本
+
+        返回:
+            list[tuple[int, Plugin, Function]]: 匹配的功能
+        '''
+        result: list[tuple[int, Plugin, Function]] = []
+        node = self.root
+        for char in text:
+            child = node.children.get(char)
+            if child is None:
+                break
+            node = child
+            result.extend(node.functions)
+        return result
+    
+    # 查找需要处理事件的功能
+    def match(self, event: Event) -> list[tuple[Plugin, Function]]:
+        '''查找需要处理事件的功能，按功能注册顺序返回
+
+        参数:
+            event (Event): 事件对象
+
+        返回:
+            list[tuple[Plugin, Function]]: 需要处理事件的插件与功能
+        '''
+        try:
+            message = event.get_message()
+        except (NotImplementedError, ValueError): # 不是消息事件，只交由无过滤的功能处理
+            return [(plugin, function) for _, plugin, function in self.others]
+        items = self.others.copy()
+        if self.to_me and event.is_tome():
+            items.extend(self.to_me)
+        if message and message[0].is_text():
+            text: Optional[str] = message[0].data.get('text')
+            if text:
+                items.extend(self.match_command(text))
+        items.sort(key=lambda item: item[0])
+        return [(plugin, function) for _, plugin, function in items]
+
+# 插件功能索引
+global function_index
+function_index: FunctionIndex = FunctionIndex()
+
 # 插件热重载，限制插件位于 './plugin' 文件夹内
 def _plugin_reload() -> None:
     '''插件热重载'''
@@ -77,6 +195,7 @@ def _plugin_reload() -> None:
     
     global plugins
     global in_reloading
+    global function_index
     
     in_reloading = True
     plugins.clear() # 重置插件列表
@@ -108,6 +227,7 @@ def _plugin_reload() -> None:
         function_list.clear()
         plugins.append(plg)
         print(f'插件 [{plugin_name}] 加载完成。')
+    function_index = FunctionIndex.build(plugins)
     in_reloading = False
     return
 
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 # !/usr/bin/python3
 from .adapter import Adapter as Adapter
+from .async_adapter import AsyncAdapter as AsyncAdapter
 from .bot import Bot as Bot
 from .event import Event as Event
 from .event import NoticeEvent as NoticeEvent
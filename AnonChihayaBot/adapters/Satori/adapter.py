@@ -1,21 +1,28 @@
 '''Anon Chihaya 框架 Satori 协议适配器
 机器人定义
 '''
-import json
+import os
 import httpx
+import random
 import websocket
-from time import sleep
+from time import monotonic, sleep
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 from httpx import Response
-from threading import Thread
-from typing import Literal, cast, Any
+from threading import Thread, Lock, Event as ThreadEvent
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal, Optional, Union, Any
 from typing_extensions import override
 
-from AnonChihayaBot.adapters import logger
+from AnonChihayaBot.adapters import Json, logger
+from AnonChihayaBot.adapters import codec
 from AnonChihayaBot.adapters import Adapter as BaseAdapter
+from AnonChihayaBot.adapters.forwarder import Forwarder
+from AnonChihayaBot.adapters.utils import CircuitBreaker
+from AnonChihayaBot.inner_plugin import payload_filter
 
 from .bot import Bot
-from .config import Config
-from .models import Event as SatoriEvent
+from .config import Config, CONFIG_DIR
 from .event import (
     Event,
     LoginEvent, LoginAddedEvent, LoginRemovedEvent, LoginUpdatedEvent,
@@ -23,10 +30,41 @@ from .event import (
 )
 from .models import (
     Identify, IdentifyBody,
-    Ping, Ready, EventSignaling, Pong,
+    Ping, Ready, Pong,
     Login
 )
 
+# 获取检查点文件存储目录
+CHECKPOINT_DIR = CONFIG_DIR + '/checkpoint'
+
+# 请求未被服务端接收的连接错误，对所有 API 都可以安全重试
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# 检查点被阻塞后最多记录的已处理事件数
+MAX_HANDLED = 1024
+
+# 解析 Retry-After 响应头
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    '''解析 `Retry-After` 响应头，支持秒数与 HTTP 日期两种格式
+
+    参数:
+        value (Optional[str]): 响应头的值
+
+    返回:
+        Optional[float]: 需要等待的秒数，无法解析时返回 `None`
+    '''
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - datetime.now(retry_at.tzinfo).timestamp())
+    except (TypeError, ValueError):
+        return None
+
 # 适配器类型
 class Adapter(BaseAdapter):
     '''Satori 适配器
@@ -40,8 +78,10 @@ class Adapter(BaseAdapter):
     '''HTTP 客户端'''
     webhook_client: httpx.Client
     '''Webhook 客户端'''
+    forwarder: Optional[Forwarder] = None
+    '''Dev 服务下的 Webhook 转发器'''
     sequence: int = 0
-    '''最后一次接收到的 `EVENT` 信令的 `id` 字段'''
+    '''检查点序号，不大于该序号的 `EVENT` 信令均已被交由分发器、转发器或被过滤'''
     config: Config
     '''机器人配置'''
     # 初始化方法
@@ -53,6 +93,149 @@ class Adapter(BaseAdapter):
         '''
         super().__init__(config)
         self.bots: dict[str, Bot] = {}
+        self.api_url: str = 'http://{}{}/v{}'.format(self.api_base, config.path.rstrip('/'), config.version)
+        '''API 请求链接前缀'''
+        self._saved_sequence: int = 0
+        '''最后一次写入检查点文件的 `sequence`'''
+        self._new_session: bool = False
+        '''是否刚刚完成鉴权且尚未收到事件'''
+        self._received: int = 0
+        '''当前会话中接收到的最大事件序号，用于丢弃重复的事件'''
+        self._gap: bool = False
+        '''检查点之后是否有事件被丢弃，此时检查点不再前进'''
+        self._handled: set[int] = set()
+        '''检查点被阻塞后已处理的事件序号，恢复会话时不会被重复处理'''
+        self._backoff_attempt: int = 0
+        '''当前连续重连次数，鉴权成功后归零'''
+        self._stop_event: ThreadEvent = ThreadEvent()
+        '''停止信号，用于唤醒等待中的监管与心跳线程'''
+        self.ingested: int = 0
+        '''通过 WebHook 接收的信令数'''
+        self.ingest_errors: int = 0
+        '''通过 WebHook 接收但无法解码或处理的信令数'''
+        self._ingest_lock = Lock()
+        '''接收计数器锁'''
+        self.breaker: CircuitBreaker = CircuitBreaker(config.breaker_threshold, config.breaker_timeout)
+        '''API 请求熔断器'''
+        self.prefetcher: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=4,
+            thread_name_prefix=f'{self.get_connection}-prefetch'
+        )
+        '''分页迭代时预取下一页的线程池'''
+    
+    # 检查点文件路径
+    @property
+    def checkpoint_file(self) -> str:
+        '''检查点文件路径'''
+        return CHECKPOINT_DIR + '/{}_{}_{}.json'.format(
+            self.get_name(),
+            self.config.ip.replace(':', '_'),
+            self.config.port
+        )
+    
+    # 读取检查点
+    def _load_checkpoint(self) -> None:
+        '''从检查点文件读取上一次运行时记录的 `sequence`'''
+        if not os.path.exists(self.checkpoint_file):
+            return
+        try:
+            checkpoint = Json.read_to_dict(self.checkpoint_file)
+            self.sequence = int(checkpoint.get('sequence', 0))
+            self._saved_sequence = self._received = self.sequence
+        except Exception as exception:
+            print(f'[{self.get_connection}] 读取检查点失败：{type(exception).__name__}: {exception}')
+            logger.error(exception)
+    
+    # 保存检查点
+    def _save_checkpoint(self) -> None:
+        '''在 `sequence` 发生变化时写入检查点文件'''
+        sequence = self.sequence
+        if sequence == self._saved_sequence:
+            return
+        try:
+            os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+            Json.write(self.checkpoint_file, {'sequence': sequence})
+            self._saved_sequence = sequence
+        except Exception as exception:
+            print(f'[{self.get_connection}] 保存检查点失败：{type(exception).__name__}: {exception}')
+            logger.error(exception)
+    
+    # 记录事件序号
+    def _update_sequence(self, payload: dict[str, Any]) -> bool:
+        '''记录接收到的事件信令的 `id` 字段，并判断事件是否已被处理过
+
+        只记录接收进度用于去重，检查点由 `_commit_sequence` 在事件被接收后推进。
+
+        参数:
+            payload (dict[str, Any]): 接收到的 payload 对象
+
+        返回:
+            bool: 是否为新事件
+        '''
+        if payload.get('op', None) == 4: # 鉴权回复信令，开始新的会话，服务端将从检查点之后重发事件
+            self._new_session = True
+            self._received = self.sequence
+            self._gap = False
+            return True
+        if payload.get('op', None) != 0: # 非事件信令
+            return True
+        body = payload.get('body', None)
+        if not isinstance(body, dict) or not isinstance(id_ := body.get('id', None), int):
+            return True
+        new_session, self._new_session = self._new_session, False
+        if id_ <= self._received:
+            if not new_session: # 重复的事件
+                return False
+            # 会话的首个事件序号不大于检查点，说明服务端序号已被重置
+            info = f'[{self.get_connection}] 服务端事件序号已重置 ({self.sequence} -> {id_})。'
+            print(info)
+            logger.warning(info)
+            self._gap = False
+            self._handled.clear()
+            self.sequence = id_ - 1
+        self._received = id_
+        if id_ in self._handled: # 检查点被阻塞后重发的已处理事件
+            self._handled.discard(id_)
+            self._commit_sequence(payload, True)
+            return False
+        return True
+    
+    # 推进检查点
+    def _commit_sequence(self, payload: dict[str, Any], accepted: bool) -> None:
+        '''事件被交由分发器、转发器或被过滤后推进检查点，事件被丢弃时检查点停止前进
+
+        检查点停止前进后，恢复会话时服务端会从被丢弃的事件开始重发，
+        此后已处理过的事件会被记录下来，重发时不会被再次处理。
+
+        参数:
+            payload (dict[str, Any]): 接收到的 payload 对象
+            accepted (bool): 事件是否被接收
+        '''
+        if payload.get('op', None) != 0:
+            return
+        body = payload.get('body', None)
+        if not isinstance(body, dict) or not isinstance(id_ := body.get('id', None), int):
+            return
+        if not accepted:
+            if not self._gap:
+                self._gap = True
+                warning = f'[{self.get_connection}] 事件 {id_} 未能被处理，检查点将停留在 {self.sequence}。'
+                print(warning)
+                logger.warning(warning)
+            return
+        if not self._gap:
+            self.sequence = id_
+            if self._handled:
+                self._handled = {handled for handled in self._handled if handled > id_}
+            return
+        self._handled.add(id_)
+        if len(self._handled) > MAX_HANDLED: # 被丢弃的事件长时间未被重发，放弃等待
+            warning = f'[{self.get_connection}] 等待重发的事件过多，检查点跳过至 {max(self._handled)}。'
+            print(warning)
+            logger.warning(warning)
+            self.sequence = max(self._handled)
+            self._handled.clear()
+            self._gap = False
     
     # 发送鉴权信令
     def _identify(self, ws: websocket.WebSocketApp, sequence: int=0) -> None:
@@ -70,7 +253,7 @@ class Adapter(BaseAdapter):
             )
         )
         try:
-            ws.send(singaling.model_dump_json())
+            ws.send(codec.dumps(singaling.model_dump(mode='json')))
         except Exception as exception:
             info = f'鉴权信令发送失败: {type(exception).__name__}: {exception}'
             print(info)
@@ -83,30 +266,31 @@ class Adapter(BaseAdapter):
         '''发送心跳信令'''
         # 构建 PING 信令
         singaling = Ping()
-        self.ws.send(singaling.model_dump_json())
+        self.ws.send(codec.dumps(singaling.model_dump(mode='json')))
         return
     
     # 进行心跳活动
     def _heartbeat(self) -> None:
-        '''进行心跳活动'''
-        max_failure = 0 # 当失败超过 5 次后关闭连接
-        while True:
-            if self.manual_close: # 主动关闭
-                self.ws.close()
-                break
-            if max_failure >= 5: # 断连自动重连
-                self.ws.close()
-                self._reconnect()
-                break
+        '''进行心跳活动，整个适配器生命周期内只运行一个心跳线程'''
+        max_failure = 0 # 当失败超过 5 次后关闭连接，由监管线程负责重连
+        while not self._stop_event.wait(self.config.heartbeat_interval):
+            # 定期保存检查点
+            self._save_checkpoint()
+            if self.state != 'connected': # 未连接时不发送心跳
+                max_failure = 0
+                continue
             # 尝试发送心跳包
             try:
-                sleep(self.config.heartbeat_interval)
                 self._ping()
-            except:
-                print('本次心跳发送失败。')
+            except Exception as exception:
                 max_failure += 1
+                print(f'[{self.get_connection}] 本次心跳发送失败 ({max_failure}/5)：{type(exception).__name__}: {exception}')
+                if max_failure >= 5: # 关闭连接以触发重连
+                    max_failure = 0
+                    self.ws.close()
                 continue
             max_failure = 0
+        self._save_checkpoint()
     
     # 连接 Bot 对象
     def _bot_connect(self, logins: list[Login]) -> None:
@@ -116,44 +300,94 @@ class Adapter(BaseAdapter):
                 continue
             if login.user is None:
                 continue
-            # 过滤来自平台 'qq' 的消息
-            if login.platform == 'qq':
+            # 过滤来自被忽略平台的登录
+            if login.platform in self.config.ignore_platforms:
                 continue
-            self.bots[login.self_id] = Bot(
-                self,
-                login.self_id,
-                login.platform if login.platform is not None else '',
-                self.config
-            )
-            if login.user is not None: # 记录登录信息
-                self.bots[login.self_id].get_ready(login.user)
+            platform = login.platform if login.platform is not None else ''
+            bot = self.bots.get(login.self_id, None)
+            if bot is None or bot.platform != platform: # 复用已有的机器人，平台变化时才重新创建
+                self.bots[login.self_id] = Bot(self, login.self_id, platform, self.config)
+                if bot is not None: # 停止被替换的机器人的发送队列
+                    bot.outbox.shutdown()
+                bot = self.bots[login.self_id]
+            bot.get_ready(login.user) # 记录登录信息
             login_info = (
                 f'[{self.get_name()}|{login.self_id}] {login.user.name} 已连接到平台 {login.platform}'
             )
             print(login_info)
             logger.info(login_info)
     
+    # 在验证前过滤 payload 对象
+    def _pre_filter(self, payload: dict[str, Any]) -> bool:
+        '''在验证前根据原始数据过滤事件信令，非事件信令总是保留
+
+        参数:
+            payload (dict[str, Any]): 接收到的 payload 对象
+
+        返回:
+            bool: 是否被过滤
+        '''
+        if payload.get('op', None) != 0: # 非事件信令
+            return True
+        body = payload.get('body', None)
+        if not isinstance(body, dict): # 交由验证过程报错
+            return True
+        type_: str = body.get('type', '')
+        if body.get('platform', None) in self.config.ignore_platforms: # 过滤来自被忽略平台的事件
+            passed = False
+        elif (
+            self.config.subscribe_events
+            and type_ not in self.config.subscribe_events
+            and not type_.startswith('login-')
+        ): # 过滤未订阅的事件，登录事件总是保留
+            passed = False
+        else: # 过滤被屏蔽的平台、群组与用户
+            passed = payload_filter(self.config.host_id, body)
+        if not passed and isinstance(type_, str) and type_.startswith('guild-'):
+            # 被丢弃的群组相关事件同样需要使缓存失效
+            self._invalidate_cache(body)
+        return passed
+    
+    # 根据被丢弃的事件使缓存失效
+    def _invalidate_cache(self, body: dict[str, Any]) -> None:
+        '''根据被预过滤丢弃的群组相关事件的原始数据使对应机器人的缓存失效
+
+        参数:
+            body (dict[str, Any]): 事件原始数据
+        '''
+        bot = self.bots.get(body.get('self_id', None)) # type: ignore
+        if bot is None:
+            return
+        guild = body.get('guild', None)
+        user = body.get('user', None)
+        guild_id = guild.get('id', None) if isinstance(guild, dict) else None
+        user_id = user.get('id', None) if isinstance(user, dict) else None
+        bot.invalidate_cache(
+            body['type'],
+            guild_id if isinstance(guild_id, str) else None,
+            user_id if isinstance(user_id, str) else None
+        )
+    
     # 处理接收到的 payload 对象
-    def _handle_payload(self, payload: dict[str, Any]) -> None:
-        '''处理接收到的 payload 对象
+    def _handle_payload(self, payload: dict[str, Any], verify: bool=False) -> bool:
+        '''处理接收到的 payload 对象，WebSocket 与 WebHook 共用
 
         参数:
             payload (dict[str, Any]): 接收到的 payload 对象
+            verify (bool, optional): 事件对应的机器人不存在时是否验证并创建机器人
+
+        返回:
+            bool: 信令是否合法并被正常处理，事件被分发器丢弃时为 `False`
         '''
-        if payload['op'] == 0: # 事件信令
-            try:
-                signaling = EventSignaling.model_validate(payload)
-            except Exception as exception:
-                print(payload)
-                print(f'{type(exception).__name__}: {exception}')
-                return
+        if payload['op'] == 0: # 事件信令，直接对 body 进行一次验证
+            signaling = None
         elif payload['op'] == 2: # 心跳回复信令
             signaling = Pong.model_validate(payload)
         elif payload['op'] == 4: # 鉴权回复信令
             signaling = Ready.model_validate(payload)
         else:
             print('未知的信令类型：{}'.format(payload['op']))
-            return
+            return False
         # 分情况处理信令
         if isinstance(signaling, Pong):
             pass
@@ -162,22 +396,38 @@ class Adapter(BaseAdapter):
             self._bot_connect(logins)
         else:
             try:
-                event = self.payload_to_event(signaling.body)
+                event = self.payload_to_event(payload['body'])
             except Exception as exception:
                 print(f'{type(exception).__name__}: {exception}')
                 logger.warning(f'将 payload 转换为事件时出错：{type(exception).__name__}: {exception}')
                 logger.error(exception)
-                return
+                return False
             # 处理 LoginEvent
             if isinstance(event, LoginEvent):
                 self._handle_login(event)
-                return
+                return True
             # 获取接收事件对应的机器人实例
-            if event.self_id in self.bots.keys():
-                bot = self.bots[event.self_id]
-                # 创建并运行一个子线程，处理事件（既然没有返回值那就不需要等待了罢！
-                Thread(target=bot.handle_event, args=(event,), daemon=True).start()
-        return
+            bot = self.bots.get(event.self_id, None)
+            if bot is None:
+                if not verify:
+                    return True
+                # 验证并创建机器人
+                try:
+                    verified = Bot.verify(
+                        self,
+                        event.self_id,
+                        event.platform,
+                        self.config
+                    )
+                    bot = self.bots.setdefault(event.self_id, verified)
+                    if bot is not verified: # 其他线程已添加该机器人
+                        verified.outbox.shutdown()
+                except Exception as exception:
+                    print(f'机器人 {event.self_id} 验证失败：{type(exception).__name__}: {exception}')
+                    return False
+            # 交由事件分发器处理事件
+            return self.dispatcher.submit(bot.handle_event, event)
+        return True
     
     # 处理接收到的 LoginEvent
     def _handle_login(self, event: LoginEvent) -> None:
@@ -185,94 +435,135 @@ class Adapter(BaseAdapter):
         print(event.get_log())
         logger.info(event.get_log())
         login = event.login
+        if login.user is None:
+            return
+        self_id = login.self_id if login.self_id is not None else login.user.id
         if isinstance(event, LoginAddedEvent):
-            # 登录信息添加
-            if login.user is not None:
-                if login.user.id not in self.bots.keys():
-                    self._bot_connect([login])
+            # 登录信息添加，已有的机器人会被复用
+            self._bot_connect([login])
         elif isinstance(event, LoginUpdatedEvent):
             # 登录信息更新
-            if login.user is not None:
-                if login.user.id not in self.bots.keys():
-                    self._bot_connect([login])
+            if (bot := self.bots.get(self_id, None)) is not None:
+                bot.get_ready(login.user)
+            else:
+                self._bot_connect([login])
         elif isinstance(event, LoginRemovedEvent):
-            # 登录信息删除
-            if login.user is not None:
-                if login.user.id in self.bots.keys():
-                    del self.bots[login.user.id]
+            # 登录信息删除，停止该机器人的发送队列
+            if (bot := self.bots.pop(self_id, None)) is not None:
+                bot.outbox.shutdown()
     
     # 连接建立时的回调函数
     def _on_open(self, ws: websocket.WebSocketApp) -> None:
         '''连接建立时的回调函数'''
+        self.state = 'connected'
         info = f'[{self.get_connection}] 正在连接 WebSocket 服务器...'
         logger.info(info)
         print(info)
-        self._identify(ws)
+        self._identify(ws, self.sequence)
         return
     
     # 收到消息时的回调函数
     def _on_message(self, ws: websocket.WebSocketApp, message: Any) -> None:
         '''收到消息时的回调函数'''
-        payload: dict[str, Any] = json.loads(message) # 转换为字典类型
-        # 内部直接过滤来自平台 'qq' 的事件
-        if payload['body'].get('platform', None) == 'qq':
-            return
-        if self.config.webhook_url is not None:
-            try:
-                self.webhook_client.post(
-                    self.config.webhook_path,
-                    json=json.dumps(payload, ensure_ascii=False)
-                )
-            except Exception as exception:
-                print(f'本次 Webhook 推送失败：{type(exception).__name__}: {exception}')
+        self._receive(message)
+    
+    # 处理从 WebSocket 收到的消息
+    def _receive(self, message: Union[str, bytes]) -> None:
+        '''处理从 WebSocket 收到的消息，同步与异步引擎共用'''
+        payload: dict[str, Any] = codec.loads(message) # 转换为字典类型
+        if payload.get('op', None) == 4: # 鉴权成功，重置退避
+            self._backoff_attempt = 0
+        # 记录事件序号并丢弃重复的事件
+        if not self._update_sequence(payload):
             return
+        if not self._pre_filter(payload): # 在验证前直接丢弃被过滤的事件
+            accepted = True
+        elif self.forwarder is not None:
+            # 交由转发器在后台推送原始数据，不再重新编码
+            accepted = self.forwarder.forward(message.encode('utf-8') if isinstance(message, str) else message)
         else:
-            self._handle_payload(payload)
-            return
+            accepted = self._handle_payload(payload)
+        self._commit_sequence(payload, accepted)
     
     # 连接关闭时的回调函数
-    def _on_close(self, ws: websocket.WebSocketApp) -> None:
-        '''连接关闭时的回调函数'''
+    def _on_close(self, ws: websocket.WebSocketApp, *args: Any) -> None:
+        '''连接关闭时的回调函数，重连由监管线程负责'''
+        self.state = 'disconnected'
+        self._save_checkpoint()
         if self.manual_close:
             info = f'[{self.get_connection}] 与 WebSocket 服务器的连接已被关闭。'
             logger.info(info)
             print(info)
         else:
-            warning = f'[{self.get_connection}] 与 WebSocket 服务器的连接已断开，正在尝试重新连接...'
+            warning = f'[{self.get_connection}] 与 WebSocket 服务器的连接已断开。'
             logger.warning(warning)
             print(warning)
-            self._reconnect()
-        
-    # 连接关闭后调用的自动重连函数
-    def _reconnect(self) -> None:
-        '''连接关闭后调用的自动重连函数'''
-        interval = 5 # 重试时间间隔
-        self.retrys -= 1
-        if self.retrys < 0: # 不再有重试次数
-            print(f'[{self.get_connection}] 与 WebSocket 的连接已超时。')
-            logger.warning(f'[{self.get_connection}] 与 WebSocket 的连接已超时。')
-            self.ws.close()
-            return
-        while interval > 0:
-            print(f'{interval} s 后尝试重新连接...')
-            sleep(1)
-            interval -= 1
-        print(f'尝试重新连接 WebSocket 服务器，剩余重试次数：{self.retrys}')
-        logger.info(f'尝试重新连接 WebSocket 服务器，剩余重试次数：{self.retrys}')
-        self._connect()
-    
-    # 连接 WebSocket 服务器
-    def _connect(self) -> None:
-        '''连接 WebSocket 服务器'''
-        # 创建并运行线程发送心跳保活
-        Thread(target=self._heartbeat, daemon=True).start()
-        # 运行 WebSocketApp 对象
-        try:
-            self.ws.run_forever()
-        except Exception as exception:
-            info = f'连接 WebSocket 服务器时失败: {type(exception).__name__}: {exception}'
-            print(info)
-            logger.error(exception)
+    
+    # 计算下一次重连前的等待时间
+    def _backoff(self) -> float:
+        '''计算下一次重连前的等待时间，使用带抖动的指数退避
+
+        返回:
+            float: 等待时间
+        '''
+        ceiling = min(
+            self.config.reconnect_max_interval,
+            self.config.reconnect_interval * 2 ** min(self._backoff_attempt, 16)
+        )
+        self._backoff_attempt += 1
+        # 在 [ceiling / 2, ceiling] 内随机取值，避免多个实例同时重连
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+    
+    # 监管 WebSocket 连接
+    def _supervise(self) -> None:
+        '''监管 WebSocket 连接，负责连接、断线重连与心跳线程的启动'''
+        # 整个生命周期内只创建一个心跳线程
+        Thread(
+            target=self._heartbeat,
+            name=f'{self.get_connection}-heartbeat',
+            daemon=True
+        ).start()
+        while not self.manual_close:
+            self.state = 'connecting'
+            started = monotonic()
+            # 运行 WebSocketApp 对象，直到连接断开
+            try:
+                self.ws.run_forever()
+            except Exception as exception:
+                info = f'[{self.get_connection}] 连接 WebSocket 服务器时失败: {type(exception).__name__}: {exception}'
+                print(info)
+                logger.error(exception)
+            self.state = 'disconnected'
+            if self.manual_close:
+                break
+            interval = self._backoff()
+            self.reconnect_count += 1
+            warning = (
+                f'[{self.get_connection}] 连接在 {monotonic() - started:.1f} s 后断开，'
+                f'{interval:.1f} s 后进行第 {self._backoff_attempt} 次重连 '
+                f'(累计重连 {self.reconnect_count} 次)'
+            )
+            print(warning)
+            logger.warning(warning)
+            if self._stop_event.wait(interval): # 等待期间被关闭
+                break
+        self.state = 'closed'
+    
+    # 关闭适配器
+    @override
+    def close(self) -> None:
+        super().close()
+        self._stop_event.set()
+        if hasattr(self, 'ws'):
+            try:
+                self.ws.close()
+            except Exception as exception:
+                print(f'[{self.get_connection}] 关闭 WebSocket 连接时出错：{type(exception).__name__}: {exception}')
+        if self.forwarder is not None:
+            self.forwarder.shutdown()
+        self.prefetcher.shutdown(wait=False, cancel_futures=True)
+        for bot in list(self.bots.values()):
+            bot.outbox.shutdown()
     
     # 创建 Adapter
     @classmethod
@@ -292,9 +583,13 @@ class Adapter(BaseAdapter):
         '''
         adapter = cls(config)
         # 创建 HTTP 客户端实例
-        adapter.http = httpx.Client(verify=True)
+        adapter.http = httpx.Client(**adapter._client_options())
+        if serve == 'Dev':
+            adapter._setup_forwarder()
         # 如果需要创建 WebSocket 客户端
         if serve in ('WebSocket', 'Dev'):
+            # 从检查点恢复会话
+            adapter._load_checkpoint()
             # 创建 WebSocket 客户端
             adapter.ws = websocket.WebSocketApp(
                 'ws://{}{}/v{}/events'.format(
@@ -306,7 +601,7 @@ class Adapter(BaseAdapter):
                 on_message=adapter._on_message,
                 on_close=adapter._on_close
             )
-            Thread(target=adapter._connect).start()
+            Thread(target=adapter._supervise, name=f'{adapter.get_connection}-supervisor').start()
         elif serve == 'WebHook': # 配置 WebHook 机器人对象
             if config.webhook_url is not None:
                 # 创建 Webhook 客户端实例
@@ -315,72 +610,119 @@ class Adapter(BaseAdapter):
                         config.webhook_url
                     )
                 )
-            return adapter
-        if serve == 'Dev':
-            if config.webhook_url is not None:
-                # 创建 Webhook 客户端实例
-                adapter.webhook_client = httpx.Client(
-                    base_url='{}'.format(
-                        config.webhook_url
-                    )
-                )
         return adapter
     
+    # 获取 API 请求客户端参数
+    def _client_options(self) -> dict[str, Any]:
+        '''获取 API 请求客户端参数，同步与异步客户端共用
+
+        返回:
+            dict[str, Any]: 创建 `httpx.Client` 所需的参数
+        '''
+        http2 = self.config.http2
+        if http2:
+            try: # HTTP/2 需要安装 h2
+                import h2 # type: ignore
+            except ImportError:
+                http2 = False
+                warning = f'[{self.get_connection}] 未安装 h2，API 请求将使用 HTTP/1.1：pip install httpx[http2]'
+                print(warning)
+                logger.warning(warning)
+        return {
+            'base_url': self.api_url + '/',
+            'verify': True,
+            'http2': http2,
+            'timeout': self.config.http_timeout,
+            'limits': httpx.Limits(
+                max_connections=self.config.http_max_connections,
+                max_keepalive_connections=self.config.http_max_keepalive_connections,
+                keepalive_expiry=self.config.http_keepalive_expiry
+            )
+        }
+    
+    # 创建 Webhook 转发器
+    def _setup_forwarder(self) -> None:
+        '''创建 Dev 服务下的 Webhook 转发器'''
+        if self.config.webhook_url is None:
+            return
+        # 创建 Webhook 客户端实例，由转发线程复用连接
+        self.webhook_client = httpx.Client(base_url=self.config.webhook_url)
+        self.forwarder = Forwarder(
+            self.get_connection,
+            self.webhook_client,
+            self.config.webhook_path,
+            self.config.webhook_buffer_size,
+            self.config.webhook_batch_size,
+            self.config.webhook_batch_interval
+        )
+        self.forwarder.start()
+    
+    # 获取适配器统计信息
+    @override
+    def stats(self) -> dict[str, Any]:
+        stats = super().stats()
+        stats['ingested'] = self.ingested
+        stats['ingest_errors'] = self.ingest_errors
+        stats['cache'] = {bot.self_id: bot.cache.stats() for bot in list(self.bots.values())}
+        stats['coalesced'] = {bot.self_id: bot.flight.stats() for bot in list(self.bots.values())}
+        stats['outbox'] = {bot.self_id: bot.outbox.stats() for bot in list(self.bots.values())}
+        stats['breaker'] = self.breaker.stats()
+        if self.forwarder is not None:
+            stats['forwarder'] = self.forwarder.stats()
+        return stats
+    
     # 处理从 flask.request 接收的 json 信息
     @override
-    def handle_request(self, request: str) -> None:
-        payload: dict[str, Any] = json.loads(request)
-        if payload['op'] == 0: # 事件信令
+    def handle_request(self, request: Union[str, bytes, dict[str, Any], list[Any]]) -> None:
+        # 解码请求，支持单个信令、信令数组与换行分隔的多个信令
+        if isinstance(request, dict):
+            items, errors = [request], 0
+        elif isinstance(request, list):
+            items, errors = request, 0
+        else:
             try:
-                signaling = EventSignaling.model_validate(payload)
+                items, errors = codec.loads_batch(request)
             except Exception as exception:
-                print(f'{type(exception).__name__}: {exception}')
-                return
-        elif payload['op'] == 2: # 心跳回复信令
-            signaling = Pong.model_validate(payload)
-        elif payload['op'] == 4: # 鉴权回复信令
-            signaling = Ready.model_validate(payload)
-        else:
-            print('未知的信令类型：{}'.format(payload['op']))
-            return
-        # 分情况处理信令
-        if isinstance(signaling, Pong):
-            pass
-        elif isinstance(signaling, Ready):
-            logins = signaling.body.logins
-            self._bot_connect(logins)
-        else:
+                items, errors = [], 1
+                print(f'[{self.get_connection}] 解码请求时出错：{type(exception).__name__}: {exception}')
+        if errors > 0:
+            warning = f'[{self.get_connection}] 请求中有 {errors} 条信令无法解码，已跳过。'
+            print(warning)
+            logger.warning(warning)
+        # 依次处理每条信令
+        for index, item in enumerate(items):
             try:
-                event = self.payload_to_event(signaling.body)
+                handled = self._handle_signaling(item)
             except Exception as exception:
-                print(f'{type(exception).__name__}: {exception}')
-                logger.warning(f'将 payload 转换为事件时出错：{type(exception).__name__}: {exception}')
+                handled = False
+                print(f'[{self.get_connection}] 第 {index + 1} 条信令处理出错：{type(exception).__name__}: {exception}')
                 logger.error(exception)
-                return
-            # 处理 LoginEvent
-            if isinstance(event, LoginEvent):
-                self._handle_login(event)
-                return
-            # 获取接收事件对应的机器人实例
-            if event.self_id in self.bots.keys():
-                bot = self.bots[event.self_id]
-            # 如果没有则创建一个机器人并添加
-            else:
-                try:
-                    bot = Bot.verify(
-                        self,
-                        event.self_id,
-                        event.platform,
-                        self.config
-                    )
-                    self.bots[event.self_id] = bot
-                except Exception as exception:
-                    print(f'机器人 {event.self_id} 验证失败：{type(exception).__name__}: {exception}')
-                    return
-            # 创建并运行一个子线程，处理事件（既然没有返回值那就不需要等待了罢！
-            Thread(target=bot.handle_event, args=(event,), daemon=True).start()
+            if not handled:
+                errors += 1
+        with self._ingest_lock:
+            self.ingested += len(items)
+            self.ingest_errors += errors
         return
     
+    # 处理单条从 WebHook 接收的信令
+    def _handle_signaling(self, payload: Any) -> bool:
+        '''处理单条从 WebHook 接收的信令
+
+        参数:
+            payload (Any): 已解码的信令
+
+        返回:
+            bool: 信令是否合法并被正常处理，被过滤的信令同样视为正常处理
+        '''
+        if not isinstance(payload, dict) or 'op' not in payload:
+            print(f'[{self.get_connection}] 收到不合法的信令：{payload}')
+            return False
+        # 在验证前直接丢弃被过滤的事件
+        if not self._pre_filter(payload):
+            return True
+        # 与 WebSocket 共用处理逻辑，机器人不存在时进行验证
+        return self._handle_payload(payload, verify=True)
+    
     # 当前适配器名称
     @classmethod
     @override
@@ -389,26 +731,129 @@ class Adapter(BaseAdapter):
     
     # 将信令转换为事件对象
     @staticmethod
-    def payload_to_event(payload: SatoriEvent) -> Event:
-        '''将信令转换为事件对象
+    def payload_to_event(body: dict[str, Any]) -> Event:
+        '''将信令数据转换为事件对象
+
+        根据 `body.type` 选择具体的事件类型，并仅对原始数据进行一次验证。
 
         参数:
-            payload (SatoriEvent): 信令数据
+            body (dict[str, Any]): 信令数据
 
         返回:
             Event: 事件对象
         '''
-        EventClass = EVENT_CLASSES.get(payload.type, None)
+        EventClass = EVENT_CLASSES.get(body.get('type', ''), None)
         if EventClass is None:
-            print(f'未知的事件类型：{payload.type}')
-            return Event.model_validate(payload)
-        event = EventClass.model_validate(payload.model_dump())
-        return event
+            print(f'未知的事件类型：{body.get("type", None)}')
+            return Event.model_validate(body)
+        return EventClass.model_validate(body)
     
     # Adapter 调用 API 实现
     @override
     def _call_api(self, bot: Bot, api: str, **data: Any) -> Response:
-        headers = bot.get_authorization_header()
-        url = f'http://{self.api_base}{self.config.path}/v{self.config.version}/{api}'
-        response = self.http.post(url, data=cast(dict, json.dumps(data)), headers=headers)
-        return response
+        return self._post(bot, api, codec.dumps(data))
+    
+    # 发送已编码的 API 请求
+    def _post(self, bot: Bot, api: str, content: bytes) -> Response:
+        '''发送已编码的 API 请求，请求体不会被重新编码
+
+        请求失败时按照 `_retry_delay` 的规则进行重试，熔断期间直接抛出 `RuntimeError`。
+
+        参数:
+            bot (Bot): 发起请求的机器人
+            api (str): API 名称
+            content (bytes): 已编码的 JSON 请求体
+
+        返回:
+            Response: 响应
+        '''
+        attempt = 0
+        while True:
+            self._check_breaker(api) # 每次请求前检查，重试期间熔断时停止重试
+            try:
+                response = self.http.post(api, content=content, headers=bot.get_authorization_header())
+            except Exception as exception:
+                self._record_result(exception=exception)
+                delay = self._retry_delay(api, attempt, exception=exception)
+                if delay is None:
+                    raise
+            else:
+                self._record_result(response=response)
+                delay = self._retry_delay(api, attempt, response=response)
+                if delay is None:
+                    return response
+            attempt += 1
+            sleep(delay)
+    
+    # 检查熔断器状态
+    def _check_breaker(self, api: str) -> None:
+        '''检查熔断器状态，熔断期间抛出 `RuntimeError`'''
+        if not self.breaker.allow():
+            raise RuntimeError(f'[{self.get_connection}] Satori 服务暂时不可用，已停止调用 API {api}。')
+    
+    # 计算重试前的等待时间
+    def _retry_delay(
+        self,
+        api: str,
+        attempt: int,
+        response: Optional[Response]=None,
+        exception: Optional[Exception]=None
+    ) -> Optional[float]:
+        '''计算重试前的等待时间，不应重试时返回 `None`
+
+        请求未被服务端接收的连接错误与 429 响应对所有 API 进行重试；
+        其余连接错误与 5xx 响应仅对只读 API (`*.get` 与 `*.list`) 进行重试。
+        等待时间使用带抖动的指数退避，并遵循 `Retry-After` 响应头。
+
+        参数:
+            api (str): API 名称
+            attempt (int): 已重试的次数
+            response (Optional[Response], optional): 响应
+            exception (Optional[Exception], optional): 请求时出现的异常
+
+        返回:
+            Optional[float]: 等待时间
+        '''
+        if attempt >= self.config.retry_times or self.manual_close:
+            return None
+        idempotent = api.endswith(('.get', '.list'))
+        retry_after: Optional[float] = None
+        if exception is not None:
+            if not isinstance(exception, httpx.TransportError):
+                return None
+            if not (idempotent or isinstance(exception, UNSENT_ERRORS)):
+                return None
+        elif response is not None and (
+            response.status_code == 429
+            or (idempotent and 500 <= response.status_code < 600)
+        ):
+            retry_after = _parse_retry_after(response.headers.get('Retry-After', None))
+        else:
+            return None
+        ceiling = min(
+            self.config.retry_max_interval,
+            self.config.retry_interval * 2 ** min(attempt, 16)
+        )
+        delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        if retry_after is not None:
+            if retry_after > self.config.retry_max_interval: # 需要等待过久时不再重试
+                return None
+            delay = max(delay, retry_after)
+        warning = f'[{self.get_connection}] 调用 API {api} 失败，{delay:.1f} s 后进行第 {attempt + 1} 次重试。'
+        print(warning)
+        logger.warning(warning)
+        return delay
+    
+    # 记录请求结果
+    def _record_result(self, response: Optional[Response]=None, exception: Optional[Exception]=None) -> None:
+        '''将请求结果记录到熔断器，连接错误与 5xx 响应视为失败'''
+        if exception is not None or (response is not None and response.status_code >= 500):
+            if self.breaker.record_failure():
+                warning = (
+                    f'[{self.get_connection}] API 请求连续失败 {self.breaker.failures} 次，'
+                    f'将在 {self.breaker.reset_timeout} s 内停止调用 API。'
+                )
+                print(warning)
+                logger.warning(warning)
+        else:
+            self.breaker.record_success()
@@ -0,0 +1,261 @@
+'''Anon Chihaya 框架 Satori 协议适配器
+基于 asyncio 的适配器定义
+'''
+import httpx
+import asyncio
+from time import monotonic
+from httpx import Response
+from concurrent.futures import Future
+from typing import Literal, Optional, Any
+from typing_extensions import override
+
+from AnonChihayaBot.adapters import logger
+from AnonChihayaBot.adapters import codec
+from AnonChihayaBot.adapters.dispatcher import AsyncDispatcher
+
+from .bot import Bot
+from .config import Config
+from .adapter import Adapter
+from .models import Identify, IdentifyBody, Ping
+
+# 导入 websockets
+def _import_websockets() -> Any:
+    '''导入 websockets，该依赖为可选依赖，仅在使用 asyncio 引擎时需要'''
+    try:
+        import websockets
+    except ImportError as exception:
+        raise ImportError('使用 asyncio 引擎需要安装 websockets：pip install websockets') from exception
+    return websockets
+
+# 异步适配器类型
+class AsyncAdapter(Adapter):
+    '''基于 asyncio 的 Satori 适配器
+
+    WebSocket 连接、心跳与 API 请求均在同一个事件循环中运行，
+    `async def` 插件功能直接在事件循环中运行，同步插件功能交由有界线程池执行。
+
+    参数:
+        config (Config): 适配器配置
+    '''
+    ahttp: httpx.AsyncClient
+    '''异步 HTTP 客户端'''
+    loop: asyncio.AbstractEventLoop
+    '''适配器运行所在的事件循环'''
+    # 初始化方法
+    def __init__(self, config: Config) -> None:
+        '''基于 asyncio 的 Satori 适配器
+
+        参数:
+            config (Config): 适配器配置
+        '''
+        super().__init__(config)
+        self.dispatcher = AsyncDispatcher(
+            f'{self.get_name()}|{config.ip}:{config.port}',
+            config.workers,
+            config.queue_size
+        )
+        self._connection: Any = None
+        '''当前的 WebSocket 连接'''
+        self._astop: Optional[asyncio.Event] = None
+        '''停止信号，用于唤醒等待重连中的监管任务'''
+        self._supervisor: Optional[Future[None]] = None
+        '''监管任务'''
+    
+    # 发送信令
+    async def _asend_signaling(self, signaling: Any) -> None:
+        '''发送信令'''
+        if self._connection is None:
+            raise RuntimeError('WebSocket 连接尚未建立。')
+        await self._connection.send(codec.dumps_str(signaling.model_dump(mode='json')))
+    
+    # 进行心跳活动
+    async def _aheartbeat(self) -> None:
+        '''进行心跳活动，整个适配器生命周期内只运行一个心跳任务'''
+        max_failure = 0 # 当失败超过 5 次后关闭连接，由监管任务负责重连
+        while True:
+            await asyncio.sleep(self.config.heartbeat_interval)
+            # 定期保存检查点
+            await asyncio.to_thread(self._save_checkpoint)
+            if self.state != 'connected': # 未连接时不发送心跳
+                max_failure = 0
+                continue
+            # 尝试发送心跳包
+            try:
+                await self._asend_signaling(Ping())
+            except Exception as exception:
+                max_failure += 1
+                print(f'[{self.get_connection}] 本次心跳发送失败 ({max_failure}/5)：{type(exception).__name__}: {exception}')
+                if max_failure >= 5 and self._connection is not None: # 关闭连接以触发重连
+                    max_failure = 0
+                    await self._connection.close()
+                continue
+            max_failure = 0
+    
+    # 处理收到的消息
+    async def _on_frame(self, message: Any) -> None:
+        '''处理从 WebSocket 收到的消息'''
+        self._receive(message)
+    
+    # 监管 WebSocket 连接
+    async def _asupervise(self) -> None:
+        '''监管 WebSocket 连接，负责连接、断线重连与心跳任务的启动'''
+        websockets = _import_websockets()
+        self._astop = asyncio.Event()
+        url = 'ws://{}{}/v{}/events'.format(
+            self.api_base,
+            self.config.path,
+            self.config.version
+        )
+        # 整个生命周期内只创建一个心跳任务
+        heartbeat = asyncio.create_task(self._aheartbeat())
+        try:
+            while not self.manual_close:
+                self.state = 'connecting'
+                started = monotonic()
+                try:
+                    async with websockets.connect(url, max_size=None, ping_interval=None) as connection:
+                        self._connection = connection
+                        self.state = 'connected'
+                        info = f'[{self.get_connection}] 正在连接 WebSocket 服务器...'
+                        logger.info(info)
+                        print(info)
+                        await self._asend_signaling(
+                            Identify(body=IdentifyBody(token=self.config.token, sequence=self.sequence))
+                        )
+                        async for message in connection:
+                            await self._on_frame(message)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exception:
+                    info = f'[{self.get_connection}] WebSocket 连接出错: {type(exception).__name__}: {exception}'
+                    print(info)
+                    logger.error(exception)
+                finally:
+                    self._connection = None
+                    self.state = 'disconnected'
+                    await asyncio.to_thread(self._save_checkpoint)
+                if self.manual_close:
+                    break
+                interval = self._backoff()
+                self.reconnect_count += 1
+                warning = (
+                    f'[{self.get_connection}] 连接在 {monotonic() - started:.1f} s 后断开，'
+                    f'{interval:.1f} s 后进行第 {self._backoff_attempt} 次重连 '
+                    f'(累计重连 {self.reconnect_count} 次)'
+                )
+                print(warning)
+                logger.warning(warning)
+                try: # 等待期间被关闭时直接退出
+                    await asyncio.wait_for(self._astop.wait(), interval)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            heartbeat.cancel()
+            self.state = 'closed'
+            info = f'[{self.get_connection}] 与 WebSocket 服务器的连接已被关闭。'
+            logger.info(info)
+            print(info)
+    
+    # 唤醒监管任务并关闭连接
+    def _wake(self) -> None:
+        '''唤醒监管任务并关闭连接，需在事件循环中调用'''
+        if self._astop is not None:
+            self._astop.set()
+        if self._connection is not None:
+            asyncio.ensure_future(self._connection.close())
+    
+    # 关闭适配器
+    @override
+    def close(self) -> None:
+        self.manual_close = True
+        if self.forwarder is not None:
+            self.forwarder.shutdown()
+        self.prefetcher.shutdown(wait=False, cancel_futures=True)
+        for bot in list(self.bots.values()):
+            bot.outbox.shutdown()
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._wake)
+        try:
+            in_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            in_loop = False
+        if self._supervisor is not None and not in_loop: # 等待监管任务结束
+            try:
+                self._supervisor.result(timeout=5)
+            except Exception as exception:
+                print(f'[{self.get_connection}] 关闭时出错：{type(exception).__name__}: {exception}')
+    
+    # 创建 Adapter
+    @classmethod
+    @override
+    def setup(
+        cls,
+        config: Config,
+        serve: Literal['WebSocket', 'WebHook', 'Dev']='WebSocket',
+        loop: Optional[asyncio.AbstractEventLoop]=None
+    ) -> 'AsyncAdapter':
+        '''创建 Adapter
+
+        参数:
+            config (Config): 机器人配置
+            serve (Literal[&#39;WebSocket&#39;, &#39;WebHook&#39;, &#39;Dev&#39;], optional): 服务类型
+            loop (Optional[asyncio.AbstractEventLoop], optional): 适配器运行所在的事件循环
+
+        返回:
+            AsyncAdapter: 基于 asyncio 的 Satori 适配器
+        '''
+        if loop is None:
+            raise ValueError('asyncio 引擎需要指定运行所在的事件循环。')
+        if serve not in ('WebSocket', 'Dev'):
+            raise ValueError(f'asyncio 引擎不支持 {serve} 服务。')
+        _import_websockets() # 在启动前检查依赖
+        adapter = cls(config)
+        adapter.loop = loop
+        # 创建 HTTP 客户端实例，同步客户端供线程池中的同步插件使用
+        options = adapter._client_options()
+        adapter.http = httpx.Client(**options)
+        adapter.ahttp = httpx.AsyncClient(**options)
+        if serve == 'Dev':
+            adapter._setup_forwarder()
+        # 从检查点恢复会话
+        adapter._load_checkpoint()
+        adapter.dispatcher.start(loop)
+        adapter._supervisor = asyncio.run_coroutine_threadsafe(adapter._asupervise(), loop)
+        return adapter
+    
+    # Adapter 异步调用 API 实现
+    @override
+    async def _acall_api(self, bot: Bot, api: str, **data: Any) -> Response:
+        return await self._apost(bot, api, codec.dumps(data))
+    
+    # 异步发送已编码的 API 请求
+    async def _apost(self, bot: Bot, api: str, content: bytes) -> Response:
+        '''异步发送已编码的 API 请求，请求体不会被重新编码，重试与熔断规则与 `_post` 相同
+
+        参数:
+            bot (Bot): 发起请求的机器人
+            api (str): API 名称
+            content (bytes): 已编码的 JSON 请求体
+
+        返回:
+            Response: 响应
+        '''
+        attempt = 0
+        while True:
+            self._check_breaker(api) # 每次请求前检查，重试期间熔断时停止重试
+            try:
+                response = await self.ahttp.post(api, content=content, headers=bot.get_authorization_header())
+            except Exception as exception:
+                self._record_result(exception=exception)
+                delay = self._retry_delay(api, attempt, exception=exception)
+                if delay is None:
+                    raise
+            else:
+                self._record_result(response=response)
+                delay = self._retry_delay(api, attempt, response=response)
+                if delay is None:
+                    return response
+            attempt += 1
+            await asyncio.sleep(delay)
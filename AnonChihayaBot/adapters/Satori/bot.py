@@ -2,22 +2,29 @@
 机器人定义
 '''
 import time
+import asyncio
+import threading
 from httpx import Response
-from threading import Thread
 from typing_extensions import override
-from typing import Optional, Union, TYPE_CHECKING, Any
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Iterable, Iterator, Optional, TypeVar, Union, TYPE_CHECKING, Any
 
 import AnonChihayaBot._plugin as plugin
+from AnonChihayaBot.adapters import codec
 from AnonChihayaBot.adapters import logger
 from AnonChihayaBot.adapters import Bot as BaseBot
-from AnonChihayaBot.adapters.utils import _schedule_run, _schedule_kill
+from AnonChihayaBot.adapters.outbox import Outbox, BroadcastReport
+from AnonChihayaBot.adapters.utils import TTLCache, SingleFlight, _schedule_run, _schedule_kill
 from AnonChihayaBot.inner_plugin import (
     Admin, Ban,
     admin_process, ban_process, event_filter
 )
 
 from .config import Config
-from .event import MessageEvent, Event
+from .event import (
+    MessageEvent, Event,
+    GuildEvent, GuildMemberEvent
+)
 from .models import Message as SatoriMessage
 from .message import MessageSegment, Message
 from .models import GuildMember, Pagination, GuildRole, Channel, Guild, Login, User
@@ -25,6 +32,9 @@ from .models import GuildMember, Pagination, GuildRole, Channel, Guild, Login, U
 if TYPE_CHECKING:
     from .adapter import Adapter
 
+# 分页列表数据类型
+T = TypeVar('T')
+
 # 检查是否存在回复消息
 def _check_reply(bot: 'Bot', event: MessageEvent) -> None:
     '''检查是否存在回复消息，并对 `event.reply` 赋值'''
@@ -96,6 +106,16 @@ def _check_at_me(bot: 'Bot', event: MessageEvent) -> None:
     if not message:
         message.append(MessageSegment.text(''))
 
+# 获取被过滤事件的日志
+def _get_filtered_log(event: Event) -> str:
+    '''获取被过滤事件的日志，消息事件只记录来源，不生成消息数组'''
+    if isinstance(event, MessageEvent):
+        log = f'[已过滤] 用户 {event.get_user_id()}'
+        if event.guild is not None: # 有群组
+            log += f' 在群组 {event.guild.id}'
+        return log + f' 发送的消息 {event.message_id}'
+    return f'[已过滤] {event.get_log()}'
+
 # Satori 机器人
 class Bot(BaseBot):
     '''Satori 机器人
@@ -128,6 +148,25 @@ class Bot(BaseBot):
         '''Bot 所在平台'''
         self._info: Optional[User] = None
         '''Bot 自身信息'''
+        self._headers: Optional[dict[str, str]] = None
+        '''Bot 鉴权信息缓存'''
+        self.cache: TTLCache = TTLCache(config.cache_size, config.cache_ttl)
+        '''群组、频道、用户与群组成员信息缓存'''
+        self.flight: SingleFlight = SingleFlight()
+        '''只读 API 请求合并'''
+        self.outbox: Outbox = Outbox(
+            f'{adapter.get_name()}|{self_id}',
+            self._message_create,
+            config.outbox_workers,
+            config.outbox_queue_size,
+            config.outbox_channel_rate,
+            config.outbox_channel_burst,
+            config.outbox_bot_rate,
+            config.outbox_bot_burst,
+            config.outbox_merge_interval,
+            config.outbox_merge_length
+        )
+        '''消息发送队列'''
     
     # Bot 是否已连接
     @property
@@ -147,7 +186,9 @@ class Bot(BaseBot):
     def _handle_response(self, response: Response) -> Any:
         '''处理响应'''
         if 200 <= response.status_code < 300: # 响应正常
-            return response.json()
+            if not response.content: # 无响应内容
+                return None
+            return codec.loads(response.content)
         # 错误响应
         elif response.status_code == 400:
             raise Exception('请求格式错误。(400 Bad Request)')
@@ -159,6 +200,8 @@ class Bot(BaseBot):
             raise Exception('资源不存在。(404 Not Found)')
         elif response.status_code == 405:
             raise Exception('请求方法不支持。(405 Method Not Allowed)')
+        elif response.status_code == 429:
+            raise Exception('请求过于频繁。(429 Too Many Requests)')
         elif 500 <= response.status_code < 600:
             raise Exception(f'服务器错误。({response.status_code} Server Error)')
         else:
@@ -207,13 +250,15 @@ class Bot(BaseBot):
     
     # 获取 Bot 鉴权信息
     def get_authorization_header(self) -> dict[str, str]:
-        '''获取 Bot 鉴权信息'''
-        return {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {self.config.token}',
-            'X-Self-ID': self.self_id,
-            'X-Platform': self.platform
-        }
+        '''获取 Bot 鉴权信息，鉴权信息在首次获取时生成并缓存'''
+        if self._headers is None:
+            self._headers = {
+                'Content-Type': 'application/json',
+                'Authorization': f'Bearer {self.config.token}',
+                'X-Self-ID': self.self_id,
+                'X-Platform': self.platform
+            }
+        return self._headers
     
     # 处理接收到的事件
     def handle_event(self, event: Event) -> None:
@@ -231,6 +276,21 @@ class Bot(BaseBot):
                 _schedule_run(self)
             except Exception as exception:
                 print(f'{type(exception).__name__}: {exception}')
+        # 根据事件使缓存失效，被适配器预过滤丢弃的事件由适配器调用 `invalidate_cache`
+        self._invalidate_cache(event)
+        # 先过滤事件，被过滤的事件不会生成消息数组
+        passed = event_filter(self, event)
+        if not passed and not (
+            isinstance(event, MessageEvent)
+            and (
+                event.get_user_id() == self.config.host_id
+                or Admin.is_admin(event.get_user_id())
+            )
+        ): # 仅保留主人与管理员的消息以便进行 Admin 或 Ban 操作
+            log = _get_filtered_log(event)
+            logger.info(log)
+            print(log)
+            return
         logger.info(event.get_log())
         print(event.get_log())
         if isinstance(event, MessageEvent):
@@ -249,29 +309,28 @@ class Bot(BaseBot):
             elif (
                 str(event.get_message()).startswith(('/ban', '/unban'))
                 and (
-                    event.get_user_id() == self.config.host_id,
-                    Admin.is_admin(event.get_user_id())
+                    event.get_user_id() == self.config.host_id
+                    or Admin.is_admin(event.get_user_id())
                 )
             ):
                 ban_process(self, event)
                 return
-        if event_filter(self, event):
+        if passed:
             # 判断是否为帮助
             if isinstance(event, MessageEvent):
                 if (message := str(event.get_message())).startswith('/help'):
                     if message == '/help':
                         reply = 'Bot 可用的插件有：'
-                        plugin_bans = Ban._get_info().plugin.get(event.get_guild_id(), [])
                         for plg in plugin.plugins:
-                            if plg.package_name in plugin_bans:
+                            if Ban.is_plugin_banned(event.get_guild_id(), plg.package_name):
                                 reply += '\n>> [BANNED] '
                             else:
                                 reply += '\n>> '
                             reply += f'{plg.name}: {plg.doc}'
                         self.send(event, reply + '\n发送 /help + 名称 获取对应帮助。')
                         return
-                    else:
-                        plugin_name = message[5:].strip()
+                    elif message.startswith('/help '):
+                        plugin_name = message[6:].strip()
                         try: # 查找插件
                             plg = plugin.find_plugin(plugin_name)
                             if len(plg.functions) > 1: # 如果不止一个功能
@@ -285,17 +344,13 @@ class Bot(BaseBot):
                                 self.send(event, reply)
                             return
                         except ValueError:
-                            # 创建帮助任务
-                            tasks: list[Thread] = []
-                            for plg in plugin.plugins:
-                                for func in plg.functions:
-                                    tasks.append(
-                                        Thread(target=func.function, args=(self, event), daemon=True)
-                                    )
-                            
-                            for task in tasks:
-                                task.start()
+                            pass
+                        try: # 查找功能
+                            func = plugin.find_function(plugin_name)
+                            self.send(event, f'[{func.name}]\n{func.help_doc}')
                             return
+                        except ValueError: # 未找到时作为普通消息交由功能处理
+                            pass
                         
                 if (
                     str(event.get_message()).lower() == '/reload'
@@ -310,19 +365,48 @@ class Bot(BaseBot):
                         self.send(event, f'<×> 插件更新失败：\n{type(exception).__name__}: {exception}')
                     return
             
-            # 创建任务列表
-            tasks: list[Thread] = []
-            for plg in plugin.plugins:
-                if not Ban.is_plugin_banned(event.get_guild_id(), plg.package_name):
-                    for func in plg.functions:
-                        if not Ban.is_function_banned(event.get_guild_id(), func.inner_name):
-                            tasks.append(
-                                Thread(target=func.function, args=(self, event), daemon=True)
-                            )
-            
-            for task in tasks:
-                task.start()
+            # 只将匹配且未被屏蔽的功能交由事件分发器执行
+            for plg, func in plugin.function_index.match(event):
+                if Ban.is_plugin_banned(event.get_guild_id(), plg.package_name):
+                    continue
+                if Ban.is_function_banned(event.get_guild_id(), func.inner_name):
+                    continue
+                self.adapter.dispatcher.submit(func.function, self, event)
+            return
+    
+    # 根据事件使缓存失效
+    def _invalidate_cache(self, event: Event) -> None:
+        '''根据群组相关事件使对应的缓存失效
+
+        参数:
+            event (Event): 接收到的事件
+        '''
+        if not isinstance(event, GuildEvent):
+            return
+        self.invalidate_cache(
+            event.type,
+            event.guild.id,
+            event.user.id if isinstance(event, GuildMemberEvent) else None
+        )
+    
+    # 根据事件类型使缓存失效
+    def invalidate_cache(self, type_: str, guild_id: Optional[str], user_id: Optional[str]=None) -> None:
+        '''根据群组相关事件的类型使对应的缓存失效，可以在事件验证前由原始数据调用
+
+        参数:
+            type_ (str): 事件类型
+            guild_id (Optional[str]): 群组 ID
+            user_id (Optional[str], optional): 群组成员事件的用户 ID
+        '''
+        if guild_id is None or not type_.startswith('guild-'):
             return
+        self.cache.pop(('guild', guild_id))
+        if type_.startswith('guild-member-'):
+            if user_id is not None:
+                self.cache.pop(('member', guild_id, user_id))
+                self.cache.pop(('user', user_id))
+        elif type_.startswith('guild-role-') or type_ == 'guild-removed': # 角色变化或退出群组时移除该群组所有成员
+            self.cache.invalidate(lambda key: key[0] == 'member' and key[1] == guild_id) # type: ignore
     
     # 发送消息
     @override
@@ -344,6 +428,45 @@ class Bot(BaseBot):
         返回:
             list[SatoriMessage]: 一个 `Satori.SatoriMessage` 对象构成的数组
         '''
+        channel_id, content = self._build_send(event, message, at_sender, reply)
+        return self.message_create(channel_id, content)
+    
+    # 异步发送消息
+    @override
+    async def asend(
+        self,
+        event: Event,
+        message: Union[str, Message, MessageSegment],
+        at_sender: bool=False,
+        reply: bool=False
+    ) -> list[SatoriMessage]:
+        '''异步发送消息
+
+        参数:
+            event (Event): 要回复的事件
+            message (Union[str, Message, MessageSegment]): 要发送的内容
+            at_sender (bool, optional): 是否提及发送者
+            reply (bool, optional): 是否回复该消息
+
+        返回:
+            list[SatoriMessage]: 一个 `Satori.SatoriMessage` 对象构成的数组
+        '''
+        channel_id, content = self._build_send(event, message, at_sender, reply)
+        return await self.amessage_create(channel_id, content)
+    
+    # 构建要发送的消息
+    def _build_send(
+        self,
+        event: Event,
+        message: Union[str, Message, MessageSegment],
+        at_sender: bool,
+        reply: bool
+    ) -> tuple[str, str]:
+        '''构建要发送的消息
+
+        返回:
+            tuple[str, str]: 频道 ID 与消息内容
+        '''
         if event.channel is None: # 如果没有频道
             raise TypeError(f'该事件 {type(event).__name__} 无法被回复。')
         if at_sender:
@@ -357,7 +480,7 @@ class Bot(BaseBot):
                 message = MessageSegment.quote(event.message.id) + message
             else:
                 raise ValueError(f'该事件 {type(event).__name__} 不存在可回复的消息。')
-        return self.message_create(event.channel.id, str(message))
+        return event.channel.id, str(message)
     
     # 判断是否为主人
     @override
@@ -368,18 +491,40 @@ class Bot(BaseBot):
     def request(self, api: str, **data: Any) -> Any:
         '''发送 API 请求
 
+        同时发起的相同只读请求 (`*.get` 与 `*.list`) 会被合并为一次请求，并共享其响应数据。
+
         参数:
             api (str): API 名称
 
         返回:
             Any: API 响应数据
         '''
+        if api.endswith(('.get', '.list')):
+            return self.flight.do((api, codec.dumps(data)), lambda: self._request(api, **data))
+        return self._request(api, **data)
+    
+    # 发送单次 API 请求
+    def _request(self, api: str, **data: Any) -> Any:
+        '''发送单次 API 请求，不进行合并'''
         response = self.adapter._call_api(self, api, **data)
         return self._handle_response(response)
     
+    # 异步发送 API 请求
+    async def arequest(self, api: str, **data: Any) -> Any:
+        '''异步发送 API 请求
+
+        参数:
+            api (str): API 名称
+
+        返回:
+            Any: API 响应数据
+        '''
+        response = await self.adapter._acall_api(self, api, **data)
+        return self._handle_response(response)
+    
     # 获取群组频道
     def channel_get(self, channel_id: str) -> Channel:
-        '''根据 ID 获取频道。
+        '''根据 ID 获取频道，结果会被缓存，每次返回的是缓存的副本。
 
         参数:
             channel_id (str): 频道 ID
@@ -387,19 +532,24 @@ class Bot(BaseBot):
         返回:
             Channel: 一个 `Satori.Channel` 对象
         '''
+        key = ('channel', channel_id)
+        if (channel := self.cache.get(key)) is not None:
+            return channel.model_copy(deep=True)
         response = self.request(
             'channel.get',
             channel_id=channel_id
         )
-        return Channel.model_validate(response)
+        channel = Channel.model_validate(response)
+        self.cache.set(key, channel.model_copy(deep=True))
+        return channel
     
     # 获取群组频道列表
-    def channel_list(self, guild_id: str, next: str) -> Pagination[Channel]:
+    def channel_list(self, guild_id: str, next: Optional[str]=None) -> Pagination[Channel]:
         '''获取群组中的全部频道。
 
         参数:
             guild_id (str): 群组 ID
-            next (str): 分页令牌
+            next (Optional[str], optional): 分页令牌
 
         返回:
             Pagination[Channel]: 一个 `Satori.Channel` 的 `分页列表`
@@ -439,6 +589,7 @@ class Bot(BaseBot):
             'channel.update',
             channel_id=channel_id, data=data
         )
+        self.cache.pop(('channel', channel_id))
         return
     
     # 删除群组频道
@@ -452,6 +603,7 @@ class Bot(BaseBot):
             'channel.delete',
             channel_id=channel_id
         )
+        self.cache.pop(('channel', channel_id))
         return
     
     # 创建私聊频道
@@ -473,7 +625,7 @@ class Bot(BaseBot):
     
     # 获取群组
     def guild_get(self, guild_id: str) -> Guild:
-        '''根据 ID 获取。
+        '''根据 ID 获取群组，结果会被缓存，每次返回的是缓存的副本。
 
         参数:
             guild_id (str): 群组 ID
@@ -481,18 +633,23 @@ class Bot(BaseBot):
         返回:
             Guild: 一个 `Satori.Guild` 对象
         '''
+        key = ('guild', guild_id)
+        if (guild := self.cache.get(key)) is not None:
+            return guild.model_copy(deep=True)
         response = self.request(
             'guild.get',
             guild_id=guild_id
         )
-        return Guild.model_validate(response)
+        guild = Guild.model_validate(response)
+        self.cache.set(key, guild.model_copy(deep=True))
+        return guild
     
     # 获取群组列表
-    def guild_list(self, next: str) -> Pagination[Guild]:
+    def guild_list(self, next: Optional[str]=None) -> Pagination[Guild]:
         '''获取当前用户加入的全部群组。
 
         参数:
-            next (str): 分页令牌
+            next (Optional[str], optional): 分页令牌
 
         返回:
             Pagination[Guild]: 一个 `Satori.Guild` 的 `分页列表`
@@ -520,7 +677,7 @@ class Bot(BaseBot):
     
     # 获取群组成员
     def guild_member_get(self, guild_id: str, user_id: str) -> GuildMember:
-        '''获取群成员信息。
+        '''获取群成员信息，结果会被缓存，每次返回的是缓存的副本。
 
         参数:
             guild_id (str): 群组 ID
@@ -529,19 +686,24 @@ class Bot(BaseBot):
         返回:
             GuildMember: 一个 `Satori.GuildMember` 对象
         '''
+        key = ('member', guild_id, user_id)
+        if (member := self.cache.get(key)) is not None:
+            return member.model_copy(deep=True)
         response = self.request(
             'guild.member.get',
             guild_id=guild_id, user_id=user_id
         )
-        return GuildMember.model_validate(response)
+        member = GuildMember.model_validate(response)
+        self.cache.set(key, member.model_copy(deep=True))
+        return member
     
     # 获取群组成员列表
-    def guild_member_list(self, guild_id: str, next: str) -> Pagination[GuildMember]:
+    def guild_member_list(self, guild_id: str, next: Optional[str]=None) -> Pagination[GuildMember]:
         '''获取群成员列表。
 
         参数:
             guild_id (str): 群组 ID
-            next (str): 分页令牌
+            next (Optional[str], optional): 分页令牌
 
         返回:
             Pagination[GuildMember]: 一个 `Satori.GuildMember` 的 `分页列表`
@@ -570,6 +732,7 @@ class Bot(BaseBot):
             'guild.member.kick',
             guild_id=guild_id, user_id=user_id, permanent=permanent
         )
+        self.cache.pop(('member', guild_id, user_id))
         return
     
     # 通过群组成员申请
@@ -610,6 +773,7 @@ class Bot(BaseBot):
             'guild.member.role.set',
             guild_id=guild_id, user_id=user_id, role_id=role_id
         )
+        self.cache.pop(('member', guild_id, user_id))
         return
     
     # 取消群组成员角色
@@ -630,6 +794,7 @@ class Bot(BaseBot):
             'guild.member.role.unset',
             guild_id=guild_id, user_id=user_id, role_id=role_id
         )
+        self.cache.pop(('member', guild_id, user_id))
         return
     
     # 获取群组角色列表
@@ -684,6 +849,7 @@ class Bot(BaseBot):
             'guild.role.update',
             guild_id=guild_id, role_id=role_id, role=role
         )
+        self.cache.invalidate(lambda key: key[0] == 'member' and key[1] == guild_id) # type: ignore
         return
     
     # 删除群组角色
@@ -698,6 +864,7 @@ class Bot(BaseBot):
             'guild.role.delete',
             guild_id=guild_id, role_id=role_id
         )
+        self.cache.invalidate(lambda key: key[0] == 'member' and key[1] == guild_id) # type: ignore
         return
     
     # 获取登录信息
@@ -712,7 +879,10 @@ class Bot(BaseBot):
     
     # 发送消息
     def message_create(self, channel_id: str, content: str) -> list[SatoriMessage]:
-        '''发送消息。
+        '''发送消息，消息经由发送队列限速发送，并等待发送完成。
+
+        等待超过 `outbox_timeout` 秒时抛出 `TimeoutError`，尚未开始发送的消息会被取消。
+        等待期间会占用调用所在的事件分发器工作线程，不需要发送结果时请使用 `message_submit`。
 
         参数:
             channel_id (str): 频道 ID
@@ -721,12 +891,112 @@ class Bot(BaseBot):
         返回:
             list[SatoriMessage]: 一个 `Satori.SatoriMessage` 对象构成的数组
         '''
+        future = self.message_submit(channel_id, content)
+        timeout = self.config.outbox_timeout if self.config.outbox_timeout > 0 else None
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel() # 尚未开始发送时取消发送
+            raise TimeoutError(f'[{self.adapter.get_name()}|{self.self_id}] 消息在 {timeout} 秒内未能发送完成。')
+    
+    # 放入发送队列
+    def message_submit(self, channel_id: str, content: str) -> 'Future[list[SatoriMessage]]':
+        '''将消息放入发送队列，不等待发送完成。
+
+        同一频道的消息按放入顺序发送。若开启了消息合并，被合并发送的消息将得到相同的结果。
+
+        参数:
+            channel_id (str): 频道 ID
+            content (str): 消息内容
+
+        返回:
+            Future[list[SatoriMessage]]: 发送结果
+        '''
+        return self.outbox.submit(channel_id, content)
+    
+    # 直接发送消息
+    def _message_create(self, channel_id: str, content: str) -> list[SatoriMessage]:
+        '''直接发送消息，由发送队列调用'''
         response: list[Any] = self.request(
             'message.create',
             channel_id=channel_id, content=content
         )
         return [SatoriMessage.model_validate(data) for data in response]
     
+    # 群发消息
+    def broadcast(
+        self,
+        channel_ids: Iterable[str],
+        message: Union[str, Message, MessageSegment],
+        concurrency: Optional[int]=None
+    ) -> BroadcastReport:
+        '''向多个频道发送相同的消息，并等待全部发送完成。
+
+        消息内容只会被编码一次，各频道的消息经由发送队列排队并遵循限速，取得令牌后由本次群发独立的线程池发送，
+        因此并发数与 `outbox_workers` 无关，群发期间也不会占用其他消息的工作线程。
+
+        参数:
+            channel_ids (Iterable[str]): 频道 ID，重复的频道只会发送一次
+            message (Union[str, Message, MessageSegment]): 要发送的内容
+            concurrency (Optional[int], optional): 同时发送的最大频道数，为 `None` 时等于 `outbox_broadcast_concurrency`
+
+        返回:
+            BroadcastReport: 各频道的发送结果与失败原因
+        '''
+        started = time.monotonic()
+        content = str(message)
+        encoded = codec.dumps(content) # 只编码一次消息内容
+        sender = lambda channel_id, _: self._post_message(channel_id, encoded)
+        limit = max(1, self.config.outbox_broadcast_concurrency if concurrency is None else concurrency)
+        window = threading.Semaphore(limit) # 限制同时放入发送队列的群发消息数
+        futures: dict[str, Future[list[SatoriMessage]]] = {}
+        with ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f'{self.self_id}-broadcast') as executor:
+            for channel_id in dict.fromkeys(channel_ids):
+                window.acquire()
+                future = self.outbox.submit(channel_id, content, sender, executor)
+                future.add_done_callback(lambda _: window.release())
+                futures[channel_id] = future
+            # 汇总发送结果，全部完成前不能停止线程池
+            report = BroadcastReport()
+            for channel_id, future in futures.items():
+                try:
+                    report.results[channel_id] = future.result()
+                except Exception as exception:
+                    report.failures[channel_id] = exception
+        report.elapsed = time.monotonic() - started
+        logger.info(f'[{self.adapter.get_name()}|{self.self_id}] {report}')
+        return report
+    
+    # 发送已编码的消息
+    def _post_message(self, channel_id: str, encoded: bytes) -> list[SatoriMessage]:
+        '''使用已编码的消息内容发送消息，由群发调用'''
+        response = self.adapter._post(
+            self,
+            'message.create',
+            b'{"channel_id":' + codec.dumps(channel_id) + b',"content":' + encoded + b'}'
+        )
+        response_data: list[Any] = self._handle_response(response)
+        return [SatoriMessage.model_validate(data) for data in response_data]
+    
+    # 异步发送消息
+    async def amessage_create(self, channel_id: str, content: str) -> list[SatoriMessage]:
+        '''异步发送消息，消息经由发送队列限速发送，并等待发送完成。
+
+        等待超过 `outbox_timeout` 秒时抛出 `TimeoutError`，尚未开始发送的消息会被取消。
+
+        参数:
+            channel_id (str): 频道 ID
+            content (str): 消息内容
+
+        返回:
+            list[SatoriMessage]: 一个 `Satori.SatoriMessage` 对象构成的数组
+        '''
+        timeout = self.config.outbox_timeout if self.config.outbox_timeout > 0 else None
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.message_submit(channel_id, content)), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f'[{self.adapter.get_name()}|{self.self_id}] 消息在 {timeout} 秒内未能发送完成。')
+    
     # 获取消息
     def message_get(self, channel_id: str, message_id: str) -> SatoriMessage:
         '''获取特定消息。
@@ -779,12 +1049,12 @@ class Bot(BaseBot):
         return
     
     # 获取消息列表
-    def message_list(self, channel_id: str, next: str) -> Pagination[SatoriMessage]:
+    def message_list(self, channel_id: str, next: Optional[str]=None) -> Pagination[SatoriMessage]:
         '''获取频道消息列表。
 
         参数:
             channel_id (str): 频道 ID
-            next (str): 分页令牌
+            next (Optional[str], optional): 分页令牌
 
         返回:
             Pagination[SatoriMessage]: 一个 `Satori.SatoriMessage` 的 `分页列表`
@@ -797,7 +1067,7 @@ class Bot(BaseBot):
     
     # 获取用户信息
     def user_get(self, user_id: str) -> User:
-        '''获取用户信息。
+        '''获取用户信息，结果会被缓存，每次返回的是缓存的副本。
 
         参数:
             user_id (str): 用户 ID
@@ -805,11 +1075,16 @@ class Bot(BaseBot):
         返回:
             User: 一个 `Satori.User` 对象
         '''
+        key = ('user', user_id)
+        if (user := self.cache.get(key)) is not None:
+            return user.model_copy(deep=True)
         response = self.request(
             'user.get',
             user_id=user_id
         )
-        return User.model_validate(response)
+        user = User.model_validate(response)
+        self.cache.set(key, user.model_copy(deep=True))
+        return user
     
     # 获取好友列表
     def friend_list(self, next: Optional[str]=None) -> Pagination[User]:
@@ -847,6 +1122,125 @@ class Bot(BaseBot):
         )
         return
 
+    # 逐项迭代分页列表
+    def _iter_pages(
+        self,
+        fetch: Callable[[Optional[str]], Pagination[T]],
+        limit: Optional[int]=None
+    ) -> Iterator[T]:
+        '''逐项迭代分页列表，在消费当前页的同时于后台预取下一页
+
+        同一时间最多只持有当前页与下一页，提前结束迭代时将取消预取。
+
+        参数:
+            fetch (Callable[[Optional[str]], Pagination[T]]): 根据分页令牌获取一页数据的函数
+            limit (Optional[int], optional): 最多迭代的数据条数，为 `None` 时迭代全部数据
+
+        返回:
+            Iterator[T]: 数据迭代器
+        '''
+        if limit is not None and limit <= 0:
+            return
+        count = 0
+        pending: Optional[Future[Pagination[T]]] = None
+        page = fetch(None)
+        try:
+            while True:
+                # 仍需要更多数据时预取下一页
+                if page.next and (limit is None or count + len(page.data) < limit):
+                    pending = self.adapter.prefetcher.submit(fetch, page.next)
+                for item in page.data:
+                    yield item
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+                if pending is None:
+                    return
+                token = page.next
+                page = pending.result()
+                pending = None
+                if page.next == token: # 防止服务端返回相同的令牌导致无限循环
+                    page.next = None
+        finally:
+            if pending is not None:
+                pending.cancel()
+    
+    # 迭代群组频道
+    def iter_channels(self, guild_id: str, limit: Optional[int]=None) -> Iterator[Channel]:
+        '''逐项迭代群组中的全部频道，自动获取后续分页。
+
+        参数:
+            guild_id (str): 群组 ID
+            limit (Optional[int], optional): 最多迭代的频道数
+
+        返回:
+            Iterator[Channel]: `Satori.Channel` 迭代器
+        '''
+        return self._iter_pages(lambda next: self.channel_list(guild_id, next), limit)
+    
+    # 迭代群组
+    def iter_guilds(self, limit: Optional[int]=None) -> Iterator[Guild]:
+        '''逐项迭代当前用户加入的全部群组，自动获取后续分页。
+
+        参数:
+            limit (Optional[int], optional): 最多迭代的群组数
+
+        返回:
+            Iterator[Guild]: `Satori.Guild` 迭代器
+        '''
+        return self._iter_pages(lambda next: self.guild_list(next), limit)
+    
+    # 迭代群组成员
+    def iter_guild_members(self, guild_id: str, limit: Optional[int]=None) -> Iterator[GuildMember]:
+        '''逐项迭代群组中的全部成员，自动获取后续分页。
+
+        参数:
+            guild_id (str): 群组 ID
+            limit (Optional[int], optional): 最多迭代的成员数
+
+        返回:
+            Iterator[GuildMember]: `Satori.GuildMember` 迭代器
+        '''
+        return self._iter_pages(lambda next: self.guild_member_list(guild_id, next), limit)
+    
+    # 迭代群组角色
+    def iter_guild_roles(self, guild_id: str, limit: Optional[int]=None) -> Iterator[GuildRole]:
+        '''逐项迭代群组中的全部角色，自动获取后续分页。
+
+        参数:
+            guild_id (str): 群组 ID
+            limit (Optional[int], optional): 最多迭代的角色数
+
+        返回:
+            Iterator[GuildRole]: `Satori.GuildRole` 迭代器
+        '''
+        return self._iter_pages(lambda next: self.guild_role_list(guild_id, next), limit)
+    
+    # 迭代频道消息
+    def iter_messages(self, channel_id: str, limit: Optional[int]=None) -> Iterator[SatoriMessage]:
+        '''逐项迭代频道中的消息，自动获取后续分页。
+
+        参数:
+            channel_id (str): 频道 ID
+            limit (Optional[int], optional): 最多迭代的消息数
+
+        返回:
+            Iterator[SatoriMessage]: `Satori.SatoriMessage` 迭代器
+        '''
+        return self._iter_pages(lambda next: self.message_list(channel_id, next), limit)
+    
+    # 迭代好友
+    def iter_friends(self, limit: Optional[int]=None) -> Iterator[User]:
+        '''逐项迭代全部好友，自动获取后续分页。
+
+        参数:
+            limit (Optional[int], optional): 最多迭代的好友数
+
+        返回:
+            Iterator[User]: `Satori.User` 迭代器
+        '''
+        return self._iter_pages(lambda next: self.friend_list(next), limit)
+    
     # 内部 API
     def internal(self, method: str, **data: Any) -> Any:
         '''内部 API
@@ -37,12 +37,70 @@ class Config(BaseConfig):
     '''进行鉴权需要的 `token`'''
     heartbeat_interval: int=5
     '''心跳时间间隔'''
+    reconnect_interval: float=1
+    '''断线重连的初始等待时间'''
+    reconnect_max_interval: float=60
+    '''断线重连的最长等待时间'''
     webhook_url: Optional[str]=None
     '''框架自主反向 HTTP POST 通信 URL'''
     webhook_path: str='/'
     '''框架自主反向 HTTP POST 通信路径'''
+    webhook_buffer_size: int=1024
+    '''框架自主反向 HTTP POST 转发缓冲区长度上限'''
+    webhook_batch_size: int=1
+    '''框架自主反向 HTTP POST 单次推送的最大事件数'''
+    webhook_batch_interval: float=0.05
+    '''框架自主反向 HTTP POST 合并推送时的最长等待时间'''
     accounts: list[Account]=[]
     '''Bot 账号配置'''
+    ignore_platforms: list[str]=['qq']
+    '''在验证前直接丢弃的平台事件'''
+    subscribe_events: list[str]=[]
+    '''订阅的事件类型，为空时接收所有事件'''
+    http_max_connections: int=100
+    '''API 请求连接池的最大连接数'''
+    http_max_keepalive_connections: int=20
+    '''API 请求连接池保持的最大空闲连接数'''
+    http_keepalive_expiry: float=5
+    '''API 请求空闲连接的保持时间'''
+    http_timeout: float=10
+    '''API 请求超时时间'''
+    http2: bool=False
+    '''API 请求是否使用 HTTP/2'''
+    cache_ttl: float=60
+    '''群组、频道、用户与群组成员信息的缓存时间，不大于 0 时不缓存'''
+    cache_size: int=1024
+    '''每个机器人缓存的最大条目数'''
+    outbox_workers: int=2
+    '''每个机器人发送消息的工作线程数'''
+    outbox_queue_size: int=1024
+    '''每个机器人等待发送的消息数上限'''
+    outbox_channel_rate: float=5
+    '''每个频道每秒允许发送的消息数，不大于 0 时不限制'''
+    outbox_channel_burst: int=5
+    '''每个频道允许的突发消息数'''
+    outbox_bot_rate: float=20
+    '''每个机器人每秒允许发送的消息数，不大于 0 时不限制'''
+    outbox_bot_burst: int=20
+    '''每个机器人允许的突发消息数'''
+    outbox_merge_interval: float=0
+    '''合并同一频道连续短文本消息的等待时间，不大于 0 时不合并'''
+    outbox_merge_length: int=200
+    '''可被合并的文本消息最大长度'''
+    outbox_timeout: float=10
+    '''等待消息发送完成的最长时间，不大于 0 时一直等待，等待期间会占用事件分发器的工作线程'''
+    outbox_broadcast_concurrency: int=8
+    '''群发时同时发送的最大频道数，与工作线程数无关，发送速率仍受令牌桶限制'''
+    retry_times: int=3
+    '''API 请求的最大重试次数'''
+    retry_interval: float=0.5
+    '''API 请求重试的初始等待时间'''
+    retry_max_interval: float=10
+    '''API 请求重试的最长等待时间'''
+    breaker_threshold: int=5
+    '''进入熔断状态的连续失败次数，不大于 0 时不熔断'''
+    breaker_timeout: float=30
+    '''熔断持续时间'''
     # 转换字典内容
     @root_validator(pre=True)
     def get_config(cls, values: dict[str, Any]) -> dict[str, Any]:
@@ -58,6 +116,49 @@ class Config(BaseConfig):
         post_values['protocol'] = 'Satori'
         post_values['host_id'] = values['host_id']
         post_values['version'] = values['version']
+        if 'Dispatcher' in values.keys(): # 如果有事件分发配置
+            dispatcher: dict[str, Any] = values['Dispatcher'] or {}
+            if 'workers' in dispatcher.keys():
+                post_values['workers'] = dispatcher['workers']
+            if 'queue_size' in dispatcher.keys():
+                post_values['queue_size'] = dispatcher['queue_size']
+        if 'Filter' in values.keys(): # 如果有事件预过滤配置
+            filter_: dict[str, Any] = values['Filter'] or {}
+            if 'ignore_platforms' in filter_.keys():
+                post_values['ignore_platforms'] = filter_['ignore_platforms'] or []
+            if 'subscribe_events' in filter_.keys():
+                post_values['subscribe_events'] = filter_['subscribe_events'] or []
+        if 'HTTP' in values.keys(): # 如果有 API 请求连接池配置
+            http: dict[str, Any] = values['HTTP'] or {}
+            for key in ('max_connections', 'max_keepalive_connections', 'keepalive_expiry', 'timeout'):
+                if key in http.keys():
+                    post_values[f'http_{key}'] = http[key]
+            if 'http2' in http.keys():
+                post_values['http2'] = http['http2']
+        if 'Cache' in values.keys(): # 如果有信息缓存配置
+            cache: dict[str, Any] = values['Cache'] or {}
+            for key in ('ttl', 'size'):
+                if key in cache.keys():
+                    post_values[f'cache_{key}'] = cache[key]
+        if 'Outbox' in values.keys(): # 如果有消息发送队列配置
+            outbox: dict[str, Any] = values['Outbox'] or {}
+            for key in (
+                'workers', 'queue_size',
+                'channel_rate', 'channel_burst',
+                'bot_rate', 'bot_burst',
+                'merge_interval', 'merge_length', 'timeout',
+                'broadcast_concurrency'
+            ):
+                if key in outbox.keys():
+                    post_values[f'outbox_{key}'] = outbox[key]
+        if 'Retry' in values.keys(): # 如果有 API 请求重试配置
+            retry: dict[str, Any] = values['Retry'] or {}
+            for key in ('times', 'interval', 'max_interval'):
+                if key in retry.keys():
+                    post_values[f'retry_{key}'] = retry[key]
+            for key in ('threshold', 'timeout'):
+                if f'breaker_{key}' in retry.keys():
+                    post_values[f'breaker_{key}'] = retry[f'breaker_{key}']
         if values['serve'] == 'WebSocket': # 如果使用 WebSocket 服务
             if 'WebSocket' in values.keys():
                 post_values['ip'] = values['WebSocket']['ip']
@@ -65,6 +166,10 @@ class Config(BaseConfig):
                 post_values['path'] = values['WebSocket']['path']
                 post_values['token'] = values['WebSocket']['token']
                 post_values['heartbeat_interval'] = values['WebSocket']['heartbeat_interval']
+                if 'reconnect_interval' in values['WebSocket'].keys():
+                    post_values['reconnect_interval'] = values['WebSocket']['reconnect_interval']
+                if 'reconnect_max_interval' in values['WebSocket'].keys():
+                    post_values['reconnect_max_interval'] = values['WebSocket']['reconnect_max_interval']
             else:
                 raise ValueError(f'没有配置 WebSocket 服务配置。')
         elif values['serve'] == 'WebHook': # 如果使用 WebHook 服务
@@ -83,6 +188,10 @@ class Config(BaseConfig):
                 post_values['path'] = values['WebSocket']['path']
                 post_values['token'] = values['WebSocket']['token']
                 post_values['heartbeat_interval'] = values['WebSocket']['heartbeat_interval']
+                if 'reconnect_interval' in values['WebSocket'].keys():
+                    post_values['reconnect_interval'] = values['WebSocket']['reconnect_interval']
+                if 'reconnect_max_interval' in values['WebSocket'].keys():
+                    post_values['reconnect_max_interval'] = values['WebSocket']['reconnect_max_interval']
             else:
                 raise ValueError(f'没有配置 WebSocket 服务配置。')
             if 'WebHook_Client' in values.keys():
@@ -91,6 +200,9 @@ class Config(BaseConfig):
                     values['WebHook_Client']['port']
                 )
                 post_values['webhook_path'] = values['WebHook_Client']['path']
+                for key in ('buffer_size', 'batch_size', 'batch_interval'):
+                    if key in values['WebHook_Client'].keys():
+                        post_values[f'webhook_{key}'] = values['WebHook_Client'][key]
             else:
                 raise ValueError(f'没有配置反向 HTTP 转发服务配置。')
         
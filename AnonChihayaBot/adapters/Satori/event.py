@@ -4,10 +4,9 @@
 # -*- coding: utf-8 -*-
 # !/usr/bin/python3
 from enum import Enum
-from copy import deepcopy
-from pydantic import root_validator
+from pydantic import PrivateAttr
 from typing_extensions import override
-from typing import Optional, Type, TYPE_CHECKING, Any
+from typing import Optional, Type, Any
 
 from AnonChihayaBot.adapters import Event as BaseEvent
 
@@ -301,11 +300,10 @@ class MessageEvent(Event):
     '''是否与机器人有关'''
     reply: Optional[RenderMessage]=None
     '''是否存在回复'''
-    if TYPE_CHECKING:
-        _message: Message
-        '''事件的消息数组'''
-        original_message: Message
-        '''事件的原始消息数组'''
+    _message: Optional[Message]=PrivateAttr(default=None)
+    '''事件的消息数组，首次访问时才会生成'''
+    _original_message: Optional[Message]=PrivateAttr(default=None)
+    '''事件的原始消息数组，首次访问时才会生成'''
     # 获取事件类型
     @override
     def get_type(self) -> str:
@@ -314,19 +312,27 @@ class MessageEvent(Event):
     # 获取消息数组
     @override
     def get_message(self) -> Message:
+        if self._message is None: # 首次访问时生成
+            self._message = Message.from_satori_element(self.message.content)
         return self._message
     
+    # 获取原始消息数组
+    @property
+    def original_message(self) -> Message:
+        '''事件的原始消息数组
+
+        由不可变的 `message.content` 单独生成，不受对消息数组的修改影响，
+        因此无需在事件创建时深拷贝消息数组。
+        '''
+        if self._original_message is None: # 首次访问时生成
+            self._original_message = Message.from_satori_element(self.message.content)
+        return self._original_message
+    
     # 获取事件是否与机器人有关
     @override
     def is_tome(self) -> bool:
         return self.to_me
 
-    @root_validator(pre=False, skip_on_failure=True)
-    def generate_message(cls, values: dict[str, Any]) -> dict[str, Any]:
-        values['_message'] = Message.from_satori_element(values['message'].content)
-        values['original_message'] = deepcopy(values['_message'])
-        return values
-
     # 获取事件群组 ID
     @override
     def get_guild_id(self) -> str:
@@ -9,12 +9,12 @@ from base64 import b64encode
 from dataclasses import dataclass
 from collections.abc import Iterable
 from typing_extensions import override, NotRequired
-from typing import TypedDict, Iterable, Optional, Union, overload, Any
+from typing import TypedDict, Iterable, Optional, Sequence, Union, overload, Any
 
 from AnonChihayaBot.adapters import Message as BaseMessage
 from AnonChihayaBot.adapters import MessageSegment as BaseMessageSegment
 
-from .utils import Element, parse, escape
+from .utils import Element, Node, parse_nodes, escape
 
 # 用于 HTML 元素 src 的 data URI 对象
 class SrcData(TypedDict):
@@ -1093,12 +1093,12 @@ class Message(BaseMessage[MessageSegment]):
     @staticmethod
     @override
     def _construct(message: str) -> Iterable[MessageSegment]:
-        yield from Message.from_satori_element(parse(message))
+        yield from Message.from_satori_element(parse_nodes(message))
     
     # 处理从 Satori 协议获取的 HTML 元素为消息对象
     @classmethod
-    def from_satori_element(cls, elements: list[Element]) -> 'Message':
-        '''处理从 Satori 协议获取的 HTML 元素'''
+    def from_satori_element(cls, elements: Sequence[Union[Element, Node]]) -> 'Message':
+        '''处理从 Satori 协议获取的 HTML 元素，可以是 `Element` 或解析器内部的 `Node`'''
         message = Message()
         # 遍历元素列表
         for element in elements:
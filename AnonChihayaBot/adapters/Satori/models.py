@@ -9,7 +9,7 @@ from pydantic.generics import GenericModel
 from pydantic import BaseModel, root_validator, validator
 from typing import Optional, Generic, Literal, TypeVar, Union, Any
 
-from .utils import Element, parse
+from .utils import Element, Node, parse_nodes
 
 # 信令类型类型定义
 class SignalingType(IntEnum):
@@ -147,8 +147,8 @@ class Message(BaseModel):
     '''消息 ID'''
     quote: Optional['Message']=None
     '''引用消息'''
-    content: list[Element]
-    '''消息内容'''
+    content: list[Union[Element, Node]]
+    '''消息内容，由字符串解析得到时为不经过验证的 `Node`'''
     channel: Optional[Channel]=None
     '''频道对象'''
     guild: Optional[Guild]=None
@@ -184,15 +184,15 @@ class Message(BaseModel):
     
     # 重定义 content 验证方法
     @validator('content', pre=True)
-    def parse_content(cls, value: Any) -> Optional[list[Element]]:
-        '''`content` 验证方法'''
+    def parse_content(cls, value: Any) -> Optional[list[Union[Element, Node]]]:
+        '''`content` 验证方法，字符串只解析一次且不为每个元素创建 `Element`'''
         if isinstance(value, list):
             return value
         if value is None:
             return None
         if not isinstance(value, str):
             raise ValueError('content 字段必须为字符串')
-        return parse(value)
+        return parse_nodes(value)
     
     # 重定义 created_at 验证方法
     @validator('created_at', pre=True)
@@ -4,7 +4,8 @@
 # -*- coding: utf-8 -*-
 # !/usr/bin/python3
 import re
-from pydantic import Field, BaseModel
+from pydantic_core import CoreSchema, core_schema
+from pydantic import Field, BaseModel, GetCoreSchemaHandler
 from typing import Optional, Union, Any
 
 # 对字符串进行转义
@@ -41,6 +42,30 @@ def unescape(string: str) -> str:
         .replace('&gt;', '>')
     )
 
+# 将元素转换为字符串
+def _element_to_str(element: Union['Element', 'Node']) -> str:
+    '''将元素转换为字符串'''
+    if element.source is not None: # 如果有原始字符串
+        return element.source
+    if element.type == 'text': # 如果是文本类型
+        return escape(element.attrs['text'])
+    # 若不符合则生成一个 HTML 标签字符串
+    def _attr(key: str, value: Any) -> str:
+        '''获取元素属性的字符串表示'''
+        # 如果是 bool 值
+        if value is True:
+            return key
+        if value is False:
+            return f'no-{key}'
+        return f'{key}="{escape(str(value))}"'
+    
+    attrs = ' '.join(_attr(key, value) for key, value in element.attrs.items())
+    if not element.children: # 如果没有子元素
+        return f'<{element.type} {attrs}/>'
+    # 有子元素
+    childrens = ''.join(str(children) for children in element.children)
+    return f'<{element.type} {attrs}>{childrens}</{element.type}>'
+
 # 消息元素类
 class Element(BaseModel):
     '''消息元素类'''
@@ -55,40 +80,108 @@ class Element(BaseModel):
     # 重写 __str__() 方法
     def __str__(self) -> str:
         '''将元素转换为字符串'''
-        if self.source is not None: # 如果有原始字符串
-            return self.source
-        if self.type == 'text': # 如果是文本类型
-            return escape(self.attrs['text'])
-        # 若不符合则生成一个 HTML 标签字符串
-        def _attr(key: str, value: Any) -> str:
-            '''获取元素属性的字符串表示'''
-            # 如果是 bool 值
-            if value is True:
-                return key
-            if value is False:
-                return f'no-{key}'
-            return f'{key}="{escape(str(value))}"'
-        
-        attrs = ' '.join(_attr(key, value) for key, value in self.attrs.items())
-        if not self.children: # 如果没有子元素
-            return f'<{self.type} {attrs}/>'
-        # 有子元素
-        childrens = ''.join(str(children) for children in self.children)
-        return f'<{self.type} {attrs}>{childrens}</{self.type}>'
+        return _element_to_str(self)
+
+# 内部消息元素类
+class Node:
+    '''内部消息元素类
+
+    与 `Element` 结构相同的轻量元素，不进行数据验证。解析器与消息构造内部使用该类型，
+    `Message.content` 也直接保存解析出的 `Node`，作为 `pydantic` 模型字段时只检查类型，
+    序列化结果与 `Element` 相同。
+    '''
+    __slots__ = ('type', 'attrs', 'children', 'source')
+    # 初始化
+    def __init__(self, type: str, attrs: Optional[dict[str, Any]]=None) -> None:
+        '''内部消息元素类
+
+        参数:
+            type (str): 元素类型
+            attrs (Optional[dict[str, Any]], optional): 元素属性
+        '''
+        self.type: str = type
+        '''元素类型'''
+        self.attrs: dict[str, Any] = attrs if attrs is not None else {}
+        '''元素属性'''
+        self.children: list[Node] = []
+        '''子元素'''
+        self.source: Optional[str] = None
+        '''元素原始字符串'''
+    
+    # 重写 __str__() 方法
+    def __str__(self) -> str:
+        '''将元素转换为字符串'''
+        return _element_to_str(self)
+    
+    # 对外输出方法
+    def __repr__(self) -> str:
+        '''对外输出方法'''
+        return (
+            f'Node(type={self.type!r}, attrs={self.attrs!r}, '
+            f'children={self.children!r}, source={self.source!r})'
+        )
+    
+    # 作为 pydantic 模型字段时的验证与序列化方式
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: GetCoreSchemaHandler) -> CoreSchema:
+        '''只检查类型，序列化为与 `Element` 相同的字典'''
+        return core_schema.is_instance_schema(
+            cls,
+            serialization=core_schema.plain_serializer_function_ser_schema(cls.to_dict)
+        )
+    
+    # 转换为字典
+    def to_dict(self) -> dict[str, Any]:
+        '''转换为与 `Element.model_dump()` 相同的字典'''
+        return {
+            'type': self.type,
+            'attrs': self.attrs,
+            'children': [child.to_dict() for child in self.children],
+            'source': self.source
+        }
+    
+    # 转换为 Element 对象
+    def to_element(self) -> Element:
+        '''转换为 `Element` 对象'''
+        return Element(
+            type=self.type,
+            attrs=self.attrs,
+            children=[child.to_element() for child in self.children],
+            source=self.source
+        )
 
 # 消息标签类
-class Token(BaseModel):
+class Token:
     '''消息标签类'''
-    type: str
-    '''标签类型'''
-    close: str
-    '''是否关闭'''
-    empty: str
-    '''是否为空'''
-    attrs: dict[str, Any]
-    '''标签属性'''
-    source: str
-    '''原始字符串'''
+    __slots__ = ('type', 'close', 'empty', 'attrs', 'source')
+    # 初始化
+    def __init__(self, type: str, close: str, empty: str, attrs: dict[str, Any], source: str) -> None:
+        '''消息标签类
+
+        参数:
+            type (str): 标签类型
+            close (str): 是否关闭
+            empty (str): 是否为空
+            attrs (dict[str, Any]): 标签属性
+            source (str): 原始字符串
+        '''
+        self.type: str = type
+        '''标签类型'''
+        self.close: str = close
+        '''是否关闭'''
+        self.empty: str = empty
+        '''是否为空'''
+        self.attrs: dict[str, Any] = attrs
+        '''标签属性'''
+        self.source: str = source
+        '''原始字符串'''
+
+# HTML 标签正则匹配
+TAG_PATTERN = re.compile(r'<!--[\s\S]*?-->|<(/?)([^!\s>/]*)([^>]*?)\s*(/?)>')
+'''HTML 标签正则匹配'''
+# HTML 属性正则匹配
+ATTR_PATTERN = re.compile(r'([^\s=]+)(?:=\"([^\"]*)\"|=\'([^\']*)\')?', re.S)
+'''HTML 属性正则匹配'''
 
 # 字符串解析函数
 def parse(src: str) -> list[Element]:
@@ -100,14 +193,22 @@ def parse(src: str) -> list[Element]:
     返回:
         list[Element]: 解析出的元素列表
     '''
-    # HTML 标签正则匹配
-    tag_pat = re.compile(r'<!--[\s\S]*?-->|<(/?)([^!\s>/]*)([^>]*?)\s*(/?)>')
-    # HTML 属性正则匹配
-    attr_pat = re.compile(r'([^\s=]+)(?:=\"([^\"]*)\"|=\'([^\']*)\')?', re.S)
+    return [node.to_element() for node in parse_nodes(src)]
+
+# 字符串解析为内部元素函数
+def parse_nodes(src: str) -> list[Node]:
+    '''将字符串解析为内部元素列表，不经过 `pydantic` 验证
+
+    参数:
+        src (str): 原始字符串
+
+    返回:
+        list[Node]: 解析出的内部元素列表
+    '''
     # 解析对象存储列表
-    tokens: list[Union[Token, Element]] = []
+    tokens: list[Union[Token, Node]] = []
     
-    # 将字符串中部分转换为文本 Element 对象
+    # 将字符串中部分转换为文本 Node 对象
     def parse_n_push(source: str) -> None:
         '''转换源字符串不含 `HTML` 标签部分
 
@@ -116,83 +217,85 @@ def parse(src: str) -> list[Element]:
         '''
         text = unescape(source)
         if text: # 如果不为空
-            tokens.append(Element(type='text', attrs={'text': text}))
+            tokens.append(Node('text', {'text': text}))
     
-    # 匹配 HTML 标签并循环处理
-    while tag_map := tag_pat.search(src):
-        parse_n_push(src[:tag_map.start()]) # 处理第一个匹配之前部分
-        src = src[tag_map.end():] # 截取匹配结果后的部分为源字符串
+    # 按位置依次匹配 HTML 标签并处理，不对源字符串进行截取
+    position = 0
+    for tag_map in TAG_PATTERN.finditer(src):
+        parse_n_push(src[position:tag_map.start()]) # 处理上一个匹配与当前匹配之间的部分
+        position = tag_map.end()
         # 如果是注释则跳过
         if tag_map.group(0).startswith('<!--'):
             continue
-        # 根据匹配结果创建 Token 对象
+        # 根据匹配结果解析属性并创建 Token 对象
         close, tag, attr_str, empty = tag_map.groups()
-        token = Token(
-            type=tag or 'template',
-            close=close,
-            empty=empty,
-            attrs={},
-            source=tag_map.group(0)
-        )
-        # 匹配 HTML 属性并循环处理
-        while attr_map := attr_pat.search(attr_str):
+        attrs: dict[str, Any] = {}
+        for attr_map in ATTR_PATTERN.finditer(attr_str):
             # 获取有效属性值
             key, value1, value2 = attr_map.groups()
             value = value1 or value2
             if value: # 若值存在
-                token.attrs[key] = unescape(value)
+                attrs[key] = unescape(value)
             elif key.startswith('no-'): # 若为表 False 属性
-                token.attrs[key] = False
+                attrs[key] = False
             else: # 表 True 属性
-                token.attrs[key] = True
-            attr_str = attr_str[attr_map.end():] # 截取匹配结果后的部分为源字符串
-        tokens.append(token)
+                attrs[key] = True
+        tokens.append(
+            Token(
+                type=tag or 'template',
+                close=close,
+                empty=empty,
+                attrs=attrs,
+                source=tag_map.group(0)
+            )
+        )
     
-    parse_n_push(src) # 处理剩余源字符串
+    parse_n_push(src[position:]) # 处理剩余源字符串
     
-    # 定义存储正在处理的 Element 对象的列表，并以一个 "template" 类型 Element 对象作为根元素
-    stack = [Element(type='template')]
+    # 定义存储正在处理的 Node 对象的栈，栈顶为列表末尾，并以一个 "template" 类型 Node 对象作为根元素
+    stack = [Node('template')]
     
-    # 回滚 stack 列表元素方法
+    # 回滚 stack 栈顶元素方法
     def rollback(count: int) -> None:
-        '''回滚 stack 列表元素并作为文本添加到上一层元素的子元素中
+        '''回滚 stack 栈顶元素，将其开放标签作为文本添加到上一层元素中，并将其子元素移至上一层元素
 
         参数:
             count (int): 需要回滚的元素数
         '''
         while count:
-            child = stack.pop(0)
-            source = stack[0].children.pop(-1)
-            stack[0].children.append(Element(type='text', attrs={'text': source}))
-            stack[0].children.extend(child.children)
+            child = stack.pop()
+            parent = stack[-1]
+            source = parent.children.pop() # 即为 child 本身
+            parent.children.append(Node('text', {'text': source.source}))
+            parent.children.extend(child.children)
             count -= 1
     
     # 循环处理 tokens 列表中对象
     for token in tokens:
-        if isinstance(token, Element): # 如果是 Element 对象
-            stack[0].children.append(token) # 作为第一个元素的子元素添加
+        if isinstance(token, Node): # 如果是 Node 对象
+            stack[-1].children.append(token) # 作为栈顶元素的子元素添加
         elif token.close: # 如果是关闭标签
-            index = 0
-            # 查找与之对应的开放标签并记录索引
-            while index < len(stack) and stack[index].type != token.type:
-                index += 1
-            if index == len(stack): # 如果没有找到
-                stack[0].children.append(
-                    Element(type='text', attrs={'text': token.source})
+            depth = 0
+            # 从栈顶开始查找与之对应的开放标签并记录深度
+            while depth < len(stack) and stack[-1 - depth].type != token.type:
+                depth += 1
+            if depth == len(stack): # 如果没有找到
+                stack[-1].children.append(
+                    Node('text', {'text': token.source})
                 )
             else: # 回滚处理
-                rollback(index)
-                element = stack.pop(0) # 弹出第一个元素并赋值
+                rollback(depth)
+                element = stack.pop() # 弹出栈顶元素并赋值
                 element.source = None
         else: # 是 Token 且不是关闭标签
-            # 创建一个 Element 对象并添加为 stack 第一元素的子元素
-            element = Element(type=token.type, attrs=token.attrs)
-            stack[0].children.append(element)
+            # 创建一个 Node 对象并添加为栈顶元素的子元素
+            element = Node(token.type, token.attrs)
+            stack[-1].children.append(element)
             if not token.empty: # 如果不是空标签
-                # 赋值，并将 element 设为第一元素
+                # 赋值，并将 element 压入栈顶
                 element.source = token.source
-                stack.insert(0, element)
+                stack.append(element)
     
-    rollback(len(stack) - 1) # 回滚 stack 中除最后一个元素歪的所有元素
+    rollback(len(stack) - 1) # 回滚 stack 中除根元素外的所有元素
     # 将根元素的子元素作为解析结果返回
     return stack[0].children
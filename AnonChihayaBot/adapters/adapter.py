@@ -4,11 +4,13 @@
 # -*- coding: utf-8 -*-
 # !/usr/bin/python3
 import abc
-from typing import Optional, Any
+import asyncio
+from typing import Optional, Literal, Union, Any
 
 from AnonChihayaBot.adapters.config import Config
 
 from .bot import Bot
+from .dispatcher import Dispatcher, AsyncDispatcher
 
 # 协议适配器基类
 class Adapter(abc.ABC):
@@ -30,8 +32,16 @@ class Adapter(abc.ABC):
         '''机器人实例'''
         self.manual_close: bool=False
         '''是否被人为关闭'''
-        self.retrys = 5
-        '''当前适配器的剩余重试次数'''
+        self.state: Literal['disconnected', 'connecting', 'connected', 'closed'] = 'disconnected'
+        '''当前连接状态'''
+        self.reconnect_count: int = 0
+        '''累计重连次数'''
+        self.dispatcher: Union[Dispatcher, AsyncDispatcher] = Dispatcher(
+            f'{self.get_name()}|{config.ip}:{config.port}',
+            config.workers,
+            config.queue_size
+        )
+        '''事件分发器'''
     
     # 当前适配器名称
     @classmethod
@@ -40,12 +50,31 @@ class Adapter(abc.ABC):
         '''当前适配器名称'''
         raise NotImplementedError
     
+    # 获取适配器统计信息
+    def stats(self) -> dict[str, Any]:
+        '''获取适配器的连接状态与事件分发统计信息
+
+        返回:
+            dict[str, Any]: 统计信息
+        '''
+        return {
+            'state': self.state,
+            'reconnect_count': self.reconnect_count,
+            **self.dispatcher.stats()
+        }
+    
+    # 关闭适配器
+    def close(self) -> None:
+        '''关闭适配器，停止重连'''
+        self.manual_close = True
+        return
+    
     # 处理从 flask.request 接收的 json 信息
-    def handle_request(self, request: str) -> None:
+    def handle_request(self, request: Union[str, bytes, dict[str, Any], list[Any]]) -> None:
         '''处理从 `flask.request` 接收的 `json` 信息
 
         参数:
-            request (str): 从 `flask.request` 接收的 `json` 信息
+            request (Union[str, bytes, dict[str, Any], list[Any]]): 从 `flask.request` 接收的 `json` 信息，可直接传入原始请求体，支持信令数组与换行分隔的多个信令
         '''
         raise NotImplementedError
     
@@ -71,3 +100,8 @@ class Adapter(abc.ABC):
     def _call_api(self, bot: Bot, api: str, **data: Any) -> Any:
         '''`Adapter` 调用 API 实现'''
         raise NotImplementedError
+    
+    # 异步 API 调用实现函数
+    async def _acall_api(self, bot: Bot, api: str, **data: Any) -> Any:
+        '''`Adapter` 异步调用 API 实现，默认在线程池中调用 `_call_api`'''
+        return await asyncio.to_thread(self._call_api, bot, api, **data)
@@ -4,6 +4,7 @@
 # -*- coding: utf-8 -*-
 # !/usr/bin/python3
 import abc
+import asyncio
 from typing import Union, TYPE_CHECKING, Any
 
 from .event import Event
@@ -91,3 +92,37 @@ class Bot(abc.ABC):
             Any: API 响应数据
         '''
         return self.adapter._call_api(self, api, **data)
+    
+    # 异步发送消息
+    async def asend(
+        self,
+        event: Event,
+        message: Union[str, 'Message', 'MessageSegment'],
+        at_sender: bool=False,
+        reply: bool=False
+    ) -> Any:
+        '''异步发送消息，默认在线程池中调用 `send`
+
+        参数:
+            event (Event): 要回复的事件
+            message (Union[str, Message, MessageSegment]): 要发送的内容
+            at_sender (bool, optional): 是否提及发送者
+            reply (bool, optional): 是否回复该消息
+
+        返回:
+            Any: 消息发送后返回的数据
+        '''
+        return await asyncio.to_thread(self.send, event, message, at_sender, reply)
+    
+    # 异步调用机器人 API 接口
+    async def acall_api(self, api: str, **data: Any) -> Any:
+        '''异步调用机器人 API 接口
+
+        参数:
+            api (str): API 名称
+            **data (Any): API 数据
+
+        返回:
+            Any: API 响应数据
+        '''
+        return await self.adapter._acall_api(self, api, **data)
@@ -0,0 +1,97 @@
+'''Anon Chihaya 框架适配器
+JSON 编解码定义
+'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import json
+from typing import Union, Any
+
+try: # 优先使用 orjson
+    import orjson
+except ImportError:
+    orjson = None
+
+# 当前使用的编解码后端名称
+BACKEND: str = 'orjson' if orjson is not None else 'json'
+'''当前使用的编解码后端名称'''
+
+# 将 JSON 数据解码为对象
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    '''将 JSON 数据解码为对象，可直接传入 `bytes` 以避免先解码为 `str`
+
+    参数:
+        data (Union[bytes, bytearray, memoryview, str]): JSON 数据
+
+    返回:
+        Any: 解码后的对象
+    '''
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+# 将对象编码为 JSON 数据
+def dumps(obj: Any) -> bytes:
+    '''将对象编码为 UTF-8 编码的 JSON 数据
+
+    参数:
+        obj (Any): 需要编码的对象
+
+    返回:
+        bytes: JSON 数据
+    '''
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+# 将对象编码为 JSON 字符串
+def dumps_str(obj: Any) -> str:
+    '''将对象编码为 JSON 字符串
+
+    参数:
+        obj (Any): 需要编码的对象
+
+    返回:
+        str: JSON 字符串
+    '''
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+# 将可能包含多条数据的 JSON 数据解码为对象列表
+def loads_batch(data: Union[bytes, bytearray, memoryview, str]) -> tuple[list[Any], int]:
+    '''将可能包含多条数据的 JSON 数据解码为对象列表
+
+    支持单个 JSON 值、JSON 数组以及换行分隔的 JSON (NDJSON)，
+    对于 NDJSON 将逐行解码，无法解码的行会被跳过并计数。
+
+    参数:
+        data (Union[bytes, bytearray, memoryview, str]): JSON 数据
+
+    返回:
+        tuple[list[Any], int]: 解码后的对象列表，以及无法解码的条目数
+    '''
+    try:
+        value = loads(data)
+        if isinstance(value, str): # 兼容被二次编码的数据
+            value = loads(value)
+    except ValueError:
+        pass
+    else:
+        return (value if isinstance(value, list) else [value]), 0
+    # 按 NDJSON 逐行解码
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    items: list[Any] = []
+    errors = 0
+    for line in bytes(data).splitlines():
+        if not line.strip(): # 跳过空行
+            continue
+        try:
+            items.append(loads(line))
+        except ValueError:
+            errors += 1
+    return items, errors
@@ -1,10 +1,19 @@
 '''Anon Chihaya 框架适配器
 配置类型定义
 '''
+import os
 import abc
-from typing import Literal
+import yaml
+from typing import Literal, Any
 from pydantic import BaseModel
 
+# 获取配置文件所在目录
+CONFIG_DIR = os.path.dirname(
+    os.path.dirname(
+        os.path.dirname(__file__)
+    )
+)
+
 # 配置基类
 class Config(abc.ABC, BaseModel):
     '''配置基类'''
@@ -16,9 +25,42 @@ class Config(abc.ABC, BaseModel):
     '''与协议连接的 IP'''
     port: int
     '''与协议连接的端口'''
+    workers: int=16
+    '''事件分发工作线程数'''
+    queue_size: int=1024
+    '''事件分发等待队列长度上限'''
     # 获取文件内配置
     @classmethod
     @abc.abstractmethod
     def from_yaml(cls, serve: Literal['WebSocket', 'WebHook', 'Dev']='WebSocket') -> list['Config']:
         '''从 `config.yml` 中读取配置'''
         raise NotImplementedError
+
+# 内置 WebHook 服务器配置类
+class ServerConfig(BaseModel):
+    '''内置 WebHook 服务器配置类'''
+    host: str='0.0.0.0'
+    '''监听地址'''
+    port: int=8800
+    '''监听端口'''
+    path: str='/'
+    '''接收推送的路径'''
+    max_body_size: int=4*1024*1024
+    '''单个请求体的长度上限'''
+    max_header_size: int=16*1024
+    '''请求行与请求头的总长度上限'''
+    max_headers: int=100
+    '''请求头的数量上限'''
+    idle_timeout: float=60
+    '''长连接等待下一个请求的超时时间 (s)，超时后关闭连接，不大于 0 时不限制'''
+    read_timeout: float=30
+    '''读取单个请求的请求头与请求体的超时时间 (s)，超时后响应 `408` 并关闭连接，不大于 0 时不限制'''
+    # 获取文件内配置
+    @classmethod
+    def from_yaml(cls) -> 'ServerConfig':
+        '''从 `config.yml` 的 `Server` 字段中读取配置，不存在时使用默认配置'''
+        if not os.path.exists(CONFIG_DIR + '/config.yml'):
+            raise FileNotFoundError('AnonChihayaBot 配置文件 config.yml 不存在或不在正确的路径上。')
+        with open(CONFIG_DIR + '/config.yml', 'r', encoding='utf-8') as file:
+            config: dict[str, Any] = yaml.safe_load(file) or {}
+        return cls.model_validate(config.get('Server', None) or {})
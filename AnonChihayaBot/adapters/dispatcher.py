@@ -0,0 +1,334 @@
+'''Anon Chihaya 框架适配器
+事件分发器定义
+'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import asyncio
+import inspect
+import threading
+from queue import Queue, Full, Empty
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Any
+
+from .utils import Logging
+
+# 分发任务类型
+Task = tuple[Callable[..., Any], tuple[Any, ...]]
+
+# 事件分发器
+class Dispatcher:
+    '''事件分发器，由固定数量的工作线程从有界队列中取出任务执行
+
+    参数:
+        name (str): 分发器名称
+        workers (int, optional): 工作线程数
+        queue_size (int, optional): 等待队列长度上限
+    '''
+    # 初始化方法
+    def __init__(self, name: str, workers: int=16, queue_size: int=1024) -> None:
+        '''事件分发器
+
+        参数:
+            name (str): 分发器名称
+            workers (int, optional): 工作线程数
+            queue_size (int, optional): 等待队列长度上限
+        '''
+        self.name: str = name
+        '''分发器名称'''
+        self.workers: int = max(1, workers)
+        '''工作线程数'''
+        self.queue_size: int = max(1, queue_size)
+        '''等待队列长度上限'''
+        self.submitted: int = 0
+        '''已接收的任务数'''
+        self.completed: int = 0
+        '''成功完成的任务数'''
+        self.failed: int = 0
+        '''运行出错的任务数'''
+        self.rejected: int = 0
+        '''因队列已满被丢弃的任务数'''
+        self._queue: Queue[Optional[Task]] = Queue(maxsize=self.queue_size)
+        '''任务等待队列'''
+        self._threads: list[threading.Thread] = []
+        '''工作线程列表'''
+        self._lock = threading.Lock()
+        '''计数器与线程列表锁'''
+        self._running: bool = False
+        '''分发器是否正在运行'''
+        self._closed: bool = False
+        '''分发器是否已被停止'''
+    
+    # 当前等待队列长度
+    @property
+    def queue_depth(self) -> int:
+        '''当前等待队列长度'''
+        return self._queue.qsize()
+    
+    # 获取分发器统计信息
+    def stats(self) -> dict[str, int]:
+        '''获取分发器统计信息
+
+        返回:
+            dict[str, int]: 统计信息
+        '''
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'queue_depth': self._queue.qsize(),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+    
+    # 启动工作线程
+    def start(self) -> None:
+        '''启动工作线程'''
+        with self._lock:
+            if self._running or self._closed:
+                return
+            self._running = True
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f'{self.name}-dispatcher-{index}',
+                    daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+    
+    # 提交任务
+    def submit(self, function: Callable[..., Any], *args: Any) -> bool:
+        '''提交任务，队列已满时任务将被丢弃
+
+        参数:
+            function (Callable[..., Any]): 任务函数
+            *args (Any): 任务参数
+
+        返回:
+            bool: 任务是否被接收
+        '''
+        if self._closed: # 分发器已停止
+            return False
+        if not self._running:
+            self.start()
+        try:
+            self._queue.put_nowait((function, args))
+        except Full:
+            with self._lock:
+                self.rejected += 1
+                rejected = self.rejected
+            warning = f'[{self.name}] 分发队列已满 ({self.queue_size})，已丢弃任务，累计丢弃 {rejected} 个。'
+            print(warning)
+            Logging.warning(warning)
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+    
+    # 工作线程循环
+    def _work(self) -> None:
+        '''工作线程循环'''
+        while True:
+            task = self._queue.get()
+            if task is None: # 收到停止标识
+                return
+            function, args = task
+            try:
+                result = function(*args)
+                if inspect.isawaitable(result): # 异步功能函数在当前线程内运行
+                    asyncio.run(result)
+            except Exception as exception:
+                with self._lock:
+                    self.failed += 1
+                print(f'[{self.name}] 任务运行出错: {type(exception).__name__}: {exception}')
+                Logging.error(exception)
+            else:
+                with self._lock:
+                    self.completed += 1
+    
+    # 停止分发器
+    def shutdown(self) -> None:
+        '''停止分发器，丢弃尚未开始执行的任务'''
+        with self._lock:
+            self._closed = True
+            if not self._running:
+                return
+            self._running = False
+            threads = self._threads.copy()
+            self._threads.clear()
+        # 清空等待队列
+        while True:
+            try:
+                self._queue.get_nowait()
+            except Empty:
+                break
+        for _ in threads:
+            self._queue.put(None)
+
+# 异步事件分发器
+class AsyncDispatcher:
+    '''异步事件分发器，`async def` 任务直接在事件循环中运行，同步任务交由有界线程池执行
+
+    与 `Dispatcher` 接口一致，`submit` 可以在任意线程中调用。
+
+    参数:
+        name (str): 分发器名称
+        workers (int, optional): 同步任务线程池大小
+        queue_size (int, optional): 同时进行中的任务数上限
+    '''
+    # 初始化方法
+    def __init__(self, name: str, workers: int=16, queue_size: int=1024) -> None:
+        '''异步事件分发器
+
+        参数:
+            name (str): 分发器名称
+            workers (int, optional): 同步任务线程池大小
+            queue_size (int, optional): 同时进行中的任务数上限
+        '''
+        self.name: str = name
+        '''分发器名称'''
+        self.workers: int = max(1, workers)
+        '''同步任务线程池大小'''
+        self.queue_size: int = max(1, queue_size)
+        '''同时进行中的任务数上限'''
+        self.submitted: int = 0
+        '''已接收的任务数'''
+        self.completed: int = 0
+        '''成功完成的任务数'''
+        self.failed: int = 0
+        '''运行出错的任务数'''
+        self.rejected: int = 0
+        '''因进行中任务过多被丢弃的任务数'''
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        '''任务运行所在的事件循环'''
+        self._pending: int = 0
+        '''进行中的任务数'''
+        self._executor: Optional[ThreadPoolExecutor] = None
+        '''同步任务线程池'''
+        self._tasks: set[asyncio.Task[None]] = set()
+        '''进行中的任务，防止任务被回收'''
+        self._lock = threading.Lock()
+        '''计数器锁'''
+        self._closed: bool = False
+        '''分发器是否已被停止'''
+    
+    # 当前进行中的任务数
+    @property
+    def queue_depth(self) -> int:
+        '''当前进行中的任务数'''
+        return self._pending
+    
+    # 获取分发器统计信息
+    def stats(self) -> dict[str, int]:
+        '''获取分发器统计信息
+
+        返回:
+            dict[str, int]: 统计信息
+        '''
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'queue_depth': self._pending,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+    
+    # 绑定事件循环并创建线程池
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        '''绑定事件循环并创建线程池
+
+        参数:
+            loop (asyncio.AbstractEventLoop): 任务运行所在的事件循环
+        '''
+        with self._lock:
+            if self.loop is not None or self._closed:
+                return
+            self.loop = loop
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix=f'{self.name}-dispatcher'
+            )
+    
+    # 提交任务
+    def submit(self, function: Callable[..., Any], *args: Any) -> bool:
+        '''提交任务，进行中的任务过多时任务将被丢弃
+
+        参数:
+            function (Callable[..., Any]): 任务函数
+            *args (Any): 任务参数
+
+        返回:
+            bool: 任务是否被接收
+        '''
+        if self._closed or self.loop is None: # 分发器已停止或未启动
+            return False
+        with self._lock:
+            if self._pending >= self.queue_size:
+                self.rejected += 1
+                rejected = self.rejected
+            else:
+                self._pending += 1
+                self.submitted += 1
+                rejected = 0
+        if rejected > 0:
+            warning = f'[{self.name}] 进行中的任务已满 ({self.queue_size})，已丢弃任务，累计丢弃 {rejected} 个。'
+            print(warning)
+            Logging.warning(warning)
+            return False
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self.loop:
+            self._create_task(function, args)
+        else: # 从其他线程提交
+            self.loop.call_soon_threadsafe(self._create_task, function, args)
+        return True
+    
+    # 在事件循环中创建任务
+    def _create_task(self, function: Callable[..., Any], args: tuple[Any, ...]) -> None:
+        '''在事件循环中创建任务'''
+        task = asyncio.ensure_future(self._run(function, args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    # 运行任务
+    async def _run(self, function: Callable[..., Any], args: tuple[Any, ...]) -> None:
+        '''运行任务'''
+        try:
+            if inspect.iscoroutinefunction(function):
+                await function(*args)
+            else: # 同步任务交由线程池执行
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, lambda: function(*args))
+                if inspect.isawaitable(result):
+                    await result
+        except Exception as exception:
+            with self._lock:
+                self.failed += 1
+            print(f'[{self.name}] 任务运行出错: {type(exception).__name__}: {exception}')
+            Logging.error(exception)
+        else:
+            with self._lock:
+                self.completed += 1
+        finally:
+            with self._lock:
+                self._pending -= 1
+    
+    # 停止分发器
+    def shutdown(self) -> None:
+        '''停止分发器，取消尚未完成的异步任务'''
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self.loop is not None and not self.loop.is_closed():
+            for task in list(self._tasks):
+                self.loop.call_soon_threadsafe(task.cancel)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,206 @@
+'''Anon Chihaya 框架适配器
+WebHook 转发器定义
+'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import httpx
+import threading
+from time import monotonic
+from queue import Queue, Full, Empty
+from typing import Optional
+
+from .utils import Logging
+
+# WebHook 转发器
+class Forwarder:
+    '''WebHook 转发器，将收到的原始数据放入有界缓冲区，由后台线程复用连接进行推送
+
+    缓冲区已满时新数据将被丢弃并计数。当 `batch_size` 大于 1 时，
+    会将 `batch_interval` 秒内收到的多条数据合并为一个 JSON 数组进行推送。
+
+    参数:
+        name (str): 转发器名称
+        client (httpx.Client): 进行推送的 HTTP 客户端
+        path (str): 推送路径
+        buffer_size (int, optional): 缓冲区长度上限
+        batch_size (int, optional): 单次推送的最大数据条数
+        batch_interval (float, optional): 合并推送时的最长等待时间
+    '''
+    # 初始化方法
+    def __init__(
+        self,
+        name: str,
+        client: httpx.Client,
+        path: str,
+        buffer_size: int=1024,
+        batch_size: int=1,
+        batch_interval: float=0.05
+    ) -> None:
+        '''WebHook 转发器
+
+        参数:
+            name (str): 转发器名称
+            client (httpx.Client): 进行推送的 HTTP 客户端
+            path (str): 推送路径
+            buffer_size (int, optional): 缓冲区长度上限
+            batch_size (int, optional): 单次推送的最大数据条数
+            batch_interval (float, optional): 合并推送时的最长等待时间
+        '''
+        self.name: str = name
+        '''转发器名称'''
+        self.client: httpx.Client = client
+        '''进行推送的 HTTP 客户端'''
+        self.path: str = path
+        '''推送路径'''
+        self.buffer_size: int = max(1, buffer_size)
+        '''缓冲区长度上限'''
+        self.batch_size: int = max(1, batch_size)
+        '''单次推送的最大数据条数'''
+        self.batch_interval: float = max(0.0, batch_interval)
+        '''合并推送时的最长等待时间'''
+        self.forwarded: int = 0
+        '''已成功推送的数据条数'''
+        self.posts: int = 0
+        '''已进行的推送次数'''
+        self.failed: int = 0
+        '''推送失败的数据条数'''
+        self.dropped: int = 0
+        '''因缓冲区已满被丢弃的数据条数'''
+        self._queue: Queue[Optional[bytes]] = Queue(maxsize=self.buffer_size)
+        '''待推送数据缓冲区'''
+        self._thread: Optional[threading.Thread] = None
+        '''推送线程'''
+        self._lock = threading.Lock()
+        '''计数器锁'''
+        self._closed: bool = False
+        '''转发器是否已被停止'''
+    
+    # 获取转发器统计信息
+    def stats(self) -> dict[str, int]:
+        '''获取转发器统计信息
+
+        返回:
+            dict[str, int]: 统计信息
+        '''
+        with self._lock:
+            return {
+                'buffer_size': self.buffer_size,
+                'buffer_depth': self._queue.qsize(),
+                'forwarded': self.forwarded,
+                'posts': self.posts,
+                'failed': self.failed,
+                'dropped': self.dropped
+            }
+    
+    # 启动推送线程
+    def start(self) -> None:
+        '''启动推送线程'''
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(
+                target=self._send_loop,
+                name=f'{self.name}-forwarder',
+                daemon=True
+            )
+            self._thread.start()
+    
+    # 放入待推送数据
+    def forward(self, data: bytes) -> bool:
+        '''放入待推送数据，不会阻塞调用者
+
+        参数:
+            data (bytes): 原始 JSON 数据
+
+        返回:
+            bool: 数据是否被接收
+        '''
+        if self._closed:
+            return False
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(data)
+        except Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            warning = f'[{self.name}] 转发缓冲区已满 ({self.buffer_size})，已丢弃数据，累计丢弃 {dropped} 条。'
+            print(warning)
+            Logging.warning(warning)
+            return False
+        return True
+    
+    # 收集一批待推送数据
+    def _collect(self, first: bytes) -> tuple[list[bytes], bool]:
+        '''收集一批待推送数据
+
+        返回:
+            tuple[list[bytes], bool]: 待推送数据，以及是否收到停止标识
+        '''
+        batch = [first]
+        deadline = monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - monotonic()
+            try:
+                data = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except Empty:
+                break
+            if data is None: # 收到停止标识
+                return batch, True
+            batch.append(data)
+        return batch, False
+    
+    # 推送线程循环
+    def _send_loop(self) -> None:
+        '''推送线程循环'''
+        while True:
+            data = self._queue.get()
+            if data is None: # 收到停止标识
+                return
+            batch, stop = self._collect(data)
+            # 单条数据直接推送，多条数据合并为 JSON 数组，均不重新编码
+            content = batch[0] if len(batch) == 1 else b'[' + b','.join(batch) + b']'
+            try:
+                response = self.client.post(
+                    self.path,
+                    content=content,
+                    headers={'Content-Type': 'application/json'}
+                )
+                response.raise_for_status()
+            except Exception as exception:
+                with self._lock:
+                    self.failed += len(batch)
+                print(f'[{self.name}] 本次 Webhook 推送失败 ({len(batch)} 条)：{type(exception).__name__}: {exception}')
+            else:
+                with self._lock:
+                    self.forwarded += len(batch)
+                    self.posts += 1
+            if stop:
+                return
+    
+    # 停止转发器
+    def shutdown(self, timeout: float=5) -> None:
+        '''停止转发器，已在缓冲区中的数据会在推送后停止，并等待推送线程退出
+
+        参数:
+            timeout (float, optional): 等待推送线程退出的最长时间
+        '''
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        deadline = monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except Full:
+            print(f'[{self.name}] 停止转发器超时，缓冲区中的数据将被丢弃。')
+            return
+        thread.join(timeout=max(0.0, deadline - monotonic()))
+        if thread.is_alive():
+            warning = f'[{self.name}] 推送线程未能在 {timeout} 秒内退出，剩余 {self._queue.qsize()} 条数据未推送。'
+            print(warning)
+            Logging.warning(warning)
@@ -0,0 +1,480 @@
+'''Anon Chihaya 框架适配器
+消息发送队列定义
+'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import threading
+from time import monotonic
+from itertools import count
+from collections import deque
+from heapq import heappush, heappop
+from concurrent.futures import Future, Executor
+from typing import Callable, Optional, Any
+
+from .utils import Logging
+
+# 发送函数类型，接收频道 ID 与消息内容，返回发送结果
+Sender = Callable[[str, str], Any]
+
+# 令牌桶
+class TokenBucket:
+    '''令牌桶，以固定速率补充令牌，`rate` 不大于 0 时不进行限制
+
+    参数:
+        rate (float): 每秒补充的令牌数
+        capacity (float): 令牌数上限，即允许的突发数
+    '''
+    # 初始化方法
+    def __init__(self, rate: float, capacity: float) -> None:
+        '''令牌桶
+
+        参数:
+            rate (float): 每秒补充的令牌数
+            capacity (float): 令牌数上限，即允许的突发数
+        '''
+        self.rate: float = rate
+        '''每秒补充的令牌数'''
+        self.capacity: float = max(1.0, capacity)
+        '''令牌数上限'''
+        self.tokens: float = self.capacity
+        '''当前令牌数'''
+        self.updated: float = monotonic()
+        '''上一次补充令牌的时间'''
+    
+    # 补充令牌
+    def _refill(self, now: float) -> None:
+        '''按经过的时间补充令牌'''
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    # 获取令牌可用前需要等待的时间
+    def delay(self, now: float) -> float:
+        '''获取令牌可用前需要等待的时间
+
+        参数:
+            now (float): 当前时间
+
+        返回:
+            float: 需要等待的秒数，令牌可用时为 0
+        '''
+        if self.rate <= 0:
+            return 0
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+    
+    # 消耗令牌
+    def consume(self, now: float) -> None:
+        '''消耗一个令牌
+
+        参数:
+            now (float): 当前时间
+        '''
+        if self.rate <= 0:
+            return
+        self._refill(now)
+        self.tokens -= 1
+    
+    # 令牌桶是否已满
+    def full(self, now: float) -> bool:
+        '''令牌桶是否已满，已满的令牌桶可以被安全地丢弃'''
+        if self.rate <= 0:
+            return True
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+# 待发送消息
+class _Message:
+    '''待发送消息'''
+    __slots__ = ('content', 'sender', 'executor', 'future', 'created')
+    # 初始化方法
+    def __init__(self, content: str, sender: Optional[Sender]=None, executor: Optional[Executor]=None) -> None:
+        '''待发送消息'''
+        self.content: str = content
+        '''消息内容'''
+        self.sender: Optional[Sender] = sender
+        '''该消息使用的发送函数，为 `None` 时使用发送队列的发送函数'''
+        self.executor: Optional[Executor] = executor
+        '''执行发送的线程池，为 `None` 时由工作线程发送'''
+        self.future: Future[Any] = Future()
+        '''发送结果'''
+        self.created: float = monotonic()
+        '''放入队列的时间'''
+
+# 群发结果
+class BroadcastReport:
+    '''群发结果，按频道记录发送结果与失败原因'''
+    # 初始化方法
+    def __init__(self) -> None:
+        '''群发结果'''
+        self.results: dict[str, Any] = {}
+        '''发送成功的频道及其发送结果'''
+        self.failures: dict[str, Exception] = {}
+        '''发送失败的频道及其异常'''
+        self.elapsed: float = 0
+        '''群发耗时，单位为秒'''
+    
+    # 发送成功的频道数
+    @property
+    def succeeded(self) -> int:
+        '''发送成功的频道数'''
+        return len(self.results)
+    
+    # 发送失败的频道数
+    @property
+    def failed(self) -> int:
+        '''发送失败的频道数'''
+        return len(self.failures)
+    
+    # 对外输出方法
+    def __repr__(self) -> str:
+        '''对外输出方法'''
+        return f'群发结果：成功 {self.succeeded} 个频道，失败 {self.failed} 个频道，耗时 {self.elapsed:.2f} s'
+
+# 消息发送队列
+class Outbox:
+    '''消息发送队列，由固定数量的工作线程按频道依次发送消息
+
+    同一频道的消息按放入顺序发送，不同频道的消息可以并行发送。每次发送前需要同时从频道令牌桶与
+    机器人令牌桶中取得令牌。当 `merge_interval` 大于 0 时，同一频道在该时间内连续放入的短纯文本消息
+    会被合并为一条消息发送，被合并的消息共享同一个发送结果。
+
+    需要等待令牌或等待合并的频道会被放入延迟队列，工作线程不会在等待期间占用频道，
+    因此工作线程只在实际发送时被占用，`workers` 即同时进行的发送数上限。
+    放入时指定了 `executor` 的消息在取得令牌后交由该线程池发送，不占用工作线程，
+    其并发数由线程池决定，发送速率仍受令牌桶限制。
+
+    参数:
+        name (str): 发送队列名称
+        sender (Sender): 发送函数
+        workers (int, optional): 工作线程数
+        queue_size (int, optional): 等待发送的消息数上限
+        channel_rate (float, optional): 每个频道每秒允许发送的消息数
+        channel_burst (int, optional): 每个频道允许的突发消息数
+        bot_rate (float, optional): 机器人每秒允许发送的消息数
+        bot_burst (int, optional): 机器人允许的突发消息数
+        merge_interval (float, optional): 合并消息的等待时间
+        merge_length (int, optional): 可被合并的消息最大长度
+    '''
+    # 初始化方法
+    def __init__(
+        self,
+        name: str,
+        sender: Sender,
+        workers: int=2,
+        queue_size: int=1024,
+        channel_rate: float=5,
+        channel_burst: int=5,
+        bot_rate: float=20,
+        bot_burst: int=20,
+        merge_interval: float=0,
+        merge_length: int=200
+    ) -> None:
+        '''消息发送队列
+
+        参数:
+            name (str): 发送队列名称
+            sender (Sender): 发送函数
+            workers (int, optional): 工作线程数
+            queue_size (int, optional): 等待发送的消息数上限
+            channel_rate (float, optional): 每个频道每秒允许发送的消息数
+            channel_burst (int, optional): 每个频道允许的突发消息数
+            bot_rate (float, optional): 机器人每秒允许发送的消息数
+            bot_burst (int, optional): 机器人允许的突发消息数
+            merge_interval (float, optional): 合并消息的等待时间
+            merge_length (int, optional): 可被合并的消息最大长度
+        '''
+        self.name: str = name
+        '''发送队列名称'''
+        self.sender: Sender = sender
+        '''发送函数'''
+        self.workers: int = max(1, workers)
+        '''工作线程数'''
+        self.queue_size: int = max(1, queue_size)
+        '''等待发送的消息数上限'''
+        self.channel_rate: float = channel_rate
+        '''每个频道每秒允许发送的消息数'''
+        self.channel_burst: int = channel_burst
+        '''每个频道允许的突发消息数'''
+        self.merge_interval: float = max(0.0, merge_interval)
+        '''合并消息的等待时间'''
+        self.merge_length: int = merge_length
+        '''可被合并的消息最大长度'''
+        self.submitted: int = 0
+        '''已接收的消息数'''
+        self.sent: int = 0
+        '''实际进行的发送次数'''
+        self.merged: int = 0
+        '''被合并到其他消息中发送的消息数'''
+        self.failed: int = 0
+        '''发送失败的消息数'''
+        self.rejected: int = 0
+        '''因队列已满被拒绝的消息数'''
+        self.throttled: int = 0
+        '''因限速而延后发送的次数'''
+        self.pending: int = 0
+        '''等待发送的消息数'''
+        self._channels: dict[str, deque[_Message]] = {}
+        '''各频道等待发送的消息，存在于此的频道正在等待或正在被发送'''
+        self._ready: deque[str] = deque()
+        '''等待工作线程处理的频道'''
+        self._delayed: list[tuple[float, int, str]] = []
+        '''等待令牌或等待合并的频道，按可处理时间排序的堆'''
+        self._sequence = count()
+        '''延迟队列序号，保证相同时间的频道按放入顺序处理'''
+        self._buckets: dict[str, TokenBucket] = {}
+        '''各频道的令牌桶'''
+        self._bot_bucket: TokenBucket = TokenBucket(bot_rate, bot_burst)
+        '''机器人令牌桶'''
+        self._condition = threading.Condition(threading.Lock())
+        '''队列条件变量'''
+        self._threads: list[threading.Thread] = []
+        '''工作线程列表'''
+        self._closed: bool = False
+        '''发送队列是否已被停止'''
+    
+    # 获取发送队列统计信息
+    def stats(self) -> dict[str, int]:
+        '''获取发送队列统计信息
+
+        返回:
+            dict[str, int]: 统计信息
+        '''
+        with self._condition:
+            return {
+                'pending': self.pending,
+                'channels': len(self._channels),
+                'submitted': self.submitted,
+                'sent': self.sent,
+                'merged': self.merged,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'throttled': self.throttled
+            }
+    
+    # 启动工作线程
+    def start(self) -> None:
+        '''启动工作线程'''
+        with self._condition:
+            if self._threads or self._closed:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f'{self.name}-outbox-{index}',
+                    daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+    
+    # 放入待发送消息
+    def submit(
+        self,
+        channel_id: str,
+        content: str,
+        sender: Optional[Sender]=None,
+        executor: Optional[Executor]=None
+    ) -> 'Future[Any]':
+        '''放入待发送消息，不会阻塞调用者
+
+        参数:
+            channel_id (str): 频道 ID
+            content (str): 消息内容
+            sender (Optional[Sender], optional): 该消息使用的发送函数，指定时该消息不会被合并
+            executor (Optional[Executor], optional): 执行发送的线程池，为 `None` 时由工作线程发送
+
+        返回:
+            Future[Any]: 发送结果，队列已满或已停止时将得到 `RuntimeError`
+        '''
+        message = _Message(content, sender, executor)
+        with self._condition:
+            if self._closed:
+                message.future.set_exception(RuntimeError(f'[{self.name}] 发送队列已停止。'))
+                return message.future
+            if self.pending >= self.queue_size:
+                self.rejected += 1
+                message.future.set_exception(
+                    RuntimeError(f'[{self.name}] 发送队列已满 ({self.queue_size})，消息未被发送。')
+                )
+                return message.future
+            queue = self._channels.get(channel_id, None)
+            if queue is None: # 频道空闲时交由工作线程处理
+                queue = self._channels[channel_id] = deque()
+                self._ready.append(channel_id)
+                self._condition.notify()
+            queue.append(message)
+            self.pending += 1
+            self.submitted += 1
+            started = bool(self._threads)
+        if not started:
+            self.start()
+        return message.future
+    
+    # 判断消息能否被合并
+    def _mergeable(self, message: _Message) -> bool:
+        '''判断消息能否被合并，仅合并不含消息元素且未指定发送函数的短文本'''
+        return (
+            self.merge_interval > 0
+            and message.sender is None
+            and message.executor is None
+            and len(message.content) <= self.merge_length
+            and '<' not in message.content
+        )
+    
+    # 工作线程循环
+    def _work(self) -> None:
+        '''工作线程循环'''
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    now = monotonic()
+                    # 将已到达处理时间的频道移入就绪队列
+                    while self._delayed and self._delayed[0][0] <= now:
+                        self._ready.append(heappop(self._delayed)[2])
+                    if self._ready:
+                        channel_id = self._ready.popleft()
+                        break
+                    self._condition.wait(self._delayed[0][0] - now if self._delayed else None)
+            try:
+                self._process(channel_id)
+            except Exception as exception:
+                print(f'[{self.name}] 发送队列运行出错：{type(exception).__name__}: {exception}')
+                Logging.error(exception)
+    
+    # 延后处理频道
+    def _defer(self, channel_id: str, ready_at: float) -> None:
+        '''将频道放入延迟队列，调用时需持有队列锁'''
+        heappush(self._delayed, (ready_at, next(self._sequence), channel_id))
+        self._condition.notify() # 唤醒空闲的工作线程以按时处理
+    
+    # 尝试取得令牌
+    def _reserve(self, channel_id: str, now: float) -> float:
+        '''尝试同时从频道令牌桶与机器人令牌桶中取得令牌，调用时需持有队列锁
+
+        返回:
+            float: 令牌可用前需要等待的秒数，为 0 时已消耗令牌
+        '''
+        bucket = self._buckets.get(channel_id, None)
+        if bucket is None:
+            if len(self._buckets) >= self.queue_size: # 丢弃已满的令牌桶
+                for key in [key for key, value in self._buckets.items() if value.full(now)]:
+                    del self._buckets[key]
+            bucket = self._buckets[channel_id] = TokenBucket(self.channel_rate, self.channel_burst)
+        delay = max(bucket.delay(now), self._bot_bucket.delay(now))
+        if delay <= 0:
+            bucket.consume(now)
+            self._bot_bucket.consume(now)
+        return delay
+    
+    # 发送一个频道中的下一条消息
+    def _process(self, channel_id: str) -> None:
+        '''发送一个频道中的下一条消息，需要时合并之后的短文本消息
+
+        需要等待合并或等待令牌时将频道放入延迟队列后立即返回，不占用工作线程。
+        '''
+        with self._condition:
+            queue = self._channels[channel_id]
+            # 丢弃已被取消的消息，避免为其等待或消耗令牌
+            cancelled = 0
+            while queue and queue[0].future.cancelled():
+                queue.popleft()
+                cancelled += 1
+            self.pending -= cancelled
+            if not queue: # 发送队列已停止或消息均已被取消
+                del self._channels[channel_id]
+                return
+            now = monotonic()
+            # 等待可能被合并的后续消息
+            if self._mergeable(queue[0]):
+                ready_at = queue[0].created + self.merge_interval
+                if ready_at > now:
+                    self._defer(channel_id, ready_at)
+                    return
+            # 等待令牌
+            delay = self._reserve(channel_id, now)
+            if delay > 0:
+                self.throttled += 1
+                self._defer(channel_id, now + delay)
+                return
+            # 取出本次发送的消息，跳过已被取消的消息
+            batch: list[_Message] = []
+            cancelled = 0
+            while queue and not batch:
+                message = queue.popleft()
+                if message.future.set_running_or_notify_cancel():
+                    batch.append(message)
+                else:
+                    cancelled += 1
+            if batch and self._mergeable(batch[0]):
+                length = len(batch[0].content)
+                while (
+                    queue
+                    and self._mergeable(queue[0])
+                    and queue[0].created - batch[0].created <= self.merge_interval
+                    and length + 1 + len(queue[0].content) <= self.merge_length
+                ):
+                    message = queue.popleft()
+                    if message.future.set_running_or_notify_cancel():
+                        length += 1 + len(message.content)
+                        batch.append(message)
+                    else:
+                        cancelled += 1
+            self.pending -= cancelled
+        if batch and batch[0].executor is not None:
+            try: # 交由指定的线程池发送，频道在发送完成前保持占用以保证顺序
+                batch[0].executor.submit(self._send, channel_id, queue, batch)
+                return
+            except RuntimeError: # 线程池已停止，由工作线程发送
+                pass
+        self._send(channel_id, queue, batch)
+    
+    # 发送消息
+    def _send(self, channel_id: str, queue: deque[_Message], batch: list[_Message]) -> None:
+        '''发送取出的消息，完成后将仍有消息的频道重新交由工作线程处理'''
+        if batch:
+            content = '\n'.join([message.content for message in batch])
+            try:
+                result = (batch[0].sender or self.sender)(channel_id, content)
+            except Exception as exception:
+                with self._condition:
+                    self.failed += len(batch)
+                for message in batch:
+                    message.future.set_exception(exception)
+            else:
+                for message in batch:
+                    message.future.set_result(result)
+        # 频道中仍有消息时重新交由工作线程处理
+        with self._condition:
+            self.pending -= len(batch)
+            self.sent += 1 if batch else 0
+            self.merged += max(0, len(batch) - 1)
+            if queue and not self._closed:
+                self._ready.append(channel_id)
+                self._condition.notify()
+            else:
+                del self._channels[channel_id]
+    
+    # 停止发送队列
+    def shutdown(self) -> None:
+        '''停止发送队列，正在发送的消息会被发送完成，其余消息将得到 `RuntimeError`'''
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            messages = [message for queue in self._channels.values() for message in queue]
+            for queue in self._channels.values():
+                queue.clear()
+            self.pending -= len(messages)
+            # 未在处理中的频道直接移除，处理中的频道由工作线程移除
+            for channel_id in [*self._ready, *(item[2] for item in self._delayed)]:
+                self._channels.pop(channel_id, None)
+            self._ready.clear()
+            self._delayed.clear()
+            self._condition.notify_all()
+        for message in messages:
+            if message.future.set_running_or_notify_cancel():
+                message.future.set_exception(RuntimeError(f'[{self.name}] 发送队列已停止。'))
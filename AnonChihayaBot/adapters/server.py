@@ -0,0 +1,366 @@
+'''Anon Chihaya 框架适配器
+内置 WebHook 服务器定义
+'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import asyncio
+import threading
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .utils import Logging
+from .config import ServerConfig
+
+T = TypeVar('T')
+
+# 请求处理函数类型，接收请求体与请求头，返回响应状态码
+RequestHandler = Callable[[bytes, dict[str, str]], int]
+
+# 响应状态码对应的原因短语
+REASONS: dict[int, str] = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    408: 'Request Timeout',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    414: 'URI Too Long',
+    417: 'Expectation Failed',
+    431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error',
+    501: 'Not Implemented',
+    503: 'Service Unavailable'
+}
+
+# 请求不合法错误
+class _RequestError(Exception):
+    '''请求不合法错误，以对应状态码响应后关闭连接
+
+    参数:
+        status (int): 响应状态码
+    '''
+    # 初始化方法
+    def __init__(self, status: int) -> None:
+        '''请求不合法错误
+
+        参数:
+            status (int): 响应状态码
+        '''
+        super().__init__(f'请求不合法，响应状态码 {status}')
+        self.status: int = status
+        '''响应状态码'''
+
+# 内置 WebHook 服务器
+class WebHookServer:
+    '''内置 WebHook 服务器，基于 asyncio 的 HTTP/1.1 服务器
+
+    在独立线程的事件循环中接收推送，支持长连接、`chunked` 请求体与 `Expect: 100-continue`。
+    请求体交由 `handler` 处理后立即响应，`handler` 应只进行解析与分发，不应阻塞。
+    请求头超出 `max_header_size` 或 `max_headers` 时响应 `431`，请求体超出 `max_body_size` 时响应 `413`。
+    长连接空闲超过 `idle_timeout` 时关闭连接，读取请求超过 `read_timeout` 时响应 `408` 并关闭连接。
+
+    参数:
+        config (ServerConfig): 服务器配置
+        handler (RequestHandler): 请求处理函数
+    '''
+    # 初始化方法
+    def __init__(self, config: ServerConfig, handler: RequestHandler) -> None:
+        '''内置 WebHook 服务器
+
+        参数:
+            config (ServerConfig): 服务器配置
+            handler (RequestHandler): 请求处理函数
+        '''
+        self.config: ServerConfig = config
+        '''服务器配置'''
+        self.handler: RequestHandler = handler
+        '''请求处理函数'''
+        self.requests: int = 0
+        '''已处理的请求数'''
+        self.errors: int = 0
+        '''未能正常处理的请求数'''
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        '''服务器运行所在的事件循环'''
+        self._server: Optional[asyncio.AbstractServer] = None
+        '''asyncio 服务器对象'''
+        self._thread: Optional[threading.Thread] = None
+        '''运行事件循环的线程'''
+        self._started = threading.Event()
+        '''服务器是否已开始监听'''
+        self._error: Optional[BaseException] = None
+        '''启动时出现的错误'''
+    
+    # 获取服务器统计信息
+    def stats(self) -> dict[str, int]:
+        '''获取服务器统计信息
+
+        返回:
+            dict[str, int]: 统计信息
+        '''
+        return {'requests': self.requests, 'errors': self.errors}
+    
+    # 启动服务器
+    def start(self) -> None:
+        '''在独立线程中启动服务器，监听失败时抛出异常'''
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='WebHook-server')
+        self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            raise self._error
+        port = self._server.sockets[0].getsockname()[1] if self._server is not None else self.config.port
+        info = f'[WebHook] 内置服务器已在 http://{self.config.host}:{port}{self.config.path} 上监听。'
+        print(info)
+        Logging.info(info)
+    
+    # 运行事件循环
+    def _run(self) -> None:
+        '''运行事件循环'''
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(
+                asyncio.start_server(
+                    self._handle_connection,
+                    self.config.host,
+                    self.config.port,
+                    limit=max(self.config.max_header_size, 64 * 1024)
+                )
+            )
+        except Exception as exception:
+            self._error = exception
+            self._started.set()
+            self.loop.close()
+            return
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self._server.close()
+            # 取消仍在进行中的连接
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+    
+    # 处理单个连接
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        '''处理单个连接，同一连接上的请求依次处理'''
+        try:
+            while True:
+                try:
+                    # 等待下一个请求，空闲超时后关闭连接
+                    request_line = await self._with_timeout(self._readline(reader, 414), self.config.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                except _RequestError as error:
+                    await self._respond(writer, error.status, False)
+                    break
+                if not request_line: # 连接已关闭
+                    break
+                try:
+                    method, target, version, headers = await self._with_timeout(
+                        self._read_head(reader, request_line),
+                        self.config.read_timeout
+                    )
+                    keep_alive = (
+                        headers.get('connection', '').lower() != 'close'
+                        if version == 'HTTP/1.1'
+                        else headers.get('connection', '').lower() == 'keep-alive'
+                    )
+                    # 判断请求方法与路径
+                    if method != 'POST':
+                        status = 405
+                    elif target.split('?', 1)[0] != self.config.path:
+                        status = 404
+                    else:
+                        status = 200
+                    expect = headers.get('expect', None)
+                    if expect is not None:
+                        if expect.lower() != '100-continue':
+                            raise _RequestError(417)
+                        if status != 200: # 不读取请求体，直接响应并关闭连接
+                            raise _RequestError(status)
+                    body = await self._with_timeout(
+                        self._read_body(reader, writer, method, headers),
+                        self.config.read_timeout
+                    )
+                except asyncio.TimeoutError: # 读取请求超时
+                    await self._respond(writer, 408, False)
+                    break
+                except _RequestError as error:
+                    await self._respond(writer, error.status, False)
+                    break
+                if status == 200:
+                    status = self._dispatch(body, headers)
+                await self._respond(writer, status, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError): # 连接断开或服务器停止
+            pass
+        finally:
+            writer.close()
+    
+    # 限时等待
+    @staticmethod
+    async def _with_timeout(awaitable: Awaitable[T], timeout: float) -> T:
+        '''在 `timeout` 内等待 `awaitable` 完成，超时时抛出 `asyncio.TimeoutError`，`timeout` 不大于 0 时不限制'''
+        if timeout <= 0:
+            return await awaitable
+        return await asyncio.wait_for(awaitable, timeout)
+    
+    # 读取一行
+    @staticmethod
+    async def _readline(reader: asyncio.StreamReader, status: int) -> bytes:
+        '''读取一行，连接在行中途断开时抛出 `IncompleteReadError`，行过长时以 `status` 抛出 `_RequestError`'''
+        try:
+            line = await reader.readline()
+        except ValueError: # 超出缓冲区上限
+            raise _RequestError(status)
+        if line and not line.endswith(b'\n'):
+            raise asyncio.IncompleteReadError(line, None)
+        return line
+    
+    # 读取请求行与请求头
+    async def _read_head(
+        self,
+        reader: asyncio.StreamReader,
+        request_line: bytes
+    ) -> tuple[str, str, str, dict[str, str]]:
+        '''解析请求行并读取请求头
+
+        参数:
+            reader (asyncio.StreamReader): 连接的读取流
+            request_line (bytes): 已读取的请求行
+
+        返回:
+            tuple[str, str, str, dict[str, str]]: 请求方法、目标、版本与请求头
+        '''
+        if len(request_line) > self.config.max_header_size:
+            raise _RequestError(414)
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise _RequestError(400)
+        headers: dict[str, str] = {}
+        size = len(request_line)
+        count = 0
+        while True:
+            line = await self._readline(reader, 431)
+            if not line: # 请求头未结束时连接已关闭
+                raise asyncio.IncompleteReadError(b'', None)
+            if line in (b'\r\n', b'\n'):
+                break
+            size += len(line)
+            count += 1
+            if size > self.config.max_header_size or count > self.config.max_headers:
+                raise _RequestError(431)
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        return method, target, version, headers
+    
+    # 读取请求体
+    async def _read_body(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        method: str,
+        headers: dict[str, str]
+    ) -> bytes:
+        '''读取请求体，请求带有 `Expect: 100-continue` 时先回复 `100 Continue`'''
+        transfer_encoding = headers.get('transfer-encoding', None)
+        if transfer_encoding is not None:
+            if 'content-length' in headers: # 同时存在时无法确定请求体边界
+                raise _RequestError(400)
+            if transfer_encoding.lower() != 'chunked':
+                raise _RequestError(501)
+            await self._continue(writer, headers)
+            return await self._read_chunked(reader)
+        length = headers.get('content-length', None if method == 'POST' else '0')
+        if length is None or not length.isdigit():
+            raise _RequestError(411)
+        if int(length) > self.config.max_body_size:
+            raise _RequestError(413)
+        await self._continue(writer, headers)
+        return await reader.readexactly(int(length))
+    
+    # 读取 chunked 请求体
+    async def _read_chunked(self, reader: asyncio.StreamReader) -> bytes:
+        '''读取 `Transfer-Encoding: chunked` 请求体，忽略块扩展与尾部字段'''
+        chunks: list[bytes] = []
+        size = 0
+        while True:
+            line = await self._readline(reader, 400)
+            if not line:
+                raise asyncio.IncompleteReadError(b'', None)
+            try:
+                length = int(line.split(b';', 1)[0].strip(), 16)
+            except ValueError:
+                raise _RequestError(400)
+            if length < 0:
+                raise _RequestError(400)
+            if length == 0: # 最后一个块
+                break
+            size += length
+            if size > self.config.max_body_size:
+                raise _RequestError(413)
+            chunks.append(await reader.readexactly(length))
+            if await self._readline(reader, 400) not in (b'\r\n', b'\n'): # 块数据后应紧跟换行
+                raise _RequestError(400)
+        # 读取并丢弃尾部字段
+        count = 0
+        while True:
+            line = await self._readline(reader, 431)
+            if not line:
+                raise asyncio.IncompleteReadError(b'', None)
+            if line in (b'\r\n', b'\n'):
+                break
+            count += 1
+            if count > self.config.max_headers:
+                raise _RequestError(431)
+        return b''.join(chunks)
+    
+    # 回复 100 Continue
+    @staticmethod
+    async def _continue(writer: asyncio.StreamWriter, headers: dict[str, str]) -> None:
+        '''客户端等待 `100 Continue` 时进行回复'''
+        if headers.get('expect', '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            await writer.drain()
+    
+    # 分发请求体
+    def _dispatch(self, body: bytes, headers: dict[str, str]) -> int:
+        '''将请求体交由处理函数，返回响应状态码'''
+        self.requests += 1
+        try:
+            status = self.handler(body, headers)
+        except Exception as exception:
+            print(f'[WebHook] 处理请求时出错：{type(exception).__name__}: {exception}')
+            Logging.error(exception)
+            status = 400
+        if status != 200:
+            self.errors += 1
+        return status
+    
+    # 发送响应
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, keep_alive: bool) -> None:
+        '''发送响应'''
+        writer.write(
+            (
+                f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n'
+                'Content-Length: 0\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+                '\r\n'
+            ).encode('latin-1')
+        )
+        await writer.drain()
+    
+    # 停止服务器
+    def shutdown(self) -> None:
+        '''停止服务器'''
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
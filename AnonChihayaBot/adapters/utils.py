@@ -4,13 +4,19 @@
 # -*- coding: utf-8 -*-
 # !/usr/bin/python3
 import os
+import sys
 import json
+import atexit
 import inspect
 import threading
 import traceback
-from time import sleep
+from time import sleep, monotonic
+from queue import SimpleQueue, Empty
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Callable, Optional, Literal, TypeVar, Union, overload, Any
+from typing import Callable, Awaitable, Iterator, Hashable, Optional, Literal, TypeVar, TextIO, Union, overload, Any
 
 from .bot import Bot as BaseBot
 from .event import Event as BaseEvent
@@ -22,8 +28,8 @@ LOG_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 Bot = TypeVar('Bot', bound=BaseBot)
 Event = TypeVar('Event', bound=BaseEvent)
 
-# 插件功能函数类型
-FunctionLike = Callable[[Bot, Event], None]
+# 插件功能函数类型，可以为同步函数或 `async def` 函数
+FunctionLike = Callable[[Bot, Event], Union[None, Awaitable[None]]]
 # 插件装饰器函数类型
 Decorater = Callable[[FunctionLike], FunctionLike]
 # 定时任务函数类型
@@ -150,10 +156,490 @@ class MyJson:
             # 释放线程锁
             lock.release()
 
+# 读写锁类
+class RWLock:
+    '''读写锁类，允许多个读者同时持有，写者独占
+
+    存在等待中的写者时，新的读者会等待写者完成，避免写者饥饿。
+    '''
+    # 初始化
+    def __init__(self) -> None:
+        '''读写锁类'''
+        self._condition = threading.Condition(threading.Lock())
+        '''内部条件变量'''
+        self._readers: int = 0
+        '''正在读取的读者数'''
+        self._writing: bool = False
+        '''是否有写者正在写入'''
+        self._waiting_writers: int = 0
+        '''正在等待的写者数'''
+    
+    # 获取读锁
+    def acquire_read(self) -> None:
+        '''获取读锁'''
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+    
+    # 释放读锁
+    def release_read(self) -> None:
+        '''释放读锁'''
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+    
+    # 获取写锁
+    def acquire_write(self) -> None:
+        '''获取写锁'''
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+    
+    # 释放写锁
+    def release_write(self) -> None:
+        '''释放写锁'''
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+    
+    # 以读者身份进入
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        '''以读者身份进入，用于 `with` 语句'''
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+    
+    # 以写者身份进入
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        '''以写者身份进入，用于 `with` 语句'''
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+# 带过期时间的 LRU 缓存类
+class TTLCache:
+    '''带过期时间的 LRU 缓存类，线程安全
+
+    条目在写入 `ttl` 秒后过期，条目数超过 `maxsize` 时淘汰最久未使用的条目。
+    `ttl` 或 `maxsize` 不大于 0 时不缓存任何内容。
+
+    参数:
+        maxsize (int, optional): 最大条目数
+        ttl (float, optional): 条目过期时间，单位为秒
+    '''
+    # 初始化
+    def __init__(self, maxsize: int=1024, ttl: float=60) -> None:
+        '''带过期时间的 LRU 缓存类
+
+        参数:
+            maxsize (int, optional): 最大条目数
+            ttl (float, optional): 条目过期时间，单位为秒
+        '''
+        self.maxsize: int = maxsize
+        '''最大条目数'''
+        self.ttl: float = ttl
+        '''条目过期时间'''
+        self.hits: int = 0
+        '''命中次数'''
+        self.misses: int = 0
+        '''未命中次数'''
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        '''缓存内容，值为过期时间与缓存值'''
+        self._lock = threading.Lock()
+        '''缓存锁'''
+    
+    # 缓存是否启用
+    @property
+    def enabled(self) -> bool:
+        '''缓存是否启用'''
+        return self.maxsize > 0 and self.ttl > 0
+    
+    # 获取缓存值
+    def get(self, key: Hashable) -> Optional[Any]:
+        '''获取缓存值，不存在或已过期时返回 `None`
+
+        参数:
+            key (Hashable): 缓存键
+
+        返回:
+            Optional[Any]: 缓存值
+        '''
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._data.get(key, None)
+            if item is None or item[0] <= monotonic():
+                if item is not None: # 移除已过期的条目
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+    
+    # 写入缓存值
+    def set(self, key: Hashable, value: Any) -> None:
+        '''写入缓存值
+
+        参数:
+            key (Hashable): 缓存键
+            value (Any): 缓存值
+        '''
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    # 移除缓存值
+    def pop(self, key: Hashable) -> None:
+        '''移除缓存值
+
+        参数:
+            key (Hashable): 缓存键
+        '''
+        with self._lock:
+            self._data.pop(key, None)
+    
+    # 移除满足条件的缓存值
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        '''移除所有键满足条件的缓存值
+
+        参数:
+            predicate (Callable[[Hashable], bool]): 判断缓存键是否需要移除的函数
+
+        返回:
+            int: 移除的条目数
+        '''
+        with self._lock:
+            keys = [key for key in self._data.keys() if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+    
+    # 清空缓存
+    def clear(self) -> None:
+        '''清空缓存'''
+        with self._lock:
+            self._data.clear()
+    
+    # 获取缓存统计信息
+    def stats(self) -> dict[str, int]:
+        '''获取缓存统计信息
+
+        返回:
+            dict[str, int]: 统计信息
+        '''
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+# 相同请求合并类
+class SingleFlight:
+    '''相同请求合并类，线程安全
+
+    同一时间内以相同的键调用 `do` 时，只有第一个调用者会真正执行函数，
+    其余调用者等待并共享其结果或异常。
+    '''
+    # 初始化
+    def __init__(self) -> None:
+        '''相同请求合并类'''
+        self.calls: int = 0
+        '''实际执行的次数'''
+        self.shared: int = 0
+        '''共享结果的次数'''
+        self._flights: dict[Hashable, Future[Any]] = {}
+        '''正在执行中的调用'''
+        self._lock = threading.Lock()
+        '''调用表锁'''
+    
+    # 执行或等待相同的调用
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        '''执行函数，若相同键的调用正在执行中则等待并共享其结果
+
+        参数:
+            key (Hashable): 调用键
+            function (Callable[[], Any]): 需要执行的函数
+
+        返回:
+            Any: 函数返回值
+        '''
+        with self._lock:
+            flight = self._flights.get(key, None)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = Future()
+                self.calls += 1
+            else: # 已有相同的调用正在执行
+                self.shared += 1
+        if not leader:
+            return flight.result()
+        try:
+            result = function()
+        except BaseException as exception:
+            self._finish(key)
+            flight.set_exception(exception)
+            raise
+        self._finish(key)
+        flight.set_result(result)
+        return result
+    
+    # 结束调用
+    def _finish(self, key: Hashable) -> None:
+        '''结束调用，之后相同键的调用将重新执行'''
+        with self._lock:
+            self._flights.pop(key, None)
+    
+    # 获取统计信息
+    def stats(self) -> dict[str, int]:
+        '''获取统计信息
+
+        返回:
+            dict[str, int]: 统计信息
+        '''
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'shared': self.shared,
+                'in_flight': len(self._flights)
+            }
+
+# 熔断器类
+class CircuitBreaker:
+    '''熔断器类，线程安全
+
+    连续失败 `threshold` 次后进入熔断状态，此时所有请求直接被拒绝；
+    经过 `reset_timeout` 秒后允许一个试探请求通过，成功则恢复，失败则重新熔断。
+    `threshold` 不大于 0 时不进行熔断。
+
+    参数:
+        threshold (int, optional): 进入熔断状态的连续失败次数
+        reset_timeout (float, optional): 熔断持续时间，单位为秒
+    '''
+    # 初始化
+    def __init__(self, threshold: int=5, reset_timeout: float=30) -> None:
+        '''熔断器类
+
+        参数:
+            threshold (int, optional): 进入熔断状态的连续失败次数
+            reset_timeout (float, optional): 熔断持续时间，单位为秒
+        '''
+        self.threshold: int = threshold
+        '''进入熔断状态的连续失败次数'''
+        self.reset_timeout: float = reset_timeout
+        '''熔断持续时间'''
+        self.state: Literal['closed', 'open', 'half-open'] = 'closed'
+        '''熔断器状态'''
+        self.failures: int = 0
+        '''当前连续失败次数'''
+        self.opened: int = 0
+        '''累计熔断次数'''
+        self.rejected: int = 0
+        '''熔断期间被拒绝的请求数'''
+        self._opened_at: float = 0
+        '''进入熔断状态的时间'''
+        self._lock = threading.Lock()
+        '''状态锁'''
+    
+    # 判断是否允许请求通过
+    def allow(self) -> bool:
+        '''判断是否允许请求通过
+
+        返回:
+            bool: 是否允许请求通过
+        '''
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half-open' # 只允许一个试探请求通过
+                return True
+            self.rejected += 1
+            return False
+    
+    # 记录请求成功
+    def record_success(self) -> None:
+        '''记录请求成功'''
+        with self._lock:
+            self.failures = 0
+            self.state = 'closed'
+    
+    # 记录请求失败
+    def record_failure(self) -> bool:
+        '''记录请求失败
+
+        返回:
+            bool: 本次失败是否使熔断器进入熔断状态
+        '''
+        with self._lock:
+            self.failures += 1
+            if self.threshold <= 0 or self.state == 'open':
+                return False
+            if self.state == 'half-open' or self.failures >= self.threshold:
+                self.state = 'open'
+                self._opened_at = monotonic()
+                self.opened += 1
+                return True
+            return False
+    
+    # 获取熔断器统计信息
+    def stats(self) -> dict[str, Any]:
+        '''获取熔断器统计信息
+
+        返回:
+            dict[str, Any]: 统计信息
+        '''
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'opened': self.opened,
+                'rejected': self.rejected
+            }
+
 # 日志记录类
 class Logging:
-    '''日志记录类'''
-    lock = threading.Lock() # 创建线程锁对象
+    '''日志记录类
+
+    调用方只将日志记录放入队列，由单独的写入线程批量取出，
+    写入保持打开、按日期切换的日志文件。
+    '''
+    _queue: 'SimpleQueue[Optional[tuple[datetime, str, str, Union[str, BaseException]]]]' = SimpleQueue()
+    '''日志记录队列'''
+    _writer: Optional[threading.Thread] = None
+    '''日志写入线程'''
+    _lock = threading.Lock()
+    '''写入线程启动锁'''
+    _batch_size: int = 256
+    '''单次批量写入的最大记录数'''
+    
+    # 获取调用模块名称
+    @staticmethod
+    def _get_name(depth: int=2) -> str:
+        '''获取调用模块名称
+
+        参数:
+            depth (int, optional): 调用栈深度，默认为调用日志方法的模块
+
+        返回:
+            str: 模块名称的末两级
+        '''
+        try:
+            name: str = sys._getframe(depth).f_globals.get('__name__', '')
+        except ValueError: # 调用栈深度不足
+            return ''
+        return '.'.join(name.split('.')[-2:])
+    
+    # 将日志记录放入队列
+    @classmethod
+    def _put(cls, level: str, name: str, info: Union[str, BaseException]) -> None:
+        '''将日志记录放入队列
+
+        参数:
+            level (str): 日志等级
+            name (str): 调用模块名称
+            info (Union[str, BaseException]): 日志内容或错误信息
+        '''
+        if cls._writer is None:
+            cls._start()
+        cls._queue.put((datetime.now(), level, name, info))
+    
+    # 启动写入线程
+    @classmethod
+    def _start(cls) -> None:
+        '''启动写入线程'''
+        with cls._lock:
+            if cls._writer is not None:
+                return
+            cls._writer = threading.Thread(target=cls._write_loop, name='log-writer', daemon=True)
+            cls._writer.start()
+            atexit.register(cls.stop)
+    
+    # 格式化日志记录
+    @staticmethod
+    def _format(record: tuple[datetime, str, str, Union[str, BaseException]]) -> str:
+        '''格式化日志记录'''
+        time, level, name, info = record
+        if isinstance(info, BaseException): # 获取错误追踪信息
+            info = '\n' + ''.join(traceback.format_exception(
+                type(info),
+                info,
+                info.__traceback__
+            ))
+        return '[{time}] {level} in {name}: {info}\n'.format(
+            time = time.strftime('%Y-%m-%d %H:%M:%S,%f')[:-3],
+            level = level,
+            name = name,
+            info = info
+        )
+    
+    # 写入线程循环
+    @classmethod
+    def _write_loop(cls) -> None:
+        '''写入线程循环'''
+        log_file: Optional[TextIO] = None
+        log_date = ''
+        running = True
+        while running:
+            records = [cls._queue.get()]
+            # 批量取出队列中已有的记录
+            while len(records) < cls._batch_size:
+                try:
+                    records.append(cls._queue.get_nowait())
+                except Empty:
+                    break
+            for record in records:
+                if record is None: # 收到停止标识
+                    running = False
+                    continue
+                # 按日期切换日志文件
+                date_now = record[0].strftime('%Y-%m-%d')
+                try:
+                    if log_file is None or date_now != log_date:
+                        if log_file is not None:
+                            log_file.close()
+                        os.makedirs(LOG_DIR + '/log', exist_ok=True)
+                        log_file = open(LOG_DIR + f'/log/{date_now}.log', 'a+', encoding='utf-8')
+                        log_date = date_now
+                    log_file.write(cls._format(record))
+                except Exception as exception:
+                    print(f'日志写入失败: {type(exception).__name__}: {exception}')
+            if log_file is not None:
+                log_file.flush()
+        if log_file is not None:
+            log_file.close()
+    
+    # 停止写入线程
+    @classmethod
+    def stop(cls, timeout: float=5) -> None:
+        '''写入队列中剩余的日志记录并停止写入线程
+
+        参数:
+            timeout (float, optional): 等待写入完成的最长时间 (秒)
+        '''
+        with cls._lock:
+            writer = cls._writer
+            cls._writer = None
+        if writer is None:
+            return
+        cls._queue.put(None)
+        writer.join(timeout)
     
     # 输出日志记录方法
     @classmethod
@@ -163,33 +649,7 @@ class Logging:
         参数:
             info (str): 记录的日志内容
         '''
-        # 获取当前日期
-        now = datetime.now()
-        date_now = now.strftime('%Y-%m-%d')
-        # 获取引用模块名称
-        module = inspect.getmodule(inspect.stack()[1][0])
-        if not module is None:
-            name = '.'.join(module.__name__.split('.')[-2:])
-        else:
-            name = ''
-        
-        # 拼接完整日志内容
-        log_message = '[{time}] INFO in {name}: {info}\n'.format(
-            time = now.strftime('%Y-%m-%d %H:%M:%S,%f')[:-3],
-            name = name,
-            info = info
-        )
-        
-        # 获取线程锁
-        cls.lock.acquire()
-        # 检测日志路径是否存在
-        if not os.path.exists(LOG_DIR + '/log'):
-            os.mkdir(LOG_DIR + '/log')
-        # 创建并写入日志文件
-        with open(LOG_DIR + f'/log/{date_now}.log', 'a+', encoding='utf-8') as log_file:
-            log_file.write(log_message)
-        # 释放线程锁
-        cls.lock.release()
+        cls._put('INFO', cls._get_name(), info)
     
     # 警告日志记录方法
     @classmethod
@@ -199,33 +659,7 @@ class Logging:
         参数:
             info (str): 记录的日志内容
         '''
-        # 获取当前日期
-        now = datetime.now()
-        date_now = now.strftime('%Y-%m-%d')
-        # 获取引用模块名称
-        module = inspect.getmodule(inspect.stack()[1][0])
-        if not module is None:
-            name = '.'.join(module.__name__.split('.')[-2:])
-        else:
-            name = ''
-        
-        # 拼接完整日志内容
-        log_message = '[{time}] WARNING in {name}: {info}\n'.format(
-            time = now.strftime('%Y-%m-%d %H:%M:%S,%f')[:-3],
-            name = name,
-            info = info
-        )
-        
-        # 获取线程锁
-        cls.lock.acquire()
-        # 检测日志路径是否存在
-        if not os.path.exists(LOG_DIR + '/log'):
-            os.mkdir(LOG_DIR + '/log')
-        # 创建并写入日志文件
-        with open(LOG_DIR + f'/log/{date_now}.log', 'a+', encoding='utf-8') as log_file:
-            log_file.write(log_message)
-        # 释放线程锁
-        cls.lock.release()
+        cls._put('WARNING', cls._get_name(), info)
     
     # 错误信息日志记录方法
     @classmethod
@@ -235,39 +669,7 @@ class Logging:
         参数:
             exception (Exception): 记录的错误信息
         '''
-        # 获取当前日期
-        now = datetime.now()
-        date_now = now.strftime('%Y-%m-%d')
-        # 获取引用模块名称
-        module = inspect.getmodule(inspect.stack()[1][0])
-        if not module is None:
-            name = '.'.join(module.__name__.split('.')[-2:])
-        else:
-            name = ''
-            
-        # 获取错误追踪信息
-        error = '\n' + ''.join(traceback.format_exception(
-            type(exception),
-            exception,
-            exception.__traceback__
-            ))
-        # 拼接完整日志内容
-        log_message = '[{time}] ERROR in {name}: {error}\n'.format(
-            time = now.strftime('%Y-%m-%d %H:%M:%S,%f')[:-3],
-            name = name,
-            error = error
-            )
-        
-        # 获取线程锁
-        cls.lock.acquire()
-        # 检测日志路径是否存在
-        if not os.path.exists(LOG_DIR + '/log'):
-            os.mkdir(LOG_DIR + '/log')
-        # 创建并写入日志文件
-        with open(LOG_DIR + f'/log/{date_now}.log', 'a+', encoding='utf-8') as log_file:
-            log_file.write(log_message)
-        # 释放线程锁
-        cls.lock.release()
+        cls._put('ERROR', cls._get_name(), exception)
 
 # 功能信息类
 class Function():
@@ -279,7 +681,9 @@ class Function():
         name: str,
         desc: str,
         help_doc: str,
-        function: FunctionLike
+        function: FunctionLike,
+        command: str='',
+        to_me: bool=False
     ) -> None:
         '''功能信息类
 
@@ -288,6 +692,8 @@ class Function():
             name (str): 功能名
             desc (str): 功能简介
             function (Function): 功能函数
+            command (str, optional): 指令过滤
+            to_me (bool, optional): 是否只在机器人被提及时启用
         '''
         self.inner_name: str = inner_name
         '''函数名'''
@@ -299,6 +705,10 @@ class Function():
         '''功能帮助'''
         self.function: FunctionLike = function
         '''功能函数'''
+        self.command: str = command
+        '''指令过滤'''
+        self.to_me: bool = to_me
+        '''是否只在机器人被提及时启用'''
 
 # 定时任务类
 class Schedule():
@@ -366,58 +776,75 @@ def plugin_register(
             function.__doc__ if function.__doc__ is not None
             else f'[{outer_name}]'
         )
-        # 定义内部函数，用于代替被装饰的函数被引用
-        def inner_function(bot: Bot, event: Event) -> None:
-            '''定义内部函数，用于代替被装饰的函数被引用'''
+        # 检查事件是否需要交由功能函数处理
+        def check_event(event: Event) -> tuple[bool, Optional[str]]:
+            '''检查事件是否需要交由功能函数处理
+
+            参数:
+                event (Event): 事件对象
+
+            返回:
+                tuple[bool, Optional[str]]: 是否运行功能函数，以及需要回复的帮助信息
+            '''
             # 尝试获取事件消息以判断是否为消息事件
             try:
                 message = event.get_message()
-            except NotImplementedError: # 表明现在不是消息事件
-                if not to_me and command == '': # 没有过滤指定
-                    try:
-                        function(bot, event)
-                    except Exception as exception:
-                        Logging.error(exception)
-                        print(f'[{function_name}] 运行出错: {type(exception).__name__}: {exception}')
-                    return None
-                else:
-                    return None
+            except (NotImplementedError, ValueError): # 表明现在不是消息事件
+                return not to_me and command == '', None # 没有过滤指定时运行
             # 判断事件消息内容
             if message[0].is_text() and message[0].data['text'].startswith('/help '): # 如果是帮助
                 if (
                     message[0].data['text'][6:] == outer_name
                     or message[0].data['text'][6:] == function.__name__
                 ): # 如果是当前功能名
-                    help_reply = f'[{outer_name}]\n{help_doc}'
-                    try:
-                        bot.send(event, help_reply)
-                    except Exception as exception:
-                        Logging.error(exception)
-                        print(f'发送帮助消息时出错: {type(exception).__name__}: {exception}')
-                return None
+                    return False, f'[{outer_name}]\n{help_doc}'
+                return False, None
             if to_me: # 如果要求提及机器人
-                if event.is_tome(): # 如果提及机器人
+                return event.is_tome(), None
+            if command != '': # 如果有指令过滤
+                if message[0].is_text() and message[0].data['text'].startswith(command):
+                    message[0].data['text'] = message[0].data['text'][len(command):].strip()
+                    return True, None
+                return False, None
+            return True, None
+        
+        # 定义内部函数，用于代替被装饰的函数被引用
+        if inspect.iscoroutinefunction(function): # 异步功能函数
+            async def inner_function(bot: Bot, event: Event) -> None:
+                '''定义内部函数，用于代替被装饰的函数被引用'''
+                run, help_reply = check_event(event)
+                if help_reply is not None:
                     try:
-                        function(bot, event)
+                        await bot.asend(event, help_reply)
                     except Exception as exception:
                         Logging.error(exception)
-                        print(f'[{function_name}] 运行出错: {type(exception).__name__}: {exception}')
+                        print(f'发送帮助消息时出错: {type(exception).__name__}: {exception}')
+                if not run:
+                    return None
+                try:
+                    await function(bot, event)
+                except Exception as exception:
+                    Logging.error(exception)
+                    print(f'[{function_name}] 运行出错: {type(exception).__name__}: {exception}')
                 return None
-            if command != '': # 如果有指令过滤
-                if message[0].is_text() and message[0].data['text'].startswith(command):
-                    message[0].data['text'] = message[0].data['text'][len(command):].strip()
+        else:
+            def inner_function(bot: Bot, event: Event) -> None:
+                '''定义内部函数，用于代替被装饰的函数被引用'''
+                run, help_reply = check_event(event)
+                if help_reply is not None:
                     try:
-                        function(bot, event)
+                        bot.send(event, help_reply)
                     except Exception as exception:
                         Logging.error(exception)
-                        print(f'[{function_name}] 运行出错: {type(exception).__name__}: {exception}')
+                        print(f'发送帮助消息时出错: {type(exception).__name__}: {exception}')
+                if not run:
+                    return None
+                try:
+                    function(bot, event)
+                except Exception as exception:
+                    Logging.error(exception)
+                    print(f'[{function_name}] 运行出错: {type(exception).__name__}: {exception}')
                 return None
-            try:
-                function(bot, event)
-            except Exception as exception:
-                Logging.error(exception)
-                print(f'[{function_name}] 运行出错: {type(exception).__name__}: {exception}')
-            return None
         # 将被装饰的函数名和函数对象添加到列表中
         function_list.append(
             Function(
@@ -425,7 +852,9 @@ def plugin_register(
                 outer_name,
                 desc if desc is not None else outer_name,
                 help_doc,
-                inner_function
+                inner_function,
+                command,
+                to_me
             )
         )
         return inner_function
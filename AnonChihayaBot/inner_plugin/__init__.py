@@ -3,7 +3,7 @@
 '''
 # -*- coding: utf-8 -*-
 # !/usr/bin/python3
-from typing import TypeVar
+from typing import TypeVar, Any
 
 from AnonChihayaBot._plugin import plugins
 from AnonChihayaBot.adapters import Bot as BaseBot
@@ -75,14 +75,14 @@ def admin_process(bot: Bot, event: Event) -> None:
                 if message[0].is_text(): # 如果是字符串
                     if (user_id := message.extract_plain_text()).isdigit(): # 如果是数字表示用户 ID
                         # 删除指定用户的管理员
-                        reply = Admin.add(user_id)
+                        reply = Admin.remove(user_id)
                         bot.send(event, reply)
                         return
                 elif message[0].type == 'at': # 如果是提及某用户
                     user_id = message[0].data['id']
                     if isinstance(user_id, str) and user_id.isdigit(): # 是合法 ID
-                        # 添加指定用户为管理员
-                        reply = Admin.add(user_id)
+                        # 删除指定用户的管理员
+                        reply = Admin.remove(user_id)
                         bot.send(event, reply)
                         return
 
@@ -316,27 +316,69 @@ def event_filter(bot: Bot, event: Event) -> bool:
     返回:
         bool: 是否被过滤
     '''
-    # 获取屏蔽信息
-    ban_info = Ban._get_info()
     # 判断平台
     try:
         platform = event.get_platform()
-        if platform in ban_info.platform:
+        if Ban.is_target_banned('platform', platform):
             return False
     except Exception as exception:
         print(f'获取平台时出错：{type(exception).__name__}: {exception}')
     # 判断群组
     try:
         guild = event.get_guild_id()
-        if guild in ban_info.guild:
+        if Ban.is_target_banned('guild', guild):
             return False
     except Exception as exception:
         print(f'获取群组时出错：{type(exception).__name__}: {exception}')
     # 判断用户
     try:
         user = event.get_user_id()
-        if user in ban_info.user:
+        if Ban.is_target_banned('user', user):
             return False
     except Exception as exception:
         print(f'获取用户时出错：{type(exception).__name__}: {exception}')
     return True
+
+# 原始事件数据过滤器
+def payload_filter(host_id: str, body: dict[str, Any]) -> bool:
+    '''原始事件数据过滤器，在构建事件对象前根据屏蔽信息判断是否丢弃事件
+
+    与 `event_filter` 不同，来自主人与管理员的消息事件总会被保留，以便进行 Admin 或 Ban 操作。
+
+    参数:
+        host_id (str): 主人账号
+        body (dict[str, Any]): 原始事件数据
+
+    返回:
+        bool: 是否被过滤
+    '''
+    type_: str = body.get('type', '')
+    if type_.startswith('login-'): # 登录事件总是保留
+        return True
+    user: dict[str, Any] = body.get('user') or {}
+    user_id = user.get('id', None)
+    if (
+        type_.startswith('message-')
+        and user_id is not None
+        and (user_id == host_id or Admin.is_admin(user_id))
+    ): # 主人与管理员的消息
+        return True
+    # 判断平台
+    if (platform := body.get('platform', None)) is not None:
+        if Ban.is_target_banned('platform', platform):
+            return False
+    # 判断群组，与事件对象的 get_guild_id 保持一致
+    if type_.startswith('message-'):
+        guild: dict[str, Any] = body.get('channel') or {}
+    elif type_.startswith('guild-'):
+        guild = body.get('guild') or {}
+    else:
+        guild = {}
+    if (guild_id := guild.get('id', None)) is not None:
+        if Ban.is_target_banned('guild', guild_id):
+            return False
+    # 判断用户
+    if user_id is not None and (type_.startswith(('message-', 'friend-', 'guild-member-'))):
+        if Ban.is_target_banned('user', user_id):
+            return False
+    return True
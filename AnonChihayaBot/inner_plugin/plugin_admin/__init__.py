@@ -1,23 +1,48 @@
 '''机器人管理员管理'''
 import os
-from typing import Literal
+import threading
+from time import monotonic
+from typing import Optional
 
 from AnonChihayaBot.utils import Json
 
 # 获取管理员存储文件路径
 ADMIN_DIR = os.path.dirname(__file__) + '/admin.json'
+# 检查管理员存储文件是否被修改的最短间隔，单位为秒
+CHECK_INTERVAL = 1.0
+
+# 获取管理员存储文件修改时间
+def _get_mtime() -> int:
+    '''获取管理员存储文件修改时间，文件不存在时返回 0'''
+    try:
+        return os.stat(ADMIN_DIR).st_mtime_ns
+    except OSError:
+        return 0
 
 # 管理员操作类
 class Admin:
-    '''管理员操作类'''
-    in_use: bool = False
-    '''正在处理中'''
+    '''管理员操作类
+
+    管理员列表以 `frozenset` 缓存在内存中，在添加、删除管理员或文件被修改后才会重新读取。
+    文件修改时间每 `CHECK_INTERVAL` 秒最多检查一次，手动修改文件后最多延迟该时间生效。
+    '''
+    _lock = threading.Lock()
+    '''管理员列表修改锁'''
+    _cache: Optional[frozenset[str]] = None
+    '''管理员集合缓存'''
+    _mtime: int = 0
+    '''缓存对应的文件修改时间'''
+    _checked: float = 0.0
+    '''上次检查文件修改时间的时刻'''
     # 获取管理员列表
     @classmethod
     def _get_list(cls) -> list[str]:
         '''获取管理员列表'''
         # 获取管理员列表信息
-        admin_list = Json.read_to_list(ADMIN_DIR)
+        try:
+            admin_list = Json.read_to_list(ADMIN_DIR)
+        except ValueError: # 文件为空或内容不合法
+            admin_list = []
         return admin_list
     
     # 保存管理员列表
@@ -28,6 +53,22 @@ class Admin:
         Json.write(ADMIN_DIR, admin_list)
         return
     
+    # 获取管理员集合
+    @classmethod
+    def _get_set(cls) -> frozenset[str]:
+        '''获取管理员集合，缓存失效时重新读取文件'''
+        cache = cls._cache
+        if cache is not None and monotonic() - cls._checked < CHECK_INTERVAL:
+            return cache
+        with cls._lock:
+            mtime = _get_mtime()
+            cls._checked = monotonic()
+            if cls._cache is None or mtime != cls._mtime:
+                # 先取得修改时间再读取，读取期间文件被修改时下次检查会重新读取
+                cls._cache = frozenset(cls._get_list())
+                cls._mtime = mtime
+            return cls._cache
+    
     # 检测是否为管理员
     @classmethod
     def is_admin(cls, user_id: str) -> bool:
@@ -39,13 +80,7 @@ class Admin:
         返回:
             bool: 判断结果
         '''
-        # 检测是否正在被使用
-        while cls.in_use: continue
-        cls.in_use = True
-        # 获取管理员列表
-        admin_list = cls._get_list()
-        cls.in_use = False
-        return user_id in admin_list
+        return user_id in cls._get_set()
     
     # 添加管理员
     @classmethod
@@ -61,18 +96,18 @@ class Admin:
         # 判断是否已是管理员
         if cls.is_admin(user_id):
             return f'<!> 用户 {user_id} 已经是管理员了。'
-        else:
-            # 添加管理员并保存
-            cls.in_use = True
+        # 添加管理员并保存
+        with cls._lock:
             admin_list = cls._get_list()
-            admin_list.append(user_id)
+            if user_id not in admin_list:
+                admin_list.append(user_id)
             try:
                 cls._save_list(admin_list)
                 return f'<√> 已将用户 {user_id} 设置为管理员。'
             except Exception as exception:
                 return f'<×> 设置 {user_id} 为管理员时出错：\n{type(exception).__name__}: {exception}'
             finally:
-                cls.in_use = False
+                cls._cache = None
     
     # 删除管理员
     @classmethod
@@ -88,15 +123,15 @@ class Admin:
         # 判断是否已是管理员
         if not cls.is_admin(user_id):
             return f'<!> 用户 {user_id} 不是管理员。'
-        else:
-            # 删除管理员并保存
-            cls.in_use = True
+        # 删除管理员并保存
+        with cls._lock:
             admin_list = cls._get_list()
-            admin_list.remove(user_id)
+            if user_id in admin_list:
+                admin_list.remove(user_id)
             try:
                 cls._save_list(admin_list)
                 return f'<√> 已将用户 {user_id} 管理员权限移除。'
             except Exception as exception:
                 return f'<×> 移除 {user_id} 管理权限时出错：\n{type(exception).__name__}: {exception}'
             finally:
-                cls.in_use = False
+                cls._cache = None
@@ -4,6 +4,7 @@ from typing import Literal
 from pydantic import BaseModel
 
 from AnonChihayaBot.utils import Json
+from AnonChihayaBot.adapters.utils import RWLock
 from AnonChihayaBot._plugin import find_plugin, find_function
 
 # 获取屏蔽词条存储文件路径
@@ -25,23 +26,81 @@ class BanInfo(BaseModel):
 
 # 屏蔽管理类
 class BanManager():
-    '''屏蔽管理类'''
-    in_use: bool = False
-    '''正在处理中'''
+    '''屏蔽管理类
+
+    屏蔽信息在首次使用时从文件读入内存，之后的判断只查询内存中的集合，
+    只有在屏蔽信息发生变化时才会写回文件。判断操作之间可以并行，修改操作独占。
+    '''
+    _lock: RWLock = RWLock()
+    '''屏蔽信息读写锁'''
+    _loaded: bool = False
+    '''屏蔽信息是否已读入内存'''
+    _platform: set[str] = set()
+    '''平台屏蔽项'''
+    _user: set[str] = set()
+    '''用户屏蔽项'''
+    _guild: set[str] = set()
+    '''群组屏蔽项'''
+    _plugin: dict[str, set[str]] = {}
+    '''各群组插件屏蔽项'''
+    _function: dict[str, set[str]] = {}
+    '''各群组功能屏蔽项'''
+    # 从文件读入屏蔽信息
+    @classmethod
+    def _load(cls) -> None:
+        '''从文件读入屏蔽信息，只在首次使用时读取'''
+        if cls._loaded:
+            return
+        with cls._lock.write():
+            if cls._loaded: # 已由其他线程读入
+                return
+            ban_info = BanInfo.model_validate(Json.read_to_dict(BAN_DIR))
+            cls._platform = set(ban_info.platform)
+            cls._user = set(ban_info.user)
+            cls._guild = set(ban_info.guild)
+            cls._plugin = {guild: set(plugins) for guild, plugins in ban_info.plugin.items()}
+            cls._function = {guild: set(functions) for guild, functions in ban_info.function.items()}
+            cls._loaded = True
+    
     # 获取屏蔽信息
     @classmethod
     def _get_info(cls) -> BanInfo:
-        '''获取屏蔽信息'''
-        return BanInfo.model_validate(Json.read_to_dict(BAN_DIR))
+        '''获取屏蔽信息快照'''
+        cls._load()
+        with cls._lock.read():
+            return cls._snapshot()
+    
+    # 生成屏蔽信息快照
+    @classmethod
+    def _snapshot(cls) -> BanInfo:
+        '''生成屏蔽信息快照，调用时需持有读锁或写锁'''
+        return BanInfo(
+            platform=sorted(cls._platform),
+            user=sorted(cls._user),
+            guild=sorted(cls._guild),
+            plugin={guild: sorted(plugins) for guild, plugins in cls._plugin.items() if plugins},
+            function={guild: sorted(functions) for guild, functions in cls._function.items() if functions}
+        )
     
     # 保存屏蔽信息
     @classmethod
-    def _save_info(cls, info: BanInfo) -> None:
-        '''保存屏蔽信息'''
-        # 保存屏蔽信息
-        Json.write(BAN_DIR, info.model_dump())
+    def _save_info(cls) -> None:
+        '''将内存中的屏蔽信息写入文件，调用时需持有写锁'''
+        Json.write(BAN_DIR, cls._snapshot().model_dump())
         return
     
+    # 获取对象种类对应的屏蔽集合
+    @classmethod
+    def _target_set(cls, type_: Literal['platform', 'guild', 'user']) -> set[str]:
+        '''获取对象种类对应的屏蔽集合'''
+        if type_ == 'platform':
+            return cls._platform
+        elif type_ == 'user':
+            return cls._user
+        elif type_ == 'guild':
+            return cls._guild
+        raise ValueError(f'未知的屏蔽对象种类：{type_}')
+    
     # 判断插件是否被屏蔽
     @classmethod
     def is_plugin_banned(cls, guild: str, plugin: str) -> bool:
@@ -54,21 +113,10 @@ class BanManager():
         返回:
             bool: 是否被屏蔽
         '''
-        # 检查是否正在被使用
-        while cls.in_use: continue
-        cls.in_use = True
-        # 获取屏蔽信息
-        ban_info = cls._get_info()
-        cls.in_use = False
-        # 判断是否有对应群组插件屏蔽信息
-        if not guild in ban_info.plugin.keys():
-            return False
-        else:
-            # 判断是否在对应群组被屏蔽
-            if plugin in ban_info.plugin[guild]:
-                return True
-            else:
-                return False
+        cls._load()
+        with cls._lock.read():
+            plugins = cls._plugin.get(guild)
+            return plugins is not None and plugin in plugins
     
     # 判断功能是否被屏蔽
     @classmethod
@@ -82,21 +130,10 @@ class BanManager():
         返回:
             bool: 是否被屏蔽
         '''
-        # 检查是否正在被使用
-        while cls.in_use: continue
-        cls.in_use = True
-        # 获取屏蔽信息
-        ban_info = cls._get_info()
-        cls.in_use = False
-        # 判断是否有对应群组插件屏蔽信息
-        if not guild in ban_info.function.keys():
-            return False
-        else:
-            # 判断是否在对应群组被屏蔽
-            if function in ban_info.function[guild]:
-                return True
-            else:
-                return False
+        cls._load()
+        with cls._lock.read():
+            functions = cls._function.get(guild)
+            return functions is not None and function in functions
     
     # 判断对象是否被屏蔽
     @classmethod
@@ -114,19 +151,33 @@ class BanManager():
         返回:
             bool: 是否被屏蔽
         '''
-        # 检查是否正在被使用
-        while cls.in_use: continue
-        cls.in_use = True
-        # 获取屏蔽信息
-        ban_info = cls._get_info()
-        cls.in_use = False
-        # 根据 type_ 分类判断
-        if type_ == 'platform': # 平台
-            return target in ban_info.platform
-        elif type_ == 'user': # 用户
-            return target in ban_info.user
-        elif type_ == 'guild': # 群组
-            return target in ban_info.guild
+        cls._load()
+        with cls._lock.read():
+            return target in cls._target_set(type_)
+    
+    # 向群组屏蔽项中添加或移除条目并保存
+    @classmethod
+    def _update_guild_items(
+        cls,
+        items: dict[str, set[str]],
+        guild: str,
+        name: str,
+        add: bool
+    ) -> None:
+        '''向群组屏蔽项中添加或移除条目并保存，保存失败时撤销修改'''
+        with cls._lock.write():
+            if add:
+                items.setdefault(guild, set()).add(name)
+            else:
+                items.get(guild, set()).discard(name)
+            try:
+                cls._save_info()
+            except Exception:
+                if add:
+                    items[guild].discard(name)
+                else:
+                    items.setdefault(guild, set()).add(name)
+                raise
     
     # 屏蔽指定插件或功能
     @classmethod
@@ -145,44 +196,24 @@ class BanManager():
             # 判断插件是否已被屏蔽
             if cls.is_plugin_banned(guild, plugin.package_name):
                 return f'<!> 插件 {plugin.name} 已在该群被屏蔽。'
-            # 检查是否正被使用
-            while cls.in_use: continue
-            cls.in_use = True
-            # 获取屏蔽信息
-            ban_info = cls._get_info()
-            if ban_info.plugin.get(guild) is None:
-                ban_info.plugin[guild] = []
-            ban_info.plugin[guild].append(plugin.package_name)
-            # 尝试保存屏蔽信息
+            # 尝试屏蔽并保存屏蔽信息
             try:
-                cls._save_info(ban_info)
+                cls._update_guild_items(cls._plugin, guild, plugin.package_name, True)
                 return f'<√> 插件 {plugin.name} 已被屏蔽。'
             except Exception as exception:
                 return f'<×> 插件 {plugin.name} 屏蔽失败：\n{type(exception).__name__}: {exception}'
-            finally:
-                cls.in_use = False
         except ValueError: # 尝试查找对应功能
             try:
                 function = find_function(name)
                 # 判断功能是否已被屏蔽
                 if cls.is_function_banned(guild, function.inner_name):
                     return f'<!> 功能 {function.name} 已在该群被屏蔽。'
-                # 检查是否正被使用
-                while cls.in_use: continue
-                cls.in_use = True
-                # 获取屏蔽信息
-                ban_info = cls._get_info()
-                if ban_info.function.get(guild) is None:
-                    ban_info.function[guild] = []
-                ban_info.function[guild].append(function.inner_name)
-                # 尝试保存屏蔽信息
+                # 尝试屏蔽并保存屏蔽信息
                 try:
-                    cls._save_info(ban_info)
+                    cls._update_guild_items(cls._function, guild, function.inner_name, True)
                     return f'<√> 功能 {function.name} 已被屏蔽。'
                 except Exception as exception:
                     return f'<×> 功能 {function.name} 屏蔽失败：\n{type(exception).__name__}: {exception}'
-                finally:
-                    cls.in_use = False
             except ValueError:
                 return f'<×> 插件或功能 {name} 未找到。'
         except Exception as exception:
@@ -205,40 +236,24 @@ class BanManager():
             # 判断插件是否已被屏蔽
             if not cls.is_plugin_banned(guild, plugin.package_name):
                 return f'<!> 插件 {plugin.name} 未在该群被屏蔽。'
-            # 检查是否正被使用
-            while cls.in_use: continue
-            cls.in_use = True
-            # 获取屏蔽信息
-            ban_info = cls._get_info()
-            ban_info.plugin[guild].remove(plugin.package_name)
-            # 尝试保存屏蔽信息
+            # 尝试解除屏蔽并保存屏蔽信息
             try:
-                cls._save_info(ban_info)
+                cls._update_guild_items(cls._plugin, guild, plugin.package_name, False)
                 return f'<√> 已解除插件 {plugin.name} 的屏蔽。'
             except Exception as exception:
                 return f'<×> 插件 {plugin.name} 屏蔽解除失败：\n{type(exception).__name__}: {exception}'
-            finally:
-                cls.in_use = False
         except ValueError: # 尝试查找对应的功能
             try:
                 function = find_function(name)
                 # 判断功能是否已被屏蔽
                 if not cls.is_function_banned(guild, function.inner_name):
                     return f'<!> 功能 {function.name} 未在该群被屏蔽。'
-                # 检查是否正被使用
-                while cls.in_use: continue
-                cls.in_use = True
-                # 获取屏蔽信息
-                ban_info = cls._get_info()
-                ban_info.function[guild].remove(function.inner_name)
-                # 尝试保存屏蔽信息
+                # 尝试解除屏蔽并保存屏蔽信息
                 try:
-                    cls._save_info(ban_info)
+                    cls._update_guild_items(cls._function, guild, function.inner_name, False)
                     return f'<√> 已解除功能 {function.name} 的屏蔽。'
                 except Exception as exception:
                     return f'<×> 功能 {function.name} 屏蔽解除失败：\n{type(exception).__name__}: {exception}'
-                finally:
-                    cls.in_use = False
             except ValueError:
                 return f'<×> 插件或功能 {name} 未找到。'
         except Exception as exception:
@@ -265,30 +280,18 @@ class BanManager():
         # 判断是否已被屏蔽
         if cls.is_target_banned(type_, target):
             return f'<×> {type_name} {target} 已经被屏蔽。'
-        # 检查是否正被使用
-        while cls.in_use: continue
-        cls.in_use = True
-        # 获取屏蔽信息
-        ban_info = cls._get_info()
-        # 根据 type_ 分类操作
-        if type_ == 'platform':
-            ban_info.platform.append(target)
-        elif type_ == 'user':
-            if not target.isdigit():
-                return f'<×> {target} 不是一个合法的{type_name}。'
-            ban_info.user.append(target)
-        elif type_ == 'guild':
-            if not target.isdigit():
-                return f'<×> {target} 不是一个合法的{type_name}。'
-            ban_info.guild.append(target)
-        # 尝试保存屏蔽信息
-        try:
-            cls._save_info(ban_info)
-            return f'<√> {type_name} {target} 已屏蔽。'
-        except Exception as exception:
-            return f'<×> 屏蔽{type_name} {target} 时出现错误：\n{type(exception).__name__}: {exception}'
-        finally:
-            cls.in_use = False
+        if type_ in ('user', 'guild') and not target.isdigit():
+            return f'<×> {target} 不是一个合法的{type_name}。'
+        with cls._lock.write():
+            targets = cls._target_set(type_)
+            targets.add(target)
+            # 尝试保存屏蔽信息
+            try:
+                cls._save_info()
+                return f'<√> {type_name} {target} 已屏蔽。'
+            except Exception as exception:
+                targets.discard(target)
+                return f'<×> 屏蔽{type_name} {target} 时出现错误：\n{type(exception).__name__}: {exception}'
     
     # 解除指定对象屏蔽
     @classmethod
@@ -311,27 +314,13 @@ class BanManager():
         # 判断是否已被屏蔽
         if not cls.is_target_banned(type_, target):
             return f'<×> {type_name} {target} 未被屏蔽。'
-        # 检查是否正被使用
-        while cls.in_use: continue
-        cls.in_use = True
-        # 获取屏蔽信息
-        ban_info = cls._get_info()
-        # 根据 type_ 分类操作
-        if type_ == 'platform':
-            ban_info.platform.remove(target)
-        elif type_ == 'user':
-            if not target.isdigit():
-                return f'<×> {target} 不是一个合法的{type_name}。'
-            ban_info.user.remove(target)
-        elif type_ == 'guild':
-            if not target.isdigit():
-                return f'<×> {target} 不是一个合法的{type_name}。'
-            ban_info.guild.remove(target)
-        # 尝试保存屏蔽信息
-        try:
-            cls._save_info(ban_info)
-            return f'<√> 已解除{type_name} {target} 的屏蔽。'
-        except Exception as exception:
-            return f'<×> 解除{type_name} {target} 的屏蔽时出现错误：\n{type(exception).__name__}: {exception}'
-        finally:
-            cls.in_use = False
+        with cls._lock.write():
+            targets = cls._target_set(type_)
+            targets.discard(target)
+            # 尝试保存屏蔽信息
+            try:
+                cls._save_info()
+                return f'<√> 已解除{type_name} {target} 的屏蔽。'
+            except Exception as exception:
+                targets.add(target)
+                return f'<×> 解除{type_name} {target} 的屏蔽时出现错误：\n{type(exception).__name__}: {exception}'
@@ -7,11 +7,11 @@ flask_app = Flask(__name__)
 
 @flask_app.route("/", methods=["POST"])
 def main() -> str:
-    payload = request.get_json()
+    payload = request.get_data()
     app.handle(payload)
     return '200'
 
 if __name__ == '__main__':
-    app = AnonChihayaBot.run(serve='WebHook')
+    app = AnonChihayaBot.run(serve='WebHook', builtin_server=False)
     flask_app.run(host='0.0.0.0', port=8800)
     app.stop()
\ No newline at end of file
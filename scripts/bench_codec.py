@@ -0,0 +1,87 @@
+'''JSON 编解码器基准测试
+
+在 Satori 事件信令与 API 请求体上对比标准库 `json` 与 `codec` 模块（安装 orjson 时使用 orjson）的编解码速度。
+解码一列对比原先先将 `bytes` 解码为 `str` 再 `json.loads` 的写法与 `codec.loads` 直接处理 `bytes`；
+编码一列对比原先 `json.dumps` 后再编码为 `bytes` 的写法与 `codec.dumps`。
+
+用法:
+    python scripts/bench_codec.py [--count 20000]
+'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AnonChihayaBot.adapters import codec
+
+# 测试用数据
+def make_samples() -> dict[str, Any]:
+    '''生成测试用的信令与请求体'''
+    user = {'id': '40000', 'name': '用户', 'avatar': 'https://example.com/u.png'}
+    event = {
+        'id': 1,
+        'type': 'message-created',
+        'platform': 'qq',
+        'self_id': '10000',
+        'timestamp': 1700000000000,
+        'channel': {'id': '20000', 'type': 0, 'name': '频道'},
+        'guild': {'id': '30000', 'name': '群组', 'avatar': 'https://example.com/g.png'},
+        'user': user,
+        'member': {'nick': '群昵称', 'joined_at': 1600000000000},
+        'message': {'id': 'm1', 'content': '你好 <at id="10000"/> 今天天气不错'}
+    }
+    return {
+        '消息事件信令': {'op': 0, 'body': event},
+        '长消息事件信令': {'op': 0, 'body': {**event, 'message': {'id': 'm2', 'content': '<b>长消息</b> ' * 500}}},
+        '心跳信令': {'op': 1},
+        '发送消息请求体': {'channel_id': '20000', 'content': '<quote id="m1"/>收到 <at id="40000"/>'},
+        '成员列表响应': {'data': [{'user': {**user, 'id': str(index)}, 'nick': f'成员{index}'} for index in range(100)], 'next': 'n'}
+    }
+
+# 标准库解码
+def json_loads(data: bytes) -> Any:
+    return json.loads(data.decode('utf-8'))
+
+# 标准库编码
+def json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+# 计时
+def measure(function: Callable[[Any], Any], argument: Any, count: int) -> float:
+    '''返回单次调用的平均耗时，单位为微秒'''
+    start = time.perf_counter()
+    for _ in range(count):
+        function(argument)
+    return (time.perf_counter() - start) / count * 1e6
+
+# 主函数
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000, help='每项重复次数')
+    args = parser.parse_args()
+    print(f'codec 后端: {codec.BACKEND}')
+    print(
+        f'{"数据":<12} {"字节":>7} {"json 解码(us)":>14} {"codec 解码(us)":>15} {"加速":>7} '
+        f'{"json 编码(us)":>14} {"codec 编码(us)":>15} {"加速":>7}'
+    )
+    for name, sample in make_samples().items():
+        data = codec.dumps(sample)
+        if codec.loads(data) != json_loads(data):
+            raise AssertionError(f'{name}: 解码结果不一致')
+        loads_json = measure(json_loads, data, args.count)
+        loads_codec = measure(codec.loads, data, args.count)
+        dumps_json = measure(json_dumps, sample, args.count)
+        dumps_codec = measure(codec.dumps, sample, args.count)
+        print(
+            f'{name:<12} {len(data):>7} {loads_json:>14.2f} {loads_codec:>15.2f} {loads_json / loads_codec:>6.1f}x '
+            f'{dumps_json:>14.2f} {dumps_codec:>15.2f} {dumps_json / dumps_codec:>6.1f}x'
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+'''Satori 事件解码基准测试
+
+对比原先的两次验证路径（`json.loads` 后验证为 `EventSignaling`，再 `model_dump` 并验证为具体事件类）
+与当前的单次验证路径（`codec.loads` 后直接由 `payload_to_event` 验证为具体事件类），
+统计每秒可解码的事件数。长消息的耗时主要来自 `Message` 验证时对消息元素的解析，两条路径相同。
+
+用法:
+    python scripts/bench_event_decode.py [--count 20000]
+'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AnonChihayaBot.adapters import codec
+from AnonChihayaBot.adapters.Satori.adapter import Adapter
+from AnonChihayaBot.adapters.Satori.event import Event, EVENT_CLASSES
+from AnonChihayaBot.adapters.Satori.models import EventSignaling
+
+# 测试用信令
+def make_payloads() -> dict[str, dict[str, Any]]:
+    '''生成测试用信令'''
+    base = {
+        'id': 1,
+        'platform': 'qq',
+        'self_id': '10000',
+        'timestamp': 1700000000000,
+        'channel': {'id': '20000', 'type': 0, 'name': '频道'},
+        'guild': {'id': '30000', 'name': '群组', 'avatar': 'https://example.com/g.png'},
+        'user': {'id': '40000', 'name': '用户', 'avatar': 'https://example.com/u.png'},
+        'member': {'nick': '群昵称', 'joined_at': 1600000000000}
+    }
+    return {
+        '短消息': {'op': 0, 'body': {
+            **base, 'type': 'message-created',
+            'message': {'id': 'm1', 'content': '你好 <at id="10000"/>'}
+        }},
+        '长消息': {'op': 0, 'body': {
+            **base, 'type': 'message-created',
+            'message': {'id': 'm2', 'content': '<b>长消息</b> ' * 500}
+        }},
+        '群组成员增加': {'op': 0, 'body': {**base, 'type': 'guild-member-added'}},
+        '好友申请': {'op': 0, 'body': {
+            'id': 2, 'type': 'friend-request', 'platform': 'qq', 'self_id': '10000',
+            'timestamp': 1700000000000, 'user': base['user']
+        }}
+    }
+
+# 原先的解码路径
+def legacy_decode(frame: bytes) -> Event:
+    '''原先的解码路径，信令被验证两次并导出一次'''
+    payload = json.loads(frame.decode('utf-8'))
+    signaling = EventSignaling.model_validate(payload)
+    EventClass = EVENT_CLASSES.get(signaling.body.type, None)
+    if EventClass is None:
+        return Event.model_validate(signaling.body)
+    return EventClass.model_validate(signaling.body.model_dump())
+
+# 当前的解码路径
+def current_decode(frame: bytes) -> Event:
+    '''当前的解码路径，直接对 `body` 验证一次'''
+    payload = codec.loads(frame)
+    return Adapter.payload_to_event(payload['body'])
+
+# 计时
+def measure(function: Callable[[bytes], Event], frame: bytes, count: int) -> float:
+    '''返回每秒解码的事件数'''
+    start = time.perf_counter()
+    for _ in range(count):
+        function(frame)
+    return count / (time.perf_counter() - start)
+
+# 主函数
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000, help='每种事件解码次数')
+    args = parser.parse_args()
+    print(f'JSON 编解码器: {"orjson" if codec.orjson is not None else "json"}')
+    print(f'{"事件":<10} {"原路径(个/秒)":>14} {"新路径(个/秒)":>14} {"加速":>8}')
+    for name, payload in make_payloads().items():
+        frame = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        legacy_event = legacy_decode(frame)
+        current_event = current_decode(frame)
+        if type(legacy_event) is not type(current_event) or legacy_event.model_dump() != current_event.model_dump():
+            raise AssertionError(f'{name}: 新旧解码结果不一致')
+        # 长消息验证时会解析消息元素，减少次数以免耗时过长
+        count = args.count if len(frame) < 4096 else max(50, args.count // 100)
+        legacy = measure(legacy_decode, frame, count)
+        current = measure(current_decode, frame, count)
+        print(f'{name:<10} {legacy:>14.0f} {current:>14.0f} {current / legacy:>7.2f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+'''Satori 消息元素解析器基准测试
+
+对比原先逐段截取字符串的解析器与当前按位置扫描的解析器，
+输入包括短消息、不同长度的长消息与不同嵌套深度的合并转发消息，
+并在计时前检查两者解析出的 `Element` 树完全一致。
+`parse_nodes` 一列为不经过 `pydantic` 验证的内部解析耗时，按字符平均后应基本不随长度增长。
+
+第二张表使用 `tracemalloc` 统计解析与构建 `Satori.Message` 模型时的内存分配峰值，
+对比原解析器、生成 `Element` 的 `parse` 与 `Message.content` 现在使用的 `parse_nodes`。
+最后输出进程的最大常驻内存 (RSS) 作为参考。
+
+用法:
+    python scripts/bench_parser.py [--repeat 5]
+'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import os
+import re
+import sys
+import time
+import argparse
+import tracemalloc
+from typing import Callable, Optional, Union, Any
+
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AnonChihayaBot.adapters.Satori.models import Message as SatoriMessage
+from AnonChihayaBot.adapters.Satori.utils import Element, unescape, parse, parse_nodes
+
+# 原先的消息标签类
+class LegacyToken(BaseModel):
+    '''原先的消息标签类'''
+    type: str
+    close: str
+    empty: str
+    attrs: dict[str, Any]
+    source: str
+
+# 原先的字符串解析函数
+def legacy_parse(src: str) -> list[Element]:
+    '''原先的字符串解析函数，每次调用编译正则并在每个标签后截取源字符串'''
+    tag_pat = re.compile(r'<!--[\s\S]*?-->|<(/?)([^!\s>/]*)([^>]*?)\s*(/?)>')
+    attr_pat = re.compile(r'([^\s=]+)(?:=\"([^\"]*)\"|=\'([^\']*)\')?', re.S)
+    tokens: list[Union[LegacyToken, Element]] = []
+    def parse_n_push(source: str) -> None:
+        text = unescape(source)
+        if text:
+            tokens.append(Element(type='text', attrs={'text': text}))
+    while tag_map := tag_pat.search(src):
+        parse_n_push(src[:tag_map.start()])
+        src = src[tag_map.end():]
+        if tag_map.group(0).startswith('<!--'):
+            continue
+        close, tag, attr_str, empty = tag_map.groups()
+        token = LegacyToken(
+            type=tag or 'template',
+            close=close,
+            empty=empty,
+            attrs={},
+            source=tag_map.group(0)
+        )
+        while attr_map := attr_pat.search(attr_str):
+            key, value1, value2 = attr_map.groups()
+            value = value1 or value2
+            if value:
+                token.attrs[key] = unescape(value)
+            elif key.startswith('no-'):
+                token.attrs[key] = False
+            else:
+                token.attrs[key] = True
+            attr_str = attr_str[attr_map.end():]
+        tokens.append(token)
+    parse_n_push(src)
+    stack = [Element(type='template')]
+    def rollback(count: int) -> None:
+        while count:
+            child = stack.pop(0)
+            source = stack[0].children.pop(-1)
+            stack[0].children.append(Element(type='text', attrs={'text': source}))
+            stack[0].children.extend(child.children)
+            count -= 1
+    for token in tokens:
+        if isinstance(token, Element):
+            stack[0].children.append(token)
+        elif token.close:
+            index = 0
+            while index < len(stack) and stack[index].type != token.type:
+                index += 1
+            if index == len(stack):
+                stack[0].children.append(Element(type='text', attrs={'text': token.source}))
+            else:
+                rollback(index)
+                element = stack.pop(0)
+                element.source = None
+        else:
+            element = Element(type=token.type, attrs=token.attrs)
+            stack[0].children.append(element)
+            if not token.empty:
+                element.source = token.source
+                stack.insert(0, element)
+    rollback(len(stack) - 1)
+    return stack[0].children
+
+# 短消息
+def small_message() -> str:
+    return '<at id="10001"/> 你好 &amp; 欢迎 <img src="https://example.com/a.png" cache/>'
+
+# 长消息
+def large_message(segments: int) -> str:
+    parts = []
+    for index in range(segments):
+        parts.append(f'第 {index} 段 &lt;文本&gt; <at id="{index}" name="用户{index}"/>')
+        if index % 10 == 0:
+            parts.append(f'<b>加粗<i>斜体 {index}</i></b>')
+    return ''.join(parts)
+
+# 嵌套合并转发消息
+def forward_message(depth: int) -> str:
+    content = '<message><author id="1" name="a"/>最内层消息</message>'
+    for index in range(depth):
+        content = (
+            f'<message forward><message><author id="{index}" name="u{index}"/>第 {index} 层</message>'
+            f'{content}</message>'
+        )
+    return content
+
+# 计时
+def measure(function: Callable[[str], list[Element]], source: str, repeat: int) -> float:
+    '''返回多次运行中的最短耗时'''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# 统计内存分配峰值
+def peak_memory(function: Callable[[], Any]) -> int:
+    '''返回运行期间的内存分配峰值，单位为字节，结果在统计期间保持存活'''
+    function() # 预热，排除首次调用时的缓存分配
+    tracemalloc.start()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+# 获取进程的最大常驻内存
+def max_rss() -> Optional[int]:
+    '''返回进程的最大常驻内存，单位为 KiB，不支持的平台返回 `None`'''
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+# 主函数
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='每项重复次数，取最短耗时')
+    args = parser.parse_args()
+    cases: list[tuple[str, str]] = [('短消息', small_message())]
+    cases += [(f'长消息 {count} 段', large_message(count)) for count in (250, 1000, 4000, 16000)]
+    cases += [(f'转发嵌套 {depth} 层', forward_message(depth)) for depth in (10, 50, 100, 200)]
+    print(
+        f'{"输入":<16} {"长度":>9} {"原解析器(ms)":>14} {"新解析器(ms)":>14} {"加速":>8} '
+        f'{"新 ns/字符":>12} {"parse_nodes ns/字符":>20}'
+    )
+    for name, source in cases:
+        expected = [element.model_dump() for element in legacy_parse(source)]
+        actual = [element.model_dump() for element in parse(source)]
+        if expected != actual:
+            raise AssertionError(f'{name}: 新旧解析器结果不一致')
+        # 短消息单次耗时过短，重复解析以便计时
+        times = 1000 if len(source) < 1000 else 1
+        legacy = measure(lambda src: [legacy_parse(src) for _ in range(times)], source, args.repeat) / times
+        current = measure(lambda src: [parse(src) for _ in range(times)], source, args.repeat) / times
+        nodes = measure(lambda src: [parse_nodes(src) for _ in range(times)], source, args.repeat) / times
+        print(
+            f'{name:<16} {len(source):>9} {legacy * 1000:>14.3f} {current * 1000:>14.3f} '
+            f'{legacy / current:>7.1f}x {current * 1e9 / len(source):>12.1f} {nodes * 1e9 / len(source):>20.1f}'
+        )
+    # 内存分配峰值
+    print()
+    print(
+        f'{"输入":<16} {"原解析器(KiB)":>14} {"parse(KiB)":>12} {"parse_nodes(KiB)":>17} '
+        f'{"Element 模型(KiB)":>18} {"Node 模型(KiB)":>15} {"减少":>7}'
+    )
+    for name, source in cases:
+        legacy = peak_memory(lambda: legacy_parse(source))
+        elements = peak_memory(lambda: parse(source))
+        nodes = peak_memory(lambda: parse_nodes(source))
+        # 原先 Message.content 由 parse 生成 Element，现在直接保存 Node
+        element_model = peak_memory(lambda: SatoriMessage.model_validate({'id': '1', 'content': parse(source)}))
+        node_model = peak_memory(lambda: SatoriMessage.model_validate({'id': '1', 'content': source}))
+        print(
+            f'{name:<16} {legacy / 1024:>14.1f} {elements / 1024:>12.1f} {nodes / 1024:>17.1f} '
+            f'{element_model / 1024:>18.1f} {node_model / 1024:>15.1f} '
+            f'{(1 - node_model / element_model) * 100:>6.1f}%'
+        )
+    if (rss := max_rss()) is not None:
+        print(f'\n进程最大常驻内存: {rss / 1024:.1f} MiB')
+
+if __name__ == '__main__':
+    main()
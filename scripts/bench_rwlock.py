@@ -0,0 +1,133 @@
+'''屏蔽信息读写锁基准测试
+
+多个线程同时调用 `BanManager.is_plugin_banned`，统计不同线程数下的吞吐量，
+并对比写者持锁期间，等待中的线程使用读写锁与原先的忙等自旋锁各消耗多少 CPU 时间。
+
+用法:
+    python scripts/bench_rwlock.py [--calls 20000] [--threads 1,2,4,8,16]
+'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import AnonChihayaBot.inner_plugin.plugin_ban_manager as ban_manager
+from AnonChihayaBot.inner_plugin.plugin_ban_manager import BanManager
+
+# 原先的忙等自旋锁
+class SpinLock:
+    '''原先 `while in_use: continue` 写法的自旋锁'''
+    def __init__(self) -> None:
+        self.in_use: bool = False
+    
+    def acquire(self) -> None:
+        while self.in_use: continue
+        self.in_use = True
+    
+    def release(self) -> None:
+        self.in_use = False
+
+# 在多个线程中同时运行
+def run_threads(count: int, target: Callable[[], None]) -> float:
+    '''在多个线程中同时运行并返回耗时'''
+    barrier = threading.Barrier(count + 1)
+    def worker() -> None:
+        barrier.wait()
+        target()
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+# 读取吞吐量
+def bench_read(threads: list[int], calls: int, writer: bool) -> None:
+    '''统计不同线程数下 `is_plugin_banned` 的吞吐量'''
+    title = '读取吞吐量（后台写者每 1ms 修改一次）' if writer else '读取吞吐量'
+    print(f'\n== {title} ==')
+    print(f'{"线程数":>6} {"总调用":>10} {"耗时(s)":>9} {"次/秒":>12}')
+    def read() -> None:
+        for index in range(calls):
+            BanManager.is_plugin_banned(str(index % 64), 'plugin_echo')
+    for count in threads:
+        stop = threading.Event()
+        def write() -> None:
+            add = True
+            while not stop.is_set():
+                BanManager._update_guild_items(BanManager._plugin, '0', 'plugin_echo', add)
+                add = not add
+                time.sleep(0.001)
+        writer_thread = threading.Thread(target=write) if writer else None
+        if writer_thread is not None:
+            writer_thread.start()
+        elapsed = run_threads(count, read)
+        stop.set()
+        if writer_thread is not None:
+            writer_thread.join()
+        total = count * calls
+        print(f'{count:>6} {total:>10} {elapsed:>9.3f} {total / elapsed:>12.0f}')
+
+# 等待期间的 CPU 消耗
+def bench_waiting(waiters: int, hold: float) -> None:
+    '''写者持锁期间等待线程消耗的 CPU 时间'''
+    print(f'\n== 写者持锁 {hold}s 期间 {waiters} 个线程等待的 CPU 时间 ==')
+    # 读写锁
+    rwlock = BanManager._lock
+    rwlock.acquire_write()
+    def rw_wait() -> None:
+        with rwlock.read():
+            pass
+    threads = [threading.Thread(target=rw_wait) for _ in range(waiters)]
+    cpu = time.process_time()
+    for thread in threads:
+        thread.start()
+    time.sleep(hold)
+    rwlock.release_write()
+    for thread in threads:
+        thread.join()
+    print(f'读写锁: {time.process_time() - cpu:.3f}s')
+    # 自旋锁
+    spin = SpinLock()
+    spin.acquire()
+    def spin_wait() -> None:
+        spin.acquire()
+        spin.release()
+    threads = [threading.Thread(target=spin_wait) for _ in range(waiters)]
+    cpu = time.process_time()
+    for thread in threads:
+        thread.start()
+    time.sleep(hold)
+    spin.release()
+    for thread in threads:
+        thread.join()
+    print(f'自旋锁: {time.process_time() - cpu:.3f}s')
+
+# 主函数
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=20000, help='每个线程的调用次数')
+    parser.add_argument('--threads', default='1,2,4,8,16', help='线程数列表，以逗号分隔')
+    parser.add_argument('--hold', type=float, default=0.5, help='写者持锁时间，单位为秒')
+    args = parser.parse_args()
+    threads = [int(count) for count in args.threads.split(',')]
+    # 屏蔽信息写入临时文件，不修改仓库中的屏蔽配置
+    with tempfile.TemporaryDirectory() as directory:
+        ban_manager.BAN_DIR = os.path.join(directory, 'ban_info.json')
+        with open(ban_manager.BAN_DIR, 'w', encoding='utf-8') as file:
+            file.write('{}')
+        bench_read(threads, args.calls, False)
+        bench_read(threads, args.calls, True)
+        bench_waiting(max(threads), args.hold)
+
+if __name__ == '__main__':
+    main()
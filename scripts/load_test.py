@@ -0,0 +1,140 @@
+'''内置 WebHook 服务器压力测试
+
+使用多个 HTTP/1.1 长连接持续推送事件信令，统计持续的每秒请求数与响应延迟。
+未指定 `--url` 时在本进程内启动 `WebHookServer`，请求体经 `codec.loads_batch` 解码后即响应，
+此时客户端与服务器共用同一进程，结果偏保守；指定 `--url` 时向已运行的机器人发送请求。
+
+用法:
+    python scripts/load_test.py [--connections 32] [--duration 10] [--batch 1]
+    python scripts/load_test.py --url http://127.0.0.1:8800/ --self-id 10000 --platform qq
+'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import os
+import sys
+import time
+import asyncio
+import argparse
+from typing import Optional
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AnonChihayaBot.adapters import codec
+from AnonChihayaBot.adapters.config import ServerConfig
+from AnonChihayaBot.adapters.server import WebHookServer
+
+# 生成请求体
+def make_body(batch: int, self_id: str, platform: str) -> bytes:
+    '''生成包含 `batch` 条消息事件信令的请求体'''
+    signaling = {
+        'op': 0,
+        'body': {
+            'id': 1,
+            'type': 'message-created',
+            'platform': platform,
+            'self_id': self_id,
+            'timestamp': 1700000000000,
+            'channel': {'id': '20000', 'type': 0},
+            'guild': {'id': '30000'},
+            'user': {'id': '40000', 'name': '压测用户'},
+            'message': {'id': 'm1', 'content': '压力测试消息'}
+        }
+    }
+    if batch <= 1:
+        return codec.dumps(signaling)
+    return codec.dumps([signaling] * batch)
+
+# 单个连接的请求循环
+async def client(
+    host: str,
+    port: int,
+    request: bytes,
+    deadline: float,
+    latencies: list[float],
+    statuses: dict[int, int]
+) -> None:
+    '''在一个长连接上持续发送请求直到截止时间'''
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            status = int(head.split(b' ', 2)[1])
+            # 跳过响应体
+            for line in head.split(b'\r\n'):
+                if line.lower().startswith(b'content-length:') and (length := int(line.split(b':', 1)[1])):
+                    await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            if b'connection: close' in head.lower():
+                break
+    finally:
+        writer.close()
+
+# 运行压力测试
+async def run(host: str, port: int, path: str, args: argparse.Namespace) -> None:
+    '''运行压力测试并输出结果'''
+    body = make_body(args.batch, args.self_id, args.platform)
+    request = (
+        f'POST {path} HTTP/1.1\r\n'
+        f'Host: {host}:{port}\r\n'
+        'Content-Type: application/json\r\n'
+        f'X-Self-ID: {args.self_id}\r\n'
+        f'X-Platform: {args.platform}\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        '\r\n'
+    ).encode('latin-1') + body
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        client(host, port, request, deadline, latencies, statuses) for _ in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    # 获取延迟百分位数
+    def percentile(value: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * value))] * 1000 if latencies else 0.0
+    print(f'连接数: {args.connections}  持续时间: {elapsed:.1f}s  每请求信令数: {args.batch}')
+    print(f'请求数: {len(latencies)}  每秒请求数: {len(latencies) / elapsed:.0f}  每秒信令数: {len(latencies) * args.batch / elapsed:.0f}')
+    print(f'延迟 (ms): p50 {percentile(0.5):.2f}  p90 {percentile(0.9):.2f}  p99 {percentile(0.99):.2f}  max {percentile(1.0):.2f}')
+    print(f'响应状态码: {dict(sorted(statuses.items()))}')
+
+# 主函数
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='目标服务器地址，不指定时在本进程内启动服务器')
+    parser.add_argument('--connections', type=int, default=32, help='并发长连接数')
+    parser.add_argument('--duration', type=float, default=10.0, help='持续时间，单位为秒')
+    parser.add_argument('--batch', type=int, default=1, help='每个请求包含的信令数')
+    parser.add_argument('--self-id', default='10000', help='信令与请求头中的机器人 ID')
+    parser.add_argument('--platform', default='qq', help='信令与请求头中的平台名称')
+    args = parser.parse_args()
+    server: Optional[WebHookServer] = None
+    if args.url is None:
+        received = [0]
+        # 解码请求体后立即响应
+        def handler(body: bytes, headers: dict[str, str]) -> int:
+            items, errors = codec.loads_batch(body)
+            received[0] += len(items)
+            return 400 if errors else 200
+        server = WebHookServer(ServerConfig(host='127.0.0.1', port=0), handler)
+        server.start()
+        assert server._server is not None
+        host, port, path = '127.0.0.1', server._server.sockets[0].getsockname()[1], '/'
+    else:
+        url = urlsplit(args.url)
+        host, port, path = url.hostname or '127.0.0.1', url.port or 80, url.path or '/'
+    try:
+        asyncio.run(run(host, port, path, args))
+    finally:
+        if server is not None:
+            server.shutdown()
+            print(f'服务器统计: {server.stats()}')
+
+if __name__ == '__main__':
+    main()
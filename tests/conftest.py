@@ -0,0 +1,63 @@
+'''测试公共配置'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import os
+import sys
+
+# 将仓库根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import Callable, Iterator, Any
+
+import pytest
+
+import AnonChihayaBot.adapters.utils as utils
+from AnonChihayaBot.adapters.Satori.config import Config
+from AnonChihayaBot.adapters.Satori.adapter import Adapter
+from AnonChihayaBot.adapters.Satori.event import MessageEvent
+
+# 创建测试用 Satori 适配器
+@pytest.fixture
+def make_adapter() -> Iterator[Callable[..., Adapter]]:
+    adapters: list[Adapter] = []
+    def make(**update: Any) -> Adapter:
+        config = Config.from_yaml('WebSocket')[0].model_copy(
+            update={'token': 'tk', 'ignore_platforms': ['ignored'], 'subscribe_events': [], **update}
+        )
+        adapter = Adapter(config)
+        adapters.append(adapter)
+        return adapter
+    yield make
+    for adapter in adapters:
+        adapter.close()
+
+# 可控的时钟
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+# 替换工具模块使用的时钟
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(utils, 'monotonic', clock)
+    return clock
+
+# 创建消息事件
+def message_event(user_id: str, content: str) -> MessageEvent:
+    event = Adapter.payload_to_event({
+        'id': 1,
+        'type': 'message-created',
+        'platform': 'test',
+        'self_id': '10000',
+        'timestamp': 0,
+        'channel': {'id': 'c1', 'type': 0},
+        'guild': {'id': 'g1'},
+        'user': {'id': user_id},
+        'message': {'id': 'm1', 'content': content}
+    })
+    assert isinstance(event, MessageEvent)
+    return event
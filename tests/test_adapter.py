@@ -0,0 +1,122 @@
+'''Satori 适配器测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import json
+import httpx
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Any
+
+import pytest
+
+import AnonChihayaBot.adapters.Satori.adapter as adapter_module
+from AnonChihayaBot.adapters.Satori.bot import Bot
+from AnonChihayaBot.adapters.Satori.adapter import Adapter
+
+# 创建事件信令
+def event_payload(id_: int, self_id: str='10000', content: str='你好') -> dict[str, Any]:
+    return {
+        'op': 0,
+        'body': {
+            'id': id_,
+            'type': 'message-created',
+            'platform': 'test',
+            'self_id': self_id,
+            'timestamp': 0,
+            'channel': {'id': 'c1', 'type': 0},
+            'user': {'id': '1'},
+            'message': {'id': 'm1', 'content': content}
+        }
+    }
+
+# 记录交由分发器的事件
+def record_submit(adapter: Adapter, monkeypatch: pytest.MonkeyPatch, accept: bool=True) -> list[Any]:
+    submitted: list[Any] = []
+    def submit(function: Callable[..., Any], *args: Any) -> bool:
+        if accept:
+            submitted.append(args[-1])
+        return accept
+    monkeypatch.setattr(adapter.dispatcher, 'submit', submit)
+    return submitted
+
+# WebSocket 与 WebHook 使用同一处理逻辑，只有 WebHook 会验证未知的机器人
+def test_websocket_and_webhook_share_handling(
+    make_adapter: Callable[..., Adapter],
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    adapter = make_adapter()
+    submitted = record_submit(adapter, monkeypatch)
+    adapter.bots['10000'] = Bot(adapter, '10000', 'test', adapter.config)
+    assert adapter._handle_payload(event_payload(1))
+    assert adapter._handle_signaling(event_payload(2))
+    assert [event.id for event in submitted] == [1, 2]
+    # 未知的机器人
+    verified: list[str] = []
+    def verify(adapter: Adapter, self_id: str, platform: str, config: Any) -> Bot:
+        verified.append(self_id)
+        return Bot(adapter, self_id, platform, config)
+    monkeypatch.setattr(Bot, 'verify', staticmethod(verify))
+    assert adapter._handle_payload(event_payload(3, '20000'))
+    assert verified == []
+    assert adapter._handle_signaling(event_payload(4, '20000'))
+    assert verified == ['20000']
+    assert [event.id for event in submitted] == [1, 2, 4]
+    # 不合法的信令
+    assert not adapter._handle_signaling({'op': 9})
+    assert not adapter._handle_signaling('not a payload')
+
+# 被分发器拒绝的事件不会推进检查点，恢复会话后重发的事件只处理未处理过的
+def test_rejected_event_does_not_advance_checkpoint(
+    make_adapter: Callable[..., Adapter],
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path
+) -> None:
+    monkeypatch.setattr(adapter_module, 'CHECKPOINT_DIR', str(tmp_path))
+    adapter = make_adapter()
+    adapter.bots['10000'] = Bot(adapter, '10000', 'test', adapter.config)
+    submitted = record_submit(adapter, monkeypatch)
+    adapter._receive(json.dumps(event_payload(1)))
+    assert adapter.sequence == 1
+    # 分发器队列已满
+    record_submit(adapter, monkeypatch, accept=False)
+    adapter._receive(json.dumps(event_payload(2)))
+    monkeypatch.setattr(adapter.dispatcher, 'submit', lambda function, *args: submitted.append(args[-1]) or True)
+    adapter._receive(json.dumps(event_payload(3)))
+    adapter._receive(json.dumps(event_payload(3))) # 重复的事件
+    assert adapter.sequence == 1
+    adapter._save_checkpoint()
+    assert json.loads(Path(adapter.checkpoint_file).read_text(encoding='utf-8')) == {'sequence': 1}
+    # 恢复会话，服务端从检查点之后重发
+    adapter._update_sequence({'op': 4})
+    for id_ in (2, 3, 4):
+        adapter._receive(json.dumps(event_payload(id_)))
+    assert [event.id for event in submitted] == [1, 3, 2, 4]
+    assert adapter.sequence == 4
+
+# 被转发器丢弃的事件不会推进检查点
+def test_dropped_forward_does_not_advance_checkpoint(make_adapter: Callable[..., Adapter]) -> None:
+    adapter = make_adapter()
+    accepted = [True, False, True]
+    adapter.forwarder = SimpleNamespace(forward=lambda data: accepted.pop(0), shutdown=lambda: None) # type: ignore
+    for id_ in (1, 2, 3):
+        adapter._receive(json.dumps(event_payload(id_)))
+    assert adapter.sequence == 1
+
+# 重试期间熔断器打开后停止重试
+def test_retry_stops_when_breaker_opens(
+    make_adapter: Callable[..., Adapter],
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    adapter = make_adapter(retry_times=5, breaker_threshold=2)
+    bot = Bot(adapter, '10000', 'test', adapter.config)
+    calls: list[str] = []
+    def post(api: str, **kwargs: Any) -> httpx.Response:
+        calls.append(api)
+        raise httpx.ConnectError('refused')
+    adapter.http = SimpleNamespace(post=post) # type: ignore
+    monkeypatch.setattr(adapter_module, 'sleep', lambda delay: None)
+    with pytest.raises(RuntimeError):
+        adapter._post(bot, 'message.create', b'{}')
+    assert len(calls) == 2
+    assert adapter.breaker.stats()['failures'] == 2
+    assert adapter.breaker.state == 'open'
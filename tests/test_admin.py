@@ -0,0 +1,49 @@
+'''管理员缓存测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import os
+import json
+from pathlib import Path
+
+import pytest
+
+import AnonChihayaBot.inner_plugin.plugin_admin as plugin_admin
+from AnonChihayaBot.inner_plugin.plugin_admin import Admin
+
+# 使用临时管理员文件
+@pytest.fixture
+def admin_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / 'admin.json'
+    path.write_text(json.dumps(['1']), encoding='utf-8')
+    monkeypatch.setattr(plugin_admin, 'ADMIN_DIR', str(path))
+    monkeypatch.setattr(Admin, '_cache', None)
+    monkeypatch.setattr(Admin, '_mtime', 0)
+    monkeypatch.setattr(Admin, '_checked', 0.0)
+    return path
+
+# 检查间隔内不重复读取文件修改时间
+def test_stat_is_throttled(admin_file: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+    get_mtime = plugin_admin._get_mtime
+    monkeypatch.setattr(plugin_admin, '_get_mtime', lambda: calls.append(1) or get_mtime())
+    for _ in range(100):
+        assert Admin.is_admin('1')
+    assert len(calls) == 1
+
+# 检查间隔过后发现文件被修改
+def test_external_change_is_picked_up(admin_file: Path) -> None:
+    assert not Admin.is_admin('2')
+    admin_file.write_text(json.dumps(['1', '2']), encoding='utf-8')
+    os.utime(admin_file, ns=(Admin._mtime + 10**9, Admin._mtime + 10**9))
+    assert not Admin.is_admin('2') # 仍在检查间隔内
+    Admin._checked -= plugin_admin.CHECK_INTERVAL
+    assert Admin.is_admin('2')
+
+# 添加与删除管理员立即生效
+def test_add_and_remove_take_effect_immediately(admin_file: Path) -> None:
+    assert not Admin.is_admin('3')
+    assert Admin.add('3').startswith('<√>')
+    assert Admin.is_admin('3')
+    assert Admin.remove('3').startswith('<√>')
+    assert not Admin.is_admin('3')
+    assert json.loads(admin_file.read_text(encoding='utf-8')) == ['1']
@@ -0,0 +1,68 @@
+'''管理员与屏蔽指令测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import json
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Any
+
+import pytest
+
+import AnonChihayaBot._plugin as plugin
+import AnonChihayaBot.adapters.Satori.bot as bot_module
+import AnonChihayaBot.inner_plugin.plugin_admin as plugin_admin
+from AnonChihayaBot._plugin import Plugin, FunctionIndex
+from AnonChihayaBot.inner_plugin import Admin, admin_process
+from AnonChihayaBot.adapters.Satori.bot import Bot
+from AnonChihayaBot.adapters.Satori.adapter import Adapter
+
+from conftest import message_event
+
+# 使用临时管理员文件，主人为 1，管理员为 2
+@pytest.fixture(autouse=True)
+def admin_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / 'admin.json'
+    path.write_text(json.dumps(['2']), encoding='utf-8')
+    monkeypatch.setattr(plugin_admin, 'ADMIN_DIR', str(path))
+    monkeypatch.setattr(Admin, '_cache', None)
+    monkeypatch.setattr(Admin, '_mtime', 0)
+    monkeypatch.setattr(Admin, '_checked', 0.0)
+    return path
+
+# 创建测试用机器人，发送的消息记录在 replies 中
+@pytest.fixture
+def bot(make_adapter: Callable[..., Adapter], monkeypatch: pytest.MonkeyPatch) -> Bot:
+    adapter = make_adapter(host_id='1')
+    instance = Bot(adapter, '10000', 'test', adapter.config)
+    replies: list[str] = []
+    monkeypatch.setattr(instance, 'send', lambda event, message: replies.append(str(message)))
+    instance.replies = replies # type: ignore
+    # 避免加载插件目录
+    monkeypatch.setattr(plugin, 'plugins', [Plugin('test', '', 'test', ModuleType('test'))])
+    monkeypatch.setattr(plugin, 'function_index', FunctionIndex.build([]))
+    return instance
+
+# /deadmin 删除管理员而不是添加管理员
+def test_deadmin_removes_admin(bot: Bot, admin_file: Path) -> None:
+    admin_process(bot, message_event('1', '/deadmin 2'))
+    assert not Admin.is_admin('2')
+    assert json.loads(admin_file.read_text(encoding='utf-8')) == []
+
+# /deadmin 不会将非管理员添加为管理员
+def test_deadmin_does_not_grant_admin(bot: Bot) -> None:
+    admin_process(bot, message_event('1', '/deadmin 3'))
+    assert not Admin.is_admin('3')
+
+# 只有主人与管理员可以使用 /ban 与 /unban
+@pytest.mark.parametrize('user_id, allowed', [('1', True), ('2', True), ('3', False)])
+def test_ban_requires_host_or_admin(
+    bot: Bot,
+    monkeypatch: pytest.MonkeyPatch,
+    user_id: str,
+    allowed: bool
+) -> None:
+    calls: list[Any] = []
+    monkeypatch.setattr(bot_module, 'ban_process', lambda bot, event: calls.append(event))
+    bot.handle_event(message_event(user_id, '/ban user 4'))
+    bot.handle_event(message_event(user_id, '/unban user 4'))
+    assert len(calls) == (2 if allowed else 0)
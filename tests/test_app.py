@@ -0,0 +1,49 @@
+'''WebHook 推送分发测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import json
+from typing import Callable, Any
+
+import pytest
+
+from AnonChihayaBot import AnonChihayaBot
+from AnonChihayaBot.adapters.Satori.bot import Bot
+from AnonChihayaBot.adapters.Satori.adapter import Adapter
+
+# 创建两个适配器，各有一个 ID 相同但平台不同的机器人
+@pytest.fixture
+def app(make_adapter: Callable[..., Adapter], monkeypatch: pytest.MonkeyPatch) -> AnonChihayaBot:
+    instance = AnonChihayaBot('WebHook')
+    for platform in ('qq', 'discord'):
+        adapter = make_adapter()
+        adapter.bots['10000'] = Bot(adapter, '10000', platform, adapter.config)
+        submitted: list[Any] = []
+        def submit(function: Callable[..., Any], request: Any, submitted: list[Any]=submitted) -> bool:
+            submitted.append(request)
+            return True
+        monkeypatch.setattr(adapter.dispatcher, 'submit', submit)
+        adapter.submitted = submitted # type: ignore
+        instance.adapters.append(adapter)
+    return instance
+
+# 创建事件信令
+def event_payload(self_id: str, platform: str) -> dict[str, Any]:
+    return {'op': 0, 'body': {'id': 1, 'type': 'message-created', 'self_id': self_id, 'platform': platform}}
+
+# 路由缓存区分平台
+def test_route_cache_keys_on_platform(app: AnonChihayaBot) -> None:
+    qq, discord = app.adapters
+    assert app.route('10000', 'qq') is qq
+    assert app.route('10000', 'discord') is discord
+    assert app.route('10000', 'qq') is qq
+    assert app.route('10000', 'telegram') is None
+
+# 部分信令被接收时返回 200，其余计入统计信息
+def test_partial_batch_is_accepted(app: AnonChihayaBot) -> None:
+    body = json.dumps([event_payload('10000', 'qq'), event_payload('20000', 'qq')]).encode('utf-8')
+    assert app._on_webhook(body, {}) == 200
+    assert len(app.adapters[0].submitted) == 1 # type: ignore
+    assert app.stats()['WebHook']['rejected'] == 1
+    # 全部未能被接收
+    assert app._on_webhook(json.dumps(event_payload('20000', 'qq')).encode('utf-8'), {}) == 503
+    assert app.stats()['WebHook']['rejected'] == 2
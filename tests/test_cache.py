@@ -0,0 +1,116 @@
+'''信息缓存测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+from typing import Callable, Any
+
+import pytest
+
+from AnonChihayaBot.adapters.utils import TTLCache
+from AnonChihayaBot.adapters.Satori.bot import Bot
+from AnonChihayaBot.adapters.Satori.adapter import Adapter
+
+from conftest import Clock
+
+# 条目在过期后不再返回
+def test_entries_expire(clock: Clock) -> None:
+    cache = TTLCache(maxsize=8, ttl=10)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    clock.now += 10
+    assert cache.get('a') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+# 超出上限时淘汰最久未使用的条目
+def test_least_recently_used_is_evicted(clock: Clock) -> None:
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1 # a 成为最近使用的条目
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+# ttl 或 maxsize 为 0 时不缓存
+@pytest.mark.parametrize('maxsize, ttl', [(0, 10), (8, 0)])
+def test_disabled_cache(maxsize: int, ttl: float) -> None:
+    cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    cache.set('a', 1)
+    assert not cache.enabled
+    assert cache.get('a') is None
+
+# 按条件移除条目
+def test_invalidate_and_pop() -> None:
+    cache = TTLCache(maxsize=8, ttl=10)
+    cache.set(('member', 'g1', 'u1'), 1)
+    cache.set(('member', 'g1', 'u2'), 2)
+    cache.set(('member', 'g2', 'u1'), 3)
+    cache.set(('guild', 'g1'), 4)
+    assert cache.invalidate(lambda key: key[0] == 'member' and key[1] == 'g1') == 2 # type: ignore
+    cache.pop(('guild', 'g1'))
+    cache.pop(('guild', 'missing'))
+    assert cache.get(('member', 'g2', 'u1')) == 3
+    assert cache.get(('member', 'g1', 'u1')) is None
+    assert cache.get(('guild', 'g1')) is None
+
+# 创建测试用机器人
+@pytest.fixture
+def bot(make_adapter: Callable[..., Adapter]) -> Bot:
+    adapter = make_adapter()
+    instance = Bot(adapter, '10000', 'test', adapter.config)
+    adapter.bots['10000'] = instance
+    return instance
+
+# 记录请求并返回固定结果
+def fake_request(calls: list[str]) -> Any:
+    def request(api: str, **data: Any) -> dict[str, Any]:
+        calls.append(api)
+        if api == 'guild.get':
+            return {'id': data['guild_id'], 'name': '群组'}
+        return {'user': {'id': data['user_id'], 'name': '用户'}, 'nick': '昵称'}
+    return request
+
+# 缓存命中时返回副本，修改返回值不会影响缓存
+def test_cached_getter_returns_copies(bot: Bot, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+    monkeypatch.setattr(bot, 'request', fake_request(calls))
+    first = bot.guild_get('g1')
+    first.name = '已修改'
+    second = bot.guild_get('g1')
+    assert calls == ['guild.get']
+    assert second.name == '群组'
+    second.name = '再次修改'
+    assert bot.guild_get('g1').name == '群组'
+
+# 被预过滤丢弃的群组事件同样使缓存失效
+def test_pre_filtered_event_invalidates_cache(bot: Bot, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+    monkeypatch.setattr(bot, 'request', fake_request(calls))
+    bot.guild_get('g1')
+    bot.guild_member_get('g1', 'u1')
+    assert len(calls) == 2
+    payload = {
+        'op': 0,
+        'body': {
+            'id': 1,
+            'type': 'guild-member-updated',
+            'platform': 'ignored',
+            'self_id': '10000',
+            'timestamp': 0,
+            'guild': {'id': 'g1'},
+            'user': {'id': 'u1'}
+        }
+    }
+    assert not bot.adapter._pre_filter(payload) # type: ignore
+    bot.guild_get('g1')
+    bot.guild_member_get('g1', 'u1')
+    assert calls == ['guild.get', 'guild.member.get', 'guild.get', 'guild.member.get']
+
+# 角色变化使该群组所有成员缓存失效
+def test_role_event_invalidates_members(bot: Bot) -> None:
+    bot.cache.set(('member', 'g1', 'u1'), 1)
+    bot.cache.set(('member', 'g2', 'u1'), 2)
+    bot.invalidate_cache('guild-role-updated', 'g1')
+    assert bot.cache.get(('member', 'g1', 'u1')) is None
+    assert bot.cache.get(('member', 'g2', 'u1')) == 2
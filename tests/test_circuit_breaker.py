@@ -0,0 +1,60 @@
+'''熔断器测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+from AnonChihayaBot.adapters.utils import CircuitBreaker
+
+from conftest import Clock
+
+# 连续失败达到阈值后熔断，熔断期间拒绝请求
+def test_opens_after_threshold(clock: Clock) -> None:
+    breaker = CircuitBreaker(threshold=3, reset_timeout=10)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert not breaker.record_failure() # 熔断期间的失败不重复计入熔断次数
+    assert breaker.stats() == {'state': 'open', 'failures': 4, 'opened': 1, 'rejected': 1}
+
+# 成功会重置连续失败次数
+def test_success_resets_failures(clock: Clock) -> None:
+    breaker = CircuitBreaker(threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_success()
+    assert not breaker.record_failure()
+    assert breaker.state == 'closed'
+
+# 熔断超时后只放行一个试探请求，成功则恢复
+def test_half_open_probe_success(clock: Clock) -> None:
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 9.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow()
+    assert breaker.state == 'half-open'
+    assert not breaker.allow() # 试探请求完成前拒绝其他请求
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+
+# 试探请求失败时重新熔断
+def test_half_open_probe_failure(clock: Clock) -> None:
+    breaker = CircuitBreaker(threshold=5, reset_timeout=10)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.stats()['opened'] == 2
+    assert not breaker.allow()
+
+# threshold 不大于 0 时不熔断
+def test_disabled_breaker(clock: Clock) -> None:
+    breaker = CircuitBreaker(threshold=0)
+    for _ in range(100):
+        assert not breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == 'closed'
@@ -0,0 +1,76 @@
+'''JSON 编解码测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+from typing import Any
+
+import pytest
+
+from AnonChihayaBot.adapters import codec
+
+# 测试用数据
+SAMPLES: list[Any] = [
+    {
+        'op': 0,
+        'body': {
+            'id': 1,
+            'type': 'message-created',
+            'platform': 'qq',
+            'self_id': '10000',
+            'timestamp': 1700000000000,
+            'user': {'id': '40000', 'name': '用户 "引号" \\ 反斜杠', 'avatar': None},
+            'message': {'id': 'm1', 'content': '你好 <at id="10000"/>\n第二行\t制表   \x01'}
+        }
+    },
+    {'channel_id': '20000', 'content': '😀 emoji &amp; <img src="a.png"/>'},
+    [1, -2, 3.5, 0.1, True, False, None, '', [], {}],
+    'plain string',
+    12345678901234567890 // 10
+]
+
+# 获取标准库回退实现的结果
+@pytest.fixture
+def fallback(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(codec, 'orjson', None)
+
+# 回退实现的编码结果与 orjson 一致
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_fallback_dumps_matches_orjson(sample: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    orjson = pytest.importorskip('orjson')
+    expected = orjson.dumps(sample)
+    monkeypatch.setattr(codec, 'orjson', None)
+    assert codec.dumps(sample) == expected
+    assert codec.dumps_str(sample) == expected.decode('utf-8')
+
+# 回退实现的解码结果与 orjson 一致
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_fallback_loads_matches_orjson(sample: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    orjson = pytest.importorskip('orjson')
+    data = orjson.dumps(sample)
+    expected = orjson.loads(data)
+    monkeypatch.setattr(codec, 'orjson', None)
+    assert codec.loads(data) == expected
+    assert codec.loads(memoryview(data)) == expected
+    assert codec.loads(data.decode('utf-8')) == expected
+
+# 编码后可以原样解码
+@pytest.mark.parametrize('sample', SAMPLES)
+def test_round_trip(sample: Any) -> None:
+    assert codec.loads(codec.dumps(sample)) == sample
+
+# 批量解码单个值、数组与二次编码的数据
+@pytest.mark.usefixtures('fallback')
+def test_loads_batch_values() -> None:
+    assert codec.loads_batch(b'{"op":0}') == ([{'op': 0}], 0)
+    assert codec.loads_batch(b'[{"op":0},{"op":2}]') == ([{'op': 0}, {'op': 2}], 0)
+    assert codec.loads_batch('"{\\"op\\":0}"') == ([{'op': 0}], 0)
+
+# 按 NDJSON 逐行解码并统计错误行
+@pytest.mark.parametrize('backend', ['orjson', 'json'])
+def test_loads_batch_ndjson(backend: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    if backend == 'json':
+        monkeypatch.setattr(codec, 'orjson', None)
+    elif codec.orjson is None:
+        pytest.skip('未安装 orjson')
+    items, errors = codec.loads_batch(b'{"op":0}\n\n{bad}\n{"op":2}\n')
+    assert items == [{'op': 0}, {'op': 2}]
+    assert errors == 1
@@ -0,0 +1,111 @@
+'''事件分发器测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import time
+import asyncio
+import threading
+
+from AnonChihayaBot.adapters.dispatcher import Dispatcher, AsyncDispatcher
+
+# 等待条件成立
+def wait_until(predicate, timeout: float=5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+# 抛出异常的任务
+def fail() -> None:
+    raise ValueError('任务失败')
+
+# 成功与失败任务分别计数
+def test_dispatcher_counts_failures_separately() -> None:
+    dispatcher = Dispatcher('test', workers=2)
+    done = []
+    try:
+        for index in range(5):
+            assert dispatcher.submit(done.append, index)
+        for _ in range(3):
+            assert dispatcher.submit(fail)
+        assert wait_until(lambda: dispatcher.completed + dispatcher.failed == 8)
+        stats = dispatcher.stats()
+        assert stats['submitted'] == 8
+        assert stats['completed'] == 5
+        assert stats['failed'] == 3
+        assert sorted(done) == list(range(5))
+    finally:
+        dispatcher.shutdown()
+
+# 同步分发器可以运行 `async def` 任务
+def test_dispatcher_runs_coroutine_function() -> None:
+    dispatcher = Dispatcher('test', workers=1)
+    done = threading.Event()
+    async def task() -> None:
+        await asyncio.sleep(0)
+        done.set()
+    try:
+        assert dispatcher.submit(task)
+        assert done.wait(5)
+        assert wait_until(lambda: dispatcher.completed == 1)
+    finally:
+        dispatcher.shutdown()
+
+# 队列已满时拒绝任务
+def test_dispatcher_rejects_when_full() -> None:
+    dispatcher = Dispatcher('test', workers=1, queue_size=1)
+    gate = threading.Event()
+    started = threading.Event()
+    def block() -> None:
+        started.set()
+        gate.wait(5)
+    try:
+        assert dispatcher.submit(block)
+        assert started.wait(5)
+        assert dispatcher.submit(block) # 占满等待队列
+        assert not dispatcher.submit(block)
+        assert dispatcher.rejected == 1
+    finally:
+        gate.set()
+        dispatcher.shutdown()
+
+# 停止后不再接收任务
+def test_dispatcher_shutdown_rejects_new_tasks() -> None:
+    dispatcher = Dispatcher('test', workers=1)
+    dispatcher.start()
+    dispatcher.shutdown()
+    assert not dispatcher.submit(print)
+
+# 异步分发器成功与失败任务分别计数
+def test_async_dispatcher_counts_failures_separately() -> None:
+    dispatcher = AsyncDispatcher('test', workers=2)
+    done = []
+    async def ok(value: int) -> None:
+        done.append(value)
+    async def bad() -> None:
+        raise ValueError('任务失败')
+    async def main() -> None:
+        dispatcher.start(asyncio.get_running_loop())
+        assert dispatcher.submit(ok, 1)
+        assert dispatcher.submit(done.append, 2) # 同步任务交由线程池执行
+        assert dispatcher.submit(bad)
+        assert dispatcher.submit(fail)
+        for _ in range(500):
+            if dispatcher.queue_depth == 0:
+                break
+            await asyncio.sleep(0.01)
+    try:
+        asyncio.run(main())
+        stats = dispatcher.stats()
+        assert stats['queue_depth'] == 0
+        assert stats['completed'] == 2
+        assert stats['failed'] == 2
+        assert sorted(done) == [1, 2]
+    finally:
+        dispatcher.shutdown()
+
+# 异步分发器未启动时拒绝任务
+def test_async_dispatcher_requires_start() -> None:
+    dispatcher = AsyncDispatcher('test')
+    assert not dispatcher.submit(print)
@@ -0,0 +1,42 @@
+'''WebHook 转发器测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+from time import sleep, monotonic
+from typing import Any
+
+import httpx
+
+from AnonChihayaBot.adapters.forwarder import Forwarder
+
+# 记录推送内容的 HTTP 客户端
+class Client:
+    def __init__(self, delay: float=0) -> None:
+        self.delay = delay
+        self.posted: list[bytes] = []
+
+    def post(self, path: str, content: bytes, **kwargs: Any) -> httpx.Response:
+        sleep(self.delay)
+        self.posted.append(content)
+        return httpx.Response(200, request=httpx.Request('POST', 'http://test' + path))
+
+# 停止时推送缓冲区中的数据并等待推送线程退出
+def test_shutdown_flushes_and_joins() -> None:
+    client = Client(delay=0.05)
+    forwarder = Forwarder('test', client, '/') # type: ignore
+    for index in range(3):
+        assert forwarder.forward(b'%d' % index)
+    forwarder.shutdown()
+    assert forwarder._thread is not None and not forwarder._thread.is_alive()
+    assert client.posted == [b'0', b'1', b'2']
+    assert forwarder.stats()['forwarded'] == 3
+    assert not forwarder.forward(b'3')
+
+# 推送线程未能按时退出时不会一直等待
+def test_shutdown_timeout() -> None:
+    forwarder = Forwarder('test', Client(delay=0.5), '/') # type: ignore
+    forwarder.forward(b'0')
+    forwarder.forward(b'1')
+    start = monotonic()
+    forwarder.shutdown(timeout=0.2)
+    assert monotonic() - start < 0.4
+    assert forwarder._thread is not None and forwarder._thread.is_alive()
@@ -0,0 +1,38 @@
+'''Satori 模型测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import json
+
+from AnonChihayaBot.adapters.Satori.models import Message as SatoriMessage
+from AnonChihayaBot.adapters.Satori.message import Message
+from AnonChihayaBot.adapters.Satori.utils import Element, Node, parse
+
+SOURCE = '<b>加粗<i>斜体</i></b> 你好 &amp; <at id="1"/><message forward><message>转发</message></message>'
+
+# 由字符串得到的消息内容不经过验证，序列化结果与 Element 相同
+def test_content_is_stored_as_nodes() -> None:
+    message = SatoriMessage.model_validate({'id': '1', 'content': SOURCE})
+    assert all(isinstance(node, Node) for node in message.content)
+    expected = [element.model_dump() for element in parse(SOURCE)]
+    assert message.model_dump()['content'] == expected
+    assert json.loads(message.model_dump_json())['content'] == expected
+    assert ''.join(str(node) for node in message.content) == ''.join(str(element) for element in parse(SOURCE))
+
+# 消息数组与由 Element 生成时一致
+def test_message_from_nodes() -> None:
+    message = SatoriMessage.model_validate({'id': '1', 'content': SOURCE})
+    assert Message.from_satori_element(message.content) == Message.from_satori_element(parse(SOURCE))
+
+# 深拷贝不共享元素
+def test_deep_copy() -> None:
+    message = SatoriMessage.model_validate({'id': '1', 'content': SOURCE})
+    copied = message.model_copy(deep=True)
+    copied.content[0].attrs['changed'] = True
+    assert 'changed' not in message.content[0].attrs
+
+# 以字典或 Element 给出的内容仍按 Element 验证
+def test_element_content_is_validated() -> None:
+    message = SatoriMessage.model_validate({'id': '1', 'content': [{'type': 'text', 'attrs': {'text': 'a'}}]})
+    assert isinstance(message.content[0], Element)
+    element = Element(type='text', attrs={'text': 'b'})
+    assert SatoriMessage(id='1', content=[element]).content[0] is element
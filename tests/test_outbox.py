@@ -0,0 +1,258 @@
+'''消息发送队列测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import threading
+from time import sleep, monotonic
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Callable, Iterator, Optional, Any
+
+import pytest
+
+from AnonChihayaBot.adapters.outbox import Outbox, TokenBucket
+from AnonChihayaBot.adapters.Satori.bot import Bot
+from AnonChihayaBot.adapters.Satori.adapter import Adapter
+from AnonChihayaBot.adapters.Satori.models import Login, User, Status
+from AnonChihayaBot.adapters.Satori.event import LoginRemovedEvent
+
+# 记录发送内容的发送函数
+class Recorder:
+    def __init__(self, delay: float=0) -> None:
+        self.delay = delay
+        self.sent: list[tuple[str, str, float]] = []
+        self.lock = threading.Lock()
+
+    def __call__(self, channel_id: str, content: str) -> str:
+        if self.delay > 0:
+            sleep(self.delay)
+        with self.lock:
+            self.sent.append((channel_id, content, monotonic()))
+        return content
+
+    def channel(self, channel_id: str) -> list[str]:
+        with self.lock:
+            return [content for channel, content, _ in self.sent if channel == channel_id]
+
+# 创建发送队列，测试结束后停止
+@pytest.fixture
+def make_outbox() -> Iterator[Callable[..., Outbox]]:
+    outboxes: list[Outbox] = []
+    def make(sender: Callable[[str, str], Any], **kwargs: Any) -> Outbox:
+        outbox = Outbox('test', sender, **kwargs)
+        outboxes.append(outbox)
+        return outbox
+    yield make
+    for outbox in outboxes:
+        outbox.shutdown()
+
+# 令牌耗尽后按速率计算等待时间
+def test_token_bucket_delay() -> None:
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    assert bucket.delay(now) == 0
+    bucket.consume(now)
+    bucket.consume(now)
+    assert bucket.delay(now) == pytest.approx(0.5)
+    assert not bucket.full(now)
+    assert bucket.delay(now + 0.5) == 0
+    assert bucket.full(now + 1)
+
+# rate 不大于 0 时不限制
+def test_token_bucket_unlimited() -> None:
+    bucket = TokenBucket(rate=0, capacity=1)
+    now = bucket.updated
+    for _ in range(10):
+        bucket.consume(now)
+    assert bucket.delay(now) == 0
+    assert bucket.full(now)
+
+# 同一频道的消息按放入顺序发送
+def test_channel_order(make_outbox: Callable[..., Outbox]) -> None:
+    recorder = Recorder()
+    outbox = make_outbox(recorder, workers=4, channel_rate=0, bot_rate=0)
+    futures = [outbox.submit('c1', str(index)) for index in range(50)]
+    for future in futures:
+        future.result(timeout=5)
+    assert recorder.channel('c1') == [str(index) for index in range(50)]
+    assert outbox.stats()['sent'] == 50
+    assert outbox.stats()['pending'] == 0
+
+# 被限速的频道不会占用工作线程
+def test_throttled_channel_does_not_block_others(make_outbox: Callable[..., Outbox]) -> None:
+    recorder = Recorder()
+    outbox = make_outbox(recorder, workers=1, channel_rate=1, channel_burst=1, bot_rate=0)
+    throttled = [outbox.submit('a', str(index)) for index in range(3)]
+    start = monotonic()
+    outbox.submit('b', 'b').result(timeout=5)
+    assert monotonic() - start < 0.5
+    assert not throttled[1].done()
+    assert outbox.stats()['throttled'] >= 1
+    for future in throttled:
+        future.result(timeout=5)
+    assert recorder.channel('a') == ['0', '1', '2']
+
+# 等待合并的频道不会占用工作线程，等待期间放入的短消息被合并发送
+def test_merge_wait_does_not_block_others(make_outbox: Callable[..., Outbox]) -> None:
+    recorder = Recorder()
+    outbox = make_outbox(recorder, workers=1, channel_rate=0, bot_rate=0, merge_interval=0.3)
+    first = outbox.submit('a', '一')
+    second = outbox.submit('a', '二')
+    start = monotonic()
+    other = outbox.submit('b', '<at id="1"/>') # 含消息元素，不会被合并
+    other.result(timeout=5)
+    assert monotonic() - start < 0.2
+    assert not first.done()
+    assert first.result(timeout=5) == second.result(timeout=5) == '一\n二'
+    assert recorder.channel('a') == ['一\n二']
+    assert outbox.stats()['merged'] == 1
+
+# 发送失败时所有被合并的消息都得到异常
+def test_sender_failure(make_outbox: Callable[..., Outbox]) -> None:
+    def sender(channel_id: str, content: str) -> None:
+        raise ValueError(content)
+    outbox = make_outbox(sender, channel_rate=0, bot_rate=0)
+    with pytest.raises(ValueError):
+        outbox.submit('a', 'x').result(timeout=5)
+    assert outbox.stats()['failed'] == 1
+
+# 队列已满时拒绝新的消息
+def test_queue_full_is_rejected(make_outbox: Callable[..., Outbox]) -> None:
+    outbox = make_outbox(Recorder(), workers=1, queue_size=2, channel_rate=0.1, channel_burst=1, bot_rate=0)
+    outbox.submit('a', '1').result(timeout=5)
+    outbox.submit('a', '2')
+    outbox.submit('a', '3')
+    with pytest.raises(RuntimeError):
+        outbox.submit('a', '4').result(timeout=5)
+    assert outbox.stats()['rejected'] == 1
+
+# 已被取消的消息不会被发送
+def test_cancelled_message_is_skipped(make_outbox: Callable[..., Outbox]) -> None:
+    recorder = Recorder()
+    outbox = make_outbox(recorder, workers=1, channel_rate=5, channel_burst=1, bot_rate=0)
+    outbox.submit('a', '1').result(timeout=5)
+    cancelled = outbox.submit('a', '2')
+    last = outbox.submit('a', '3')
+    assert cancelled.cancel()
+    last.result(timeout=5)
+    with pytest.raises(CancelledError):
+        cancelled.result()
+    assert recorder.channel('a') == ['1', '3']
+    assert outbox.stats()['pending'] == 0
+
+# 停止后未发送的消息得到异常
+def test_shutdown_fails_pending(make_outbox: Callable[..., Outbox]) -> None:
+    outbox = make_outbox(Recorder(), workers=1, channel_rate=0.1, channel_burst=1, bot_rate=0)
+    outbox.submit('a', '1').result(timeout=5)
+    waiting = outbox.submit('a', '2')
+    outbox.shutdown()
+    with pytest.raises(RuntimeError):
+        waiting.result(timeout=5)
+    with pytest.raises(RuntimeError):
+        outbox.submit('a', '3').result(timeout=5)
+    assert outbox.stats()['pending'] == 0
+    assert outbox.stats()['channels'] == 0
+
+# 超时后 message_create 抛出 TimeoutError 并取消未发送的消息
+def test_message_create_timeout(make_adapter: Callable[..., Adapter], monkeypatch: pytest.MonkeyPatch) -> None:
+    adapter = make_adapter(outbox_timeout=0.2, outbox_workers=1, outbox_channel_rate=0, outbox_bot_rate=0)
+    bot = Bot(adapter, '10000', 'test', adapter.config)
+    calls: list[str] = []
+    def request(api: str, **data: Any) -> list[Any]:
+        calls.append(data['content'])
+        sleep(0.5)
+        return []
+    monkeypatch.setattr(bot, 'request', request)
+    try:
+        with pytest.raises(TimeoutError):
+            bot.message_create('a', '1')
+        with pytest.raises(TimeoutError):
+            bot.message_create('a', '2') # 等待第一条消息发送期间超时，被取消
+        sleep(0.6)
+        assert calls == ['1']
+    finally:
+        bot.outbox.shutdown()
+
+# 重复的登录复用已有的机器人，登录被删除时停止其发送队列
+def test_bot_is_reused_and_stopped(make_adapter: Callable[..., Adapter]) -> None:
+    adapter = make_adapter()
+    login = Login(user=User(id='10000', name='bot'), self_id='10000', platform='test', status=Status.ONLINE)
+    adapter._bot_connect([login])
+    bot = adapter.bots['10000']
+    adapter._bot_connect([login])
+    assert adapter.bots['10000'] is bot
+    assert not bot.outbox._closed
+    event = LoginRemovedEvent.model_validate({
+        'id': 1,
+        'type': 'login-removed',
+        'platform': 'test',
+        'self_id': '10000',
+        'timestamp': 0,
+        'login': login.model_dump()
+    })
+    adapter._handle_login(event)
+    assert '10000' not in adapter.bots
+    assert bot.outbox._closed
+
+# 群发时各频道并行发送，并发数由 concurrency 决定，与发送队列工作线程数无关
+@pytest.mark.parametrize('concurrency, expected', [(None, 4), (16, 8), (2, 2)])
+def test_broadcast_concurrency(
+    make_adapter: Callable[..., Adapter],
+    monkeypatch: pytest.MonkeyPatch,
+    concurrency: Optional[int],
+    expected: int
+) -> None:
+    adapter = make_adapter(
+        outbox_workers=1,
+        outbox_broadcast_concurrency=4,
+        outbox_channel_rate=0,
+        outbox_bot_rate=0
+    )
+    bot = Bot(adapter, '10000', 'test', adapter.config)
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    def post_message(channel_id: str, encoded: bytes) -> list[Any]:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        sleep(0.1)
+        with lock:
+            active -= 1
+        return []
+    monkeypatch.setattr(bot, '_post_message', post_message)
+    try:
+        report = bot.broadcast([f'c{index}' for index in range(8)], '群发', concurrency)
+    finally:
+        bot.outbox.shutdown()
+    assert report.succeeded == 8
+    assert peak == expected
+
+# 指定线程池的消息不占用工作线程，同一频道的消息仍按顺序发送
+def test_executor_does_not_occupy_workers(make_outbox: Callable[..., Outbox]) -> None:
+    slow = Recorder(delay=0.3)
+    fast = Recorder()
+    outbox = make_outbox(fast, workers=1, channel_rate=0, bot_rate=0)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = outbox.submit('a', '1', slow, executor)
+        second = outbox.submit('a', '2', slow, executor)
+        start = monotonic()
+        outbox.submit('b', 'b').result(timeout=5)
+        assert monotonic() - start < 0.2
+        assert first.result(timeout=5) == '1'
+        assert second.result(timeout=5) == '2'
+    assert slow.channel('a') == ['1', '2']
+    assert slow.sent[1][2] - slow.sent[0][2] >= 0.25 # 同一频道不会同时发送
+
+# 已被取消的消息不会消耗令牌
+def test_cancelled_message_does_not_consume_tokens(make_outbox: Callable[..., Outbox]) -> None:
+    recorder = Recorder()
+    outbox = make_outbox(recorder, workers=1, channel_rate=0, bot_rate=2, bot_burst=1)
+    outbox.submit('a', '1').result(timeout=5)
+    cancelled = outbox.submit('a', '2') # 等待机器人令牌
+    assert cancelled.cancel()
+    sleep(0.6)
+    start = monotonic()
+    outbox.submit('b', '3').result(timeout=5)
+    assert monotonic() - start < 0.2
+    assert recorder.channel('a') == ['1']
+    assert outbox.stats()['pending'] == 0
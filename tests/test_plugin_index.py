@@ -0,0 +1,107 @@
+'''插件功能索引测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+from types import ModuleType
+from typing import Callable
+
+import pytest
+
+import AnonChihayaBot._plugin as plugin_module
+from AnonChihayaBot._plugin import Plugin, FunctionIndex
+from AnonChihayaBot.adapters.utils import Function
+from AnonChihayaBot.adapters.Satori.bot import Bot
+from AnonChihayaBot.adapters.Satori.adapter import Adapter
+from AnonChihayaBot.adapters.Satori.message import Message, MessageSegment
+
+from conftest import message_event
+
+# 测试用事件对象
+class FakeEvent:
+    def __init__(self, message: Message | None, to_me: bool=False) -> None:
+        self.message = message
+        self.to_me = to_me
+    
+    def get_message(self) -> Message:
+        if self.message is None:
+            raise NotImplementedError
+        return self.message
+    
+    def is_tome(self) -> bool:
+        return self.to_me
+
+# 创建功能对象
+def make_function(name: str, command: str='', to_me: bool=False) -> Function:
+    return Function(name, name, '', '', lambda bot, event: None, command, to_me)
+
+# 创建插件与索引
+def make_index(*functions: Function) -> tuple[Plugin, FunctionIndex]:
+    plugin = Plugin('test', '', 'test', ModuleType('test'))
+    plugin.functions.extend(functions)
+    return plugin, FunctionIndex.build([plugin])
+
+# 获取匹配的功能名
+def names(index: FunctionIndex, event: FakeEvent) -> list[str]:
+    return [function.name for _, function in index.match(event)]
+
+# 指令按前缀匹配，按注册顺序返回
+def test_match_command_prefix_in_registration_order() -> None:
+    _, index = make_index(
+        make_function('echo_all', '/echo'),
+        make_function('any'),
+        make_function('e', '/e'),
+        make_function('timer', '/timer')
+    )
+    event = FakeEvent(Message([MessageSegment.text('/echo hello')]))
+    assert names(index, event) == ['echo_all', 'any', 'e']
+
+# 指令不匹配时只返回无过滤功能
+def test_match_without_command() -> None:
+    _, index = make_index(make_function('echo', '/echo'), make_function('any'))
+    event = FakeEvent(Message([MessageSegment.text('hello')]))
+    assert names(index, event) == ['any']
+
+# 首段不是文本时不匹配指令
+def test_match_non_text_first_segment() -> None:
+    _, index = make_index(make_function('echo', '/echo'), make_function('any'))
+    event = FakeEvent(Message([MessageSegment.at('1'), MessageSegment.text('/echo')]))
+    assert names(index, event) == ['any']
+
+# 提及机器人的功能只在被提及时启用
+def test_match_to_me() -> None:
+    _, index = make_index(make_function('me', '/me', to_me=True), make_function('any'))
+    message = Message([MessageSegment.text('hi')])
+    assert names(index, FakeEvent(message)) == ['any']
+    assert names(index, FakeEvent(message, to_me=True)) == ['me', 'any']
+
+# 非消息事件只交由无过滤功能处理
+def test_match_non_message_event() -> None:
+    _, index = make_index(make_function('echo', '/echo'), make_function('any'))
+    assert names(index, FakeEvent(None)) == ['any']
+    assert index.count == 2
+
+# 不是帮助指令的 /help 前缀消息仍交由匹配的功能处理
+def test_help_prefixed_message_is_dispatched(
+    make_adapter: Callable[..., Adapter],
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    plugin, index = make_index(make_function('helpme', '/helpme'), make_function('any'))
+    monkeypatch.setattr(plugin_module, 'plugins', [plugin])
+    monkeypatch.setattr(plugin_module, 'function_index', index)
+    adapter = make_adapter()
+    bot = Bot(adapter, '10000', 'test', adapter.config)
+    replies: list[str] = []
+    submitted: list[str] = []
+    monkeypatch.setattr(bot, 'send', lambda event, message: replies.append(str(message)))
+    monkeypatch.setattr(
+        adapter.dispatcher, 'submit',
+        lambda function, bot, event: submitted.append(str(event.get_message()))
+    )
+    bot.handle_event(message_event('1', '/helpme'))
+    bot.handle_event(message_event('1', '/help unknown'))
+    assert submitted == ['/helpme', '/helpme', '/help unknown']
+    assert replies == []
+    # 帮助指令与匹配到名称的 /help 不会交由功能处理
+    bot.handle_event(message_event('1', '/help'))
+    bot.handle_event(message_event('1', '/help helpme'))
+    assert len(submitted) == 3
+    assert len(replies) == 2
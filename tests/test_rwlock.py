@@ -0,0 +1,77 @@
+'''读写锁测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import time
+import threading
+
+from AnonChihayaBot.adapters.utils import RWLock
+
+# 多个读者可以同时持有读锁
+def test_readers_share_lock() -> None:
+    lock = RWLock()
+    barrier = threading.Barrier(4, timeout=5)
+    def read() -> None:
+        with lock.read():
+            barrier.wait() # 四个读者都进入后才会继续
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not barrier.broken
+
+# 写者与读者互斥
+def test_writer_excludes_readers() -> None:
+    lock = RWLock()
+    entered = threading.Event()
+    lock.acquire_write()
+    def read() -> None:
+        with lock.read():
+            entered.set()
+    thread = threading.Thread(target=read)
+    thread.start()
+    assert not entered.wait(0.1)
+    lock.release_write()
+    assert entered.wait(5)
+    thread.join(5)
+
+# 等待中的写者优先于新的读者
+def test_waiting_writer_blocks_new_readers() -> None:
+    lock = RWLock()
+    order: list[str] = []
+    lock.acquire_read()
+    def write() -> None:
+        with lock.write():
+            order.append('write')
+    def read() -> None:
+        with lock.read():
+            order.append('read')
+    writer = threading.Thread(target=write)
+    writer.start()
+    while lock._waiting_writers == 0: # 等待写者开始等待
+        time.sleep(0.001)
+    reader = threading.Thread(target=read)
+    reader.start()
+    time.sleep(0.05)
+    assert order == []
+    lock.release_read()
+    writer.join(5)
+    reader.join(5)
+    assert order == ['write', 'read']
+
+# 读写并发时数据保持一致
+def test_concurrent_writes_are_exclusive() -> None:
+    lock = RWLock()
+    counter = [0]
+    def write() -> None:
+        for _ in range(1000):
+            with lock.write():
+                value = counter[0]
+                time.sleep(0)
+                counter[0] = value + 1
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert counter[0] == 4000
@@ -0,0 +1,150 @@
+'''内置 WebHook 服务器测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import socket
+from time import monotonic
+from typing import Iterator
+
+import pytest
+
+from AnonChihayaBot.adapters.config import ServerConfig
+from AnonChihayaBot.adapters.server import WebHookServer
+
+# 启动测试用服务器
+@pytest.fixture
+def server() -> Iterator[tuple[WebHookServer, list[bytes]]]:
+    bodies: list[bytes] = []
+    def handler(body: bytes, headers: dict[str, str]) -> int:
+        bodies.append(body)
+        return 200
+    config = ServerConfig(host='127.0.0.1', port=0, path='/', max_body_size=64, max_header_size=512, max_headers=8)
+    instance = WebHookServer(config, handler)
+    instance.start()
+    try:
+        yield instance, bodies
+    finally:
+        instance.shutdown()
+
+# 连接到服务器
+def connect(instance: WebHookServer) -> socket.socket:
+    assert instance._server is not None
+    port = instance._server.sockets[0].getsockname()[1]
+    return socket.create_connection(('127.0.0.1', port), timeout=5)
+
+# 读取一个响应头
+def read_response(sock: socket.socket, buffer: bytearray) -> str:
+    while b'\r\n\r\n' not in buffer:
+        data = sock.recv(4096)
+        if not data:
+            break
+        buffer.extend(data)
+    head, _, rest = bytes(buffer).partition(b'\r\n\r\n')
+    buffer[:] = rest
+    return head.decode('latin-1')
+
+# 长连接上依次处理 Content-Length 请求
+def test_content_length_keep_alive(server: tuple[WebHookServer, list[bytes]]) -> None:
+    instance, bodies = server
+    with connect(instance) as sock:
+        buffer = bytearray()
+        for body in (b'{"op":0}', b'{"op":1}'):
+            sock.sendall(b'POST / HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body))
+            assert read_response(sock, buffer).startswith('HTTP/1.1 200')
+    assert bodies == [b'{"op":0}', b'{"op":1}']
+
+# 支持 chunked 请求体
+def test_chunked_body(server: tuple[WebHookServer, list[bytes]]) -> None:
+    instance, bodies = server
+    with connect(instance) as sock:
+        sock.sendall(
+            b'POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'4;ext=1\r\n{"op\r\n4\r\n":0}\r\n0\r\nX-Trailer: 1\r\n\r\n'
+        )
+        assert read_response(sock, bytearray()).startswith('HTTP/1.1 200')
+    assert bodies == [b'{"op":0}']
+
+# chunked 请求体超出上限
+def test_chunked_body_too_large(server: tuple[WebHookServer, list[bytes]]) -> None:
+    instance, bodies = server
+    with connect(instance) as sock:
+        sock.sendall(b'POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n41\r\n' + b'x' * 65 + b'\r\n0\r\n\r\n')
+        assert read_response(sock, bytearray()).startswith('HTTP/1.1 413')
+    assert bodies == []
+
+# 同时存在 Content-Length 与 Transfer-Encoding 时拒绝请求
+def test_conflicting_length_headers(server: tuple[WebHookServer, list[bytes]]) -> None:
+    instance, _ = server
+    with connect(instance) as sock:
+        sock.sendall(b'POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\nContent-Length: 3\r\n\r\n')
+        assert read_response(sock, bytearray()).startswith('HTTP/1.1 400')
+
+# 收到 Expect: 100-continue 时先回复 100 Continue
+def test_expect_continue(server: tuple[WebHookServer, list[bytes]]) -> None:
+    instance, bodies = server
+    with connect(instance) as sock:
+        buffer = bytearray()
+        sock.sendall(b'POST / HTTP/1.1\r\nContent-Length: 2\r\nExpect: 100-continue\r\n\r\n')
+        assert read_response(sock, buffer).startswith('HTTP/1.1 100 Continue')
+        sock.sendall(b'{}')
+        assert read_response(sock, buffer).startswith('HTTP/1.1 200')
+    assert bodies == [b'{}']
+
+# 请求体过大时不回复 100 Continue
+def test_expect_continue_too_large(server: tuple[WebHookServer, list[bytes]]) -> None:
+    instance, _ = server
+    with connect(instance) as sock:
+        sock.sendall(b'POST / HTTP/1.1\r\nContent-Length: 1000\r\nExpect: 100-continue\r\n\r\n')
+        assert read_response(sock, bytearray()).startswith('HTTP/1.1 413')
+
+# 请求头数量超出上限
+def test_too_many_headers(server: tuple[WebHookServer, list[bytes]]) -> None:
+    instance, _ = server
+    with connect(instance) as sock:
+        headers = b''.join(b'X-Header-%d: 1\r\n' % index for index in range(9))
+        sock.sendall(b'POST / HTTP/1.1\r\n' + headers + b'Content-Length: 0\r\n\r\n')
+        assert read_response(sock, bytearray()).startswith('HTTP/1.1 431')
+
+# 请求头长度超出上限
+def test_headers_too_large(server: tuple[WebHookServer, list[bytes]]) -> None:
+    instance, _ = server
+    with connect(instance) as sock:
+        sock.sendall(b'POST / HTTP/1.1\r\nX-Large: ' + b'a' * 600 + b'\r\n\r\n')
+        assert read_response(sock, bytearray()).startswith('HTTP/1.1 431')
+
+# 路径或方法错误
+def test_wrong_path_and_method(server: tuple[WebHookServer, list[bytes]]) -> None:
+    instance, bodies = server
+    with connect(instance) as sock:
+        buffer = bytearray()
+        sock.sendall(b'POST /other HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}')
+        assert read_response(sock, buffer).startswith('HTTP/1.1 404')
+        sock.sendall(b'GET / HTTP/1.1\r\n\r\n')
+        assert read_response(sock, buffer).startswith('HTTP/1.1 405')
+    assert bodies == []
+
+# 启动带有超时配置的服务器
+@pytest.fixture
+def timeout_server() -> Iterator[WebHookServer]:
+    config = ServerConfig(host='127.0.0.1', port=0, path='/', idle_timeout=0.2, read_timeout=0.2)
+    instance = WebHookServer(config, lambda body, headers: 200)
+    instance.start()
+    try:
+        yield instance
+    finally:
+        instance.shutdown()
+
+# 长连接空闲超时后关闭连接
+def test_idle_connection_is_closed(timeout_server: WebHookServer) -> None:
+    with connect(timeout_server) as sock:
+        buffer = bytearray()
+        sock.sendall(b'POST / HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}')
+        assert read_response(sock, buffer).startswith('HTTP/1.1 200')
+        start = monotonic()
+        assert sock.recv(4096) == b''
+        assert monotonic() - start < 2
+
+# 读取请求超时时响应 408
+def test_slow_request_times_out(timeout_server: WebHookServer) -> None:
+    with connect(timeout_server) as sock:
+        sock.sendall(b'POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\n{}')
+        assert read_response(sock, bytearray()).startswith('HTTP/1.1 408')
@@ -0,0 +1,70 @@
+'''相同请求合并测试'''
+# -*- coding: utf-8 -*-
+# !/usr/bin/python3
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from AnonChihayaBot.adapters.utils import SingleFlight
+
+# 同时发起的相同调用只执行一次
+def test_concurrent_calls_are_shared() -> None:
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls: list[int] = []
+    def fetch() -> dict[str, str]:
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'id': '1'}
+    with ThreadPoolExecutor(8) as executor:
+        leader = executor.submit(flight.do, 'key', fetch)
+        assert started.wait(5)
+        followers = [executor.submit(flight.do, 'key', fetch) for _ in range(7)]
+        while flight.stats()['shared'] < 7: # 等待所有调用者加入
+            time.sleep(0.001)
+        release.set()
+        results = [leader.result(5)] + [future.result(5) for future in followers]
+    assert len(calls) == 1
+    assert all(result == {'id': '1'} for result in results)
+    assert flight.stats() == {'calls': 1, 'shared': 7, 'in_flight': 0}
+
+# 不同的键分别执行
+def test_different_keys_run_separately() -> None:
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.stats()['calls'] == 2
+
+# 调用结束后相同的键会重新执行
+def test_finished_call_is_not_reused() -> None:
+    flight = SingleFlight()
+    values = iter(range(3))
+    assert flight.do('a', lambda: next(values)) == 0
+    assert flight.do('a', lambda: next(values)) == 1
+
+# 异常被共享给所有等待中的调用者，之后可以重试
+def test_exception_is_shared_and_cleared() -> None:
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    def fail() -> None:
+        started.set()
+        release.wait(5)
+        raise RuntimeError('请求失败')
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(flight.do, 'key', fail)
+        assert started.wait(5)
+        follower = executor.submit(flight.do, 'key', fail)
+        while flight.stats()['shared'] < 1:
+            time.sleep(0.001)
+        release.set()
+        with pytest.raises(RuntimeError):
+            leader.result(5)
+        with pytest.raises(RuntimeError):
+            follower.result(5)
+    assert flight.stats()['in_flight'] == 0
+    assert flight.do('key', lambda: 'ok') == 'ok'